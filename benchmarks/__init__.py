@@ -0,0 +1 @@
+"""Offline synthetic benchmarks for the DC1 evaluation hot paths."""
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Offline synthetic benchmark suite for the DC1 hot paths.
+
+Times the entry points of this repository on locally synthesized, DC1-shaped
+data (see :mod:`benchmarks.synthetic`):
+
+* ``forecast_validation`` — :func:`dc1.evaluation.submission_writer.validate_forecast`
+  on an in-memory forecast;
+* ``submission_scan`` — :func:`dc1.evaluation.submission_scan.scan_submission`
+  over a directory of per-init-date Zarr stores;
+* ``dctools_validation`` — ``dctools.submission.ModelSubmission.validate``
+  (``python -m dc1.submit validate``) on the same directory, full size only
+  since it checks the real DC1 grid, and only when dctools is installed;
+* ``obs_batch_planning`` — :func:`dc1.evaluation.obs_cache.plan_batch_obs_files`
+  for one batch of tasks against a year-long observation catalog;
+* ``interpolation`` — bilinear interpolation of a forecast onto along-track,
+  swath and profile positions with ``pyinterp`` (``interpolation_method:
+  pyinterp``, the dctools backend), only when pyinterp is installed;
+* ``metric_kernels`` — gridded RMSD of every variable against the gridded
+  reference and RMSD / MAE on the matched observation points with
+  ``xskillscore`` (the oceanbench metric backend), only when it is installed;
+* ``map_cube_build`` / ``snapshot_render`` — :func:`dc1.evaluation.map_cube.build_cubes`
+  from per-bins results and rendering every snapshot of the cubes;
+* ``map_manifest`` / ``map_packing`` / ``map_repack_incremental`` —
+  ``docs/scripts/build_map_manifest.py`` and ``docs/scripts/pack_map_data.py``
+  (full archive, then incremental repack after one model changed).
+
+Per-bin aggregation and result serialization run inside dctools and are not
+timed here.  Results are written as JSON (one file per commit by default) so
+that two runs can be compared with ``--compare``.  No network access is needed.
+
+Usage
+-----
+    python benchmarks/run_benchmarks.py                       # small + medium
+    python benchmarks/run_benchmarks.py --sizes full --repeat 3
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/abc1234.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = PROJECT_ROOT / "docs" / "scripts"
+for _path in (PROJECT_ROOT, SCRIPTS_DIR):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+import build_map_manifest  # type: ignore[import-not-found]  # noqa: E402
+import pack_map_data  # type: ignore[import-not-found]  # noqa: E402
+
+from benchmarks.synthetic import (  # noqa: E402
+    ReferenceData,
+    frt_dates,
+    make_obs_catalog,
+    make_prediction,
+    make_references,
+    write_per_bins,
+    write_submission,
+)
+from dc1.evaluation.map_cube import SnapshotIndex, build_cubes, jsonp  # noqa: E402
+from dc1.evaluation.obs_cache import plan_batch_obs_files  # noqa: E402
+from dc1.evaluation.submission_scan import scan_submission  # noqa: E402
+from dc1.evaluation.submission_writer import (  # noqa: E402
+    DC1_VARIABLES,
+    SubmissionSpec,
+    validate_forecast,
+)
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# name -> grid sub-sampling factor (1 = full 673 × 1440 DC1 grid)
+SIZES = {"small": 4, "medium": 2, "full": 1}
+
+PER_BINS_RESOLUTION = 2.0
+MAP_MODELS = ("modela", "modelb")
+OBS_BATCH_SIZE = 40
+TIME_TOLERANCE_HOURS = 12
+
+
+# ---------------------------------------------------------------------------
+# Harness
+# ---------------------------------------------------------------------------
+
+def _time(
+    fn: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None
+) -> dict[str, Any]:
+    """Run *fn* *repeat* times (after *setup*, untimed) and keep the min / median."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "repeat": repeat,
+    }
+
+
+def _dctools_validation(submission_dir: Path, scale: int, repeat: int) -> dict[str, Any]:
+    if scale != 1:
+        return {"skipped": "dctools checks the full DC1 grid"}
+    try:
+        from dctools.submission import ModelSubmission
+    except ImportError:
+        return {"skipped": "dctools is not installed"}
+    submission = ModelSubmission(
+        model_name="bench",
+        data_path=str(submission_dir),
+        dc_config="dc1",
+        model_description="",
+        team_name="",
+        contact_email="",
+        model_url="",
+        max_nan_fraction=0.10,
+        variables=None,
+    )
+    return _time(lambda: submission.validate(quick=True), repeat)
+
+
+def _interpolation(prediction: Any, refs: ReferenceData, repeat: int) -> dict[str, Any]:
+    try:
+        import pyinterp  # type: ignore[import-not-found, unused-ignore]
+    except ImportError:
+        return {"skipped": "pyinterp (dctools interpolation backend) is not installed"}
+    lon_axis = pyinterp.Axis(prediction["lon"].values.astype("float64"), is_circle=True)
+    lat_axis = pyinterp.Axis(prediction["lat"].values.astype("float64"))
+    points = [
+        ("zos", refs.along_track["lon"].values, refs.along_track["lat"].values),
+        ("zos", refs.swath["longitude"].values.ravel(), refs.swath["latitude"].values.ravel()),
+        ("thetao", refs.profiles["LONGITUDE"].values, refs.profiles["LATITUDE"].values),
+    ]
+
+    def interpolate() -> None:
+        for var, lon, lat in points:
+            # pyinterp grids are (x, y): longitude first.
+            grid = pyinterp.Grid2D(
+                lon_axis, lat_axis, prediction[var].values[0].T.astype("float64")
+            )
+            pyinterp.bivariate(grid, lon, lat, interpolator="bilinear", bounds_error=False)
+
+    return _time(interpolate, repeat)
+
+
+def _metric_kernels(prediction: Any, refs: ReferenceData, repeat: int) -> dict[str, Any]:
+    try:
+        import xskillscore as xs
+    except ImportError:
+        return {"skipped": "xskillscore (oceanbench metric backend) is not installed"}
+    import xarray as xr
+
+    def matched(var: str, lat: Any, lon: Any, obs: Any) -> tuple[Any, Any]:
+        # Nearest grid value at each observation (matching is not timed).
+        pred = prediction[var].isel(time=0).sel(
+            lat=xr.DataArray(lat, dims="obs"), lon=xr.DataArray(lon, dims="obs"),
+            method="nearest",
+        )
+        return pred.drop_vars(["lat", "lon", "time"]), xr.DataArray(obs, dims="obs")
+
+    pairs = [
+        matched("zos", refs.along_track["lat"].values, refs.along_track["lon"].values,
+                refs.along_track["ssha"].values),
+        matched("zos", refs.swath["latitude"].values.ravel(),
+                refs.swath["longitude"].values.ravel(),
+                refs.swath["ssha_filtered"].values.ravel()),
+        matched("thetao", refs.profiles["LATITUDE"].values, refs.profiles["LONGITUDE"].values,
+                refs.profiles["TEMP"].values),
+    ]
+
+    def metrics() -> None:
+        for var in DC1_VARIABLES:
+            xs.rmse(prediction[var], refs.gridded[var], dim=["lat", "lon"], skipna=True)
+        for pred, obs in pairs:
+            xs.rmse(pred, obs, dim="obs", skipna=True)
+            xs.mae(pred, obs, dim="obs", skipna=True)
+
+    return _time(metrics, repeat)
+
+
+def _touch(files: list[Path]) -> None:
+    now = time.time()
+    for f in files:
+        os.utime(f, (now, now))
+
+
+def run_size(name: str, scale: int, repeat: int) -> dict[str, dict[str, Any]]:
+    """Run every benchmark for one data size."""
+    n_frts = max(2, 8 // scale)
+    print(f"[bench] Synthesizing '{name}' case (grid scale 1/{scale}, {n_frts} FRTs) ...")
+    prediction = make_prediction(scale=scale)
+    spec = SubmissionSpec(lat=prediction["lat"].values, lon=prediction["lon"].values)
+    frts = frt_dates(n_frts)
+    tasks = [(frt, lead) for frt in frts for lead in range(10)][:OBS_BATCH_SIZE]
+    catalog = make_obs_catalog()
+    refs = make_references(prediction, scale=scale)
+
+    results: dict[str, dict[str, Any]] = {}
+    results["forecast_validation"] = _time(
+        lambda: validate_forecast(prediction, frts[0], spec), repeat
+    )
+    results["obs_batch_planning"] = _time(
+        lambda: plan_batch_obs_files(tasks, catalog, TIME_TOLERANCE_HOURS), repeat
+    )
+    results["interpolation"] = _interpolation(prediction, refs, repeat)
+    results["metric_kernels"] = _metric_kernels(prediction, refs, repeat)
+
+    with tempfile.TemporaryDirectory(prefix="dc1_bench_") as tmp_dir:
+        tmp = Path(tmp_dir)
+        submission_dir = tmp / "submission"
+        write_submission(submission_dir, n_frts, scale=scale)
+
+        def scan() -> None:
+            index = scan_submission(str(submission_dir), max_grid_mismatches=0)
+            assert index.ok, index.summary()
+
+        results["submission_scan"] = _time(scan, repeat)
+        results["dctools_validation"] = _dctools_validation(submission_dir, scale, repeat)
+
+        results_dir = tmp / "results"
+        for k, model in enumerate(MAP_MODELS):
+            write_per_bins(
+                results_dir / f"results_{model}_per_bins.jsonl.gz",
+                n_frts,
+                PER_BINS_RESOLUTION,
+                seed=k,
+            )
+        cubes_dir = tmp / "map_cubes"
+        results["map_cube_build"] = _time(
+            lambda: build_cubes([results_dir], cubes_dir, PER_BINS_RESOLUTION, force=True),
+            repeat,
+        )
+
+        map_data_dir = tmp / "leaderboard" / "map_data"
+        index = SnapshotIndex(cubes_dir)
+
+        def export_snapshots() -> None:
+            map_data_dir.mkdir(parents=True, exist_ok=True)
+            for stem in index.snapshots:
+                payload = index.render(stem)
+                assert payload is not None
+                (map_data_dir / f"{stem}.js").write_text(jsonp(payload), encoding="utf-8")
+
+        results["snapshot_render"] = _time(export_snapshots, repeat)
+        results["map_manifest"] = _time(
+            lambda: build_map_manifest.write_manifest(map_data_dir), repeat
+        )
+
+        archive = tmp / "leaderboard" / "map_data.tar.gz"
+        results["map_packing"] = _time(
+            lambda: pack_map_data.pack_full(map_data_dir, archive, progress_every=0), repeat
+        )
+        cache_dir = tmp / "map_data_cache"
+        pack_map_data.pack_incremental([], map_data_dir, archive, cache_dir)
+        changed = sorted(map_data_dir.glob(f"{MAP_MODELS[0]}_*.js"))
+        results["map_repack_incremental"] = _time(
+            lambda: pack_map_data.pack_incremental([], map_data_dir, archive, cache_dir),
+            repeat,
+            setup=lambda: _touch(changed),
+        )
+        shutil.rmtree(cubes_dir, ignore_errors=True)
+
+    for bench, timing in results.items():
+        if "skipped" in timing:
+            print(f"[bench]   {bench:<22} skipped ({timing['skipped']})")
+        else:
+            print(f"[bench]   {bench:<22} min {timing['min_s']:8.4f}s  "
+                  f"median {timing['median_s']:8.4f}s")
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """Print per-benchmark ratios; return the number of regressions above *threshold*."""
+    n_regressions = 0
+    print(f"\nComparison against {baseline['meta'].get('commit', '?')} "
+          f"(regression threshold +{threshold:.0%}):")
+    for size, benches in current["results"].items():
+        for bench, timing in benches.items():
+            old = baseline["results"].get(size, {}).get(bench)
+            if not old or "min_s" not in old or "min_s" not in timing:
+                continue
+            ratio = timing["min_s"] / old["min_s"] if old["min_s"] else float("inf")
+            flag = ""
+            if ratio > 1.0 + threshold:
+                flag = "  REGRESSION"
+                n_regressions += 1
+            print(f"  {size:<7} {bench:<22} {old['min_s']:8.4f}s → "
+                  f"{timing['min_s']:8.4f}s  ({ratio:5.2f}x){flag}")
+    return n_regressions
+
+
+def main() -> None:
+    """Run the selected sizes, write the results JSON and compare with a baseline."""
+    parser = argparse.ArgumentParser(description="Offline DC1 benchmark suite")
+    parser.add_argument("--sizes", nargs="+", choices=sorted(SIZES), default=["small", "medium"],
+                        help="Data sizes to run (default: small medium)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per benchmark")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="Output JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=str, default=None, metavar="BASELINE",
+                        help="Compare with a previous results JSON")
+    parser.add_argument("--fail-threshold", type=float, default=0.20,
+                        help="Relative slowdown reported as a regression (default 0.20)")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "sizes": {name: SIZES[name] for name in args.sizes},
+        },
+        "results": {name: run_size(name, SIZES[name], args.repeat) for name in args.sizes},
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\n[bench] Results written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if compare(report, baseline, args.fail_threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
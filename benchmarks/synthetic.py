@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Synthetic DC1-shaped inputs for the offline benchmark suite.
+
+Everything is generated locally from a seeded random generator so that runs
+are repeatable and need no network access:
+
+* predictions on the DC1 grid (``time × lat × lon`` = ``10 × 673 × 1440`` at
+  full size, ``zos/thetao/so/uo/vo``), as in ``notebooks/submit.ipynb``, and
+  directories of per-init-date Zarr stores holding them;
+* reference data for one forecast: a gridded reference (GLORYS-like) on the
+  same grid, along-track altimetry (SARAL / Jason-3-like ground tracks), swath
+  altimetry (SWOT-like ``num_lines × num_pixels`` swaths) and surface values
+  of Argo-like profiles;
+* an observation catalog (one file per mission and half day, with its
+  bounding box) as listed by the dctools connection managers;
+* ``results_<model>_per_bins.jsonl.gz`` files for a gridded reference
+  (every ocean bin, ``rmsd``) and an along-track reference (sparse bins,
+  ``rmse``), the input of the leaderboard map export.
+
+Sizes are controlled by a single *scale* factor: ``1`` is the full DC1 grid,
+``4`` keeps every 4th latitude/longitude and divides observation counts by 16.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from dc1.evaluation.submission_writer import (
+    DC1_LAT,
+    DC1_LEAD_TIMES,
+    DC1_LON,
+    DC1_VARIABLES,
+)
+
+N_LEAD_TIMES = len(DC1_LEAD_TIMES)
+FIRST_FRT = pd.Timestamp("2024-01-03")
+
+# Rough climatological means/spreads so that metric values look plausible.
+_VAR_STATS = {
+    "zos": (0.0, 0.5),
+    "thetao": (15.0, 8.0),
+    "so": (35.0, 1.0),
+    "uo": (0.0, 0.2),
+    "vo": (0.0, 0.2),
+}
+
+
+def frt_dates(n_frts: int) -> list[pd.Timestamp]:
+    """Weekly forecast reference times starting on the first DC1 FRT."""
+    return [FIRST_FRT + pd.Timedelta(days=7 * k) for k in range(n_frts)]
+
+
+def make_prediction(scale: int = 1, seed: int = 42, frt: str = "2024-01-03") -> xr.Dataset:
+    """Random-noise forecast of one init date on the (sub-sampled) DC1 grid."""
+    rng = np.random.default_rng(seed)
+    lat = DC1_LAT[::scale]
+    lon = DC1_LON[::scale]
+    shape = (N_LEAD_TIMES, lat.size, lon.size)
+    data_vars = {}
+    for var in DC1_VARIABLES:
+        mean, std = _VAR_STATS[var]
+        values = (mean + std * rng.standard_normal(shape)).astype("float32")
+        # Mask a band of "land" so NaN handling is exercised.
+        values[:, : max(1, lat.size // 20), :] = np.nan
+        data_vars[var] = xr.DataArray(values, dims=["time", "lat", "lon"])
+    times = pd.Timestamp(frt) + pd.to_timedelta(list(DC1_LEAD_TIMES), unit="D")
+    return xr.Dataset(
+        data_vars,
+        coords={"time": times.values, "lat": lat, "lon": lon},
+        attrs={"forecast_reference_time": frt},
+    )
+
+
+def make_gridded_reference(prediction: xr.Dataset, seed: int = 7) -> xr.Dataset:
+    """Reference field = prediction plus independent noise."""
+    rng = np.random.default_rng(seed)
+    noisy = {}
+    for var in prediction.data_vars:
+        _, std = _VAR_STATS[str(var)]
+        values = prediction[var].values
+        noise = 0.1 * std * rng.standard_normal(values.shape)
+        noisy[var] = (prediction[var].dims, (values + noise).astype(values.dtype))
+    return xr.Dataset(noisy, coords=prediction.coords)
+
+
+def make_along_track(
+    n_points: int, seed: int = 1, start: str = "2024-01-03", n_days: int = N_LEAD_TIMES
+) -> pd.DataFrame:
+    """Nadir altimetry points sampled along sinusoidal ground tracks."""
+    rng = np.random.default_rng(seed)
+    t = np.sort(rng.uniform(0.0, n_days * 86400.0, n_points))
+    # ~14 revolutions per day, inclination ~66°.
+    phase = 2.0 * np.pi * t / (86400.0 / 14.0)
+    lat = 66.0 * np.sin(phase)
+    lon = ((t / 86400.0) * 360.0 / 14.0 * 13.0 + np.degrees(phase)) % 360.0 - 180.0
+    return pd.DataFrame(
+        {
+            "time": pd.Timestamp(start) + pd.to_timedelta(t, unit="s"),
+            "lat": lat,
+            "lon": lon,
+            "ssha": 0.1 * rng.standard_normal(n_points),
+        }
+    )
+
+
+def make_swath(
+    n_lines: int, n_pixels: int = 69, seed: int = 2, start: str = "2024-01-03"
+) -> xr.Dataset:
+    """Wide-swath altimetry (SWOT-like) with 2-D latitude/longitude arrays."""
+    rng = np.random.default_rng(seed)
+    line_t = np.linspace(0.0, 86400.0, n_lines)
+    centre_lat = 77.0 * np.sin(2.0 * np.pi * line_t / 6000.0)
+    centre_lon = (line_t / 86400.0 * 360.0 * 1.1) % 360.0 - 180.0
+    across = np.linspace(-0.6, 0.6, n_pixels)
+    lat = np.clip(centre_lat[:, None] + 0.2 * across[None, :], -78.0, 90.0)
+    lon = (centre_lon[:, None] + across[None, :] + 180.0) % 360.0 - 180.0
+    ssha = 0.1 * rng.standard_normal((n_lines, n_pixels))
+    return xr.Dataset(
+        {"ssha_filtered": (("num_lines", "num_pixels"), ssha)},
+        coords={
+            "latitude": (("num_lines", "num_pixels"), lat),
+            "longitude": (("num_lines", "num_pixels"), lon),
+            "time": (
+                "num_lines",
+                pd.Timestamp(start).to_datetime64() + (line_t * 1e9).astype("timedelta64[ns]"),
+            ),
+        },
+    )
+
+
+def make_profiles(n_profiles: int, seed: int = 3, start: str = "2024-01-03") -> pd.DataFrame:
+    """Surface values of Argo-like profiles scattered over the ocean."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "TIME": pd.Timestamp(start)
+            + pd.to_timedelta(rng.uniform(0, N_LEAD_TIMES * 86400.0, n_profiles), unit="s"),
+            "LATITUDE": rng.uniform(-70.0, 80.0, n_profiles),
+            "LONGITUDE": rng.uniform(-180.0, 180.0, n_profiles),
+            "TEMP": 15.0 + 8.0 * rng.standard_normal(n_profiles),
+            "PSAL": 35.0 + rng.standard_normal(n_profiles),
+        }
+    )
+
+
+@dataclass
+class ReferenceData:
+    """Synthetic references of one forecast, one per observation support."""
+
+    gridded: xr.Dataset
+    along_track: pd.DataFrame
+    swath: xr.Dataset
+    profiles: pd.DataFrame
+
+    @property
+    def n_obs(self) -> int:
+        """Total number of observation points across the observation references."""
+        return len(self.along_track) + int(self.swath["ssha_filtered"].size) + len(self.profiles)
+
+
+def make_references(prediction: xr.Dataset, scale: int = 1, seed: int = 42) -> ReferenceData:
+    """Every synthetic reference of *prediction*, with counts scaled like its grid."""
+    density = scale * scale
+    return ReferenceData(
+        gridded=make_gridded_reference(prediction, seed=seed + 1),
+        along_track=make_along_track(max(1000, 2_000_000 // density), seed=seed + 2),
+        swath=make_swath(max(100, 40_000 // density), seed=seed + 3),
+        profiles=make_profiles(max(100, 4_000 // density), seed=seed + 4),
+    )
+
+
+def write_submission(directory: Path, n_dates: int, scale: int = 1, seed: int = 42) -> list[Path]:
+    """Write one ``YYYYMMDD.zarr`` store per init date, as a model submission."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for k, frt in enumerate(frt_dates(n_dates)):
+        path = directory / f"{frt:%Y%m%d}.zarr"
+        ds = make_prediction(scale=scale, seed=seed + k, frt=f"{frt:%Y-%m-%d}")
+        # One lead time per chunk, as SubmissionWriter writes them.
+        encoding = {var: {"chunks": (1,) + ds[var].shape[1:]} for var in ds.data_vars}
+        ds.to_zarr(path, mode="w", consolidated=True, encoding=encoding)
+        paths.append(path)
+    return paths
+
+
+def make_obs_catalog(n_days: int = 366, n_missions: int = 3, seed: int = 1) -> list[dict]:
+    """Catalog of half-day along-track files with their time range and bounding box."""
+    rng = np.random.default_rng(seed)
+    entries = []
+    for mission in range(n_missions):
+        for i in range(2 * n_days):
+            start = FIRST_FRT + pd.Timedelta(hours=12 * i)
+            lon0 = float(rng.uniform(-180.0, 180.0))
+            entries.append({
+                "path": f"mission{mission}/obs_{start:%Y%m%dT%H}.nc",
+                "date_start": start,
+                "date_end": start + pd.Timedelta(hours=11, minutes=59),
+                "min_lon": lon0,
+                "max_lon": lon0 + 180.0,
+                "min_lat": -66.0,
+                "max_lat": 66.0,
+            })
+    return entries
+
+
+def _bin_records(
+    rng: np.random.Generator, lat: np.ndarray, lon: np.ndarray, spread: float
+) -> list[list[float]]:
+    """``[lat, lon, value, count]`` records of the bins (bin corners)."""
+    values = np.round(np.abs(spread * rng.standard_normal(lat.size)), 5)
+    counts = rng.integers(1, 50, lat.size)
+    return np.column_stack([lat, lon, values, counts]).tolist()
+
+
+def write_per_bins(
+    path: Path, n_frts: int, resolution: float = 2.0, obs_fraction: float = 0.3, seed: int = 5
+) -> Path:
+    """Write a ``results_<model>_per_bins.jsonl.gz`` file for *n_frts* FRTs.
+
+    One gridded reference (``glorys``, every variable, ``rmsd`` over the
+    ocean bins) and one along-track reference (``jason3``, ``zos``, ``rmse``
+    over a random *obs_fraction* of the bins), as ``[lat, lon, value, count]``
+    records.
+    """
+    rng = np.random.default_rng(seed)
+    lat_bins = -90.0 + resolution * np.arange(int(180 / resolution))
+    lon_bins = -180.0 + resolution * np.arange(int(360 / resolution))
+    lat, lon = (a.ravel() for a in np.meshgrid(lat_bins, lon_bins, indexing="ij"))
+    ocean = lat >= -78.0
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as fh:
+        for frt in frt_dates(n_frts):
+            for lead in range(N_LEAD_TIMES):
+                base = {"forecast_reference_time": frt.isoformat(), "lead_time": lead}
+                gridded = {
+                    var: {"rmsd": _bin_records(rng, lat[ocean], lon[ocean], _VAR_STATS[var][1])}
+                    for var in DC1_VARIABLES
+                }
+                fh.write(json.dumps({"ref_alias": "glorys", **base, "per_bins": gridded}) + "\n")
+                hit = ocean & (rng.random(lat.size) < obs_fraction)
+                along_track = {"zos": {"rmse": _bin_records(rng, lat[hit], lon[hit], 0.1)}}
+                fh.write(
+                    json.dumps({"ref_alias": "jason3", **base, "per_bins": along_track}) + "\n"
+                )
+    return path
@@ -30,11 +30,18 @@ _warnings.filterwarnings(
 del _warnings
 
 import sys
+import copy  # noqa: E402
+import contextlib  # noqa: E402
+import shutil  # noqa: E402
+import argparse  # noqa: E402
 import subprocess
+import time  # noqa: E402
 import logging
 import logging.config as _logging_config
 from pathlib import Path
+from typing import Optional  # noqa: E402
 
+import yaml  # noqa: E402
 from loguru import logger as _loguru_logger
 
 
@@ -110,6 +117,57 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from dc1.evaluation.dc1 import DC1Evaluation  # noqa: E402
+from dc1.evaluation.leaderboard_cache import FINGERPRINTS_FILE, LeaderboardCache  # noqa: E402
+from dc1.evaluation.map_cube import CUBES_DIRNAME, build_cubes  # noqa: E402
+from dc1.evaluation.planner import (  # noqa: E402
+    auto_adjust,
+    build_plan,
+    catalog_coverage,
+    check_plan,
+    format_plan,
+    task_batch_size,
+)
+from dc1.evaluation.progressive import (  # noqa: E402
+    PROGRESSIVE_DIRNAME,
+    converged,
+    estimate_metrics,
+    format_estimates,
+    load_entries,
+    progressive_settings,
+    progressive_units,
+    write_estimates,
+)
+from dc1.evaluation.journal import TASK_JOURNAL, TaskJournal, journal_results  # noqa: E402
+from dc1.evaluation.sharding import (  # noqa: E402
+    PROGRESSIVE_LAYOUT,
+    SHARDS_DIRNAME,
+    WorkUnit,
+    assign_units,
+    build_work_units,
+    expected_frts,
+    finished_units,
+    merge_shard_results,
+    missing_frts,
+    parse_shard,
+    read_layout,
+    resume_units,
+    run_pending_units,
+    task_keys,
+    unit_config,
+    unit_directory,
+    unit_frts,
+    unit_results_file,
+    write_layout,
+)
+from dc1.evaluation.telemetry import (  # noqa: E402
+    RssSampler,
+    TASKS_JSONL,
+    TELEMETRY_DIRNAME,
+    export_run_telemetry,
+    load_jsonl,
+    merge_unit_telemetry,
+    summarize,
+)
 from dctools.processing.runner import run_from_config  # noqa: E402
 from dctools.utilities.args_config import parse_arguments  # noqa: E402
 
@@ -127,6 +185,9 @@ DEFAULT_CONFIG_NAME = "dc1_wasabi"
 # Absolute path to the leaderboard display config shipped with this repo.
 _LEADERBOARD_CONFIG_YAML = DC1_CONFIG_DIR / "leaderboard_config.yaml"
 
+# Results of the models already on the leaderboard.
+_LEADERBOARD_RESULTS_DIR = PROJECT_ROOT / "dc1" / "leaderboard_results"
+
 
 def _has_arg(argv: list[str], short: str, long: str) -> bool:
     """Check whether *short* or *long* flag already appears in *argv*."""
@@ -152,8 +213,576 @@ def _inject_default_paths(argv: list[str]) -> None:
         argv.extend(["--logfile", str(default_logfile)])
 
 
-def _pack_leaderboard_map_data() -> None:
-    """Create docs leaderboard archive if map_data was generated by the run."""
+def _pop_dc1_args(argv: list[str]) -> argparse.Namespace:
+    """Extract DC1-only flags from *argv* before dctools parses the rest."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--shard", type=str, default=None, metavar="i/N")
+    parser.add_argument("--frts-per-unit", type=int, default=4)
+    parser.add_argument("--progressive", action="store_true")
+    parser.add_argument("--full", action="store_true")
+    parser.add_argument("--rel-ci", type=float, default=None)
+    parser.add_argument("--plan", action="store_true")
+    parser.add_argument("--auto-adjust", action="store_true")
+    parser.add_argument("--catalog-dir", type=str, default=None)
+    dc1_args, remaining = parser.parse_known_args(argv[1:])
+    argv[1:] = remaining
+    return dc1_args
+
+
+def _load_config(config_path: Path) -> dict:
+    return yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+
+
+def _dataset_references(config: dict) -> dict[str, list[str]]:
+    refs = config.get("dataset_references")
+    if isinstance(refs, dict) and refs:
+        return refs
+    return DC1Evaluation.DEFAULT_DATASET_REFERENCES
+
+
+def _plan_run(
+    config_path: Path, cli_args, catalog_dir: Optional[str], adjust: bool
+) -> tuple[int, Path]:
+    """Estimate task counts, downloads, memory and map_data size before a run.
+
+    With *adjust*, settings that do not fit the machine are lowered and the
+    adjusted config is written to ``<data_directory>/plan/``.
+
+    Returns:
+        tuple: ``(exit code, config path to run with)``; the exit code is 1
+        when some settings still exceed the available RAM or disk.
+    """
+    config = _load_config(config_path)
+    references = _dataset_references(config)
+    data_directory = Path(cli_args.data_directory)
+    catalogs = Path(catalog_dir) if catalog_dir else data_directory / "catalogs"
+    plan = build_plan(config, references, data_directory, catalog_dir=catalogs)
+    print(format_plan(plan))
+    for note in plan.warnings:
+        print(f"[evaluate] NOTE: {note}")
+    issues = check_plan(plan)
+
+    if issues and adjust:
+        adjusted, changes = auto_adjust(config, references, plan, catalog_dir=catalogs)
+        if changes:
+            plan_dir = data_directory / "plan"
+            plan_dir.mkdir(parents=True, exist_ok=True)
+            config_path = plan_dir / f"{config_path.stem}.adjusted.yaml"
+            config_path.write_text(yaml.safe_dump(adjusted, sort_keys=False), encoding="utf-8")
+            for change in changes:
+                print(f"[evaluate] Adjusted {change}")
+            print(f"[evaluate] Adjusted config written to {config_path}")
+            plan = build_plan(adjusted, references, data_directory, catalog_dir=catalogs)
+            issues = check_plan(plan)
+
+    for issue in issues:
+        print(f"[evaluate] WARNING: {issue}")
+    if not issues:
+        print("[evaluate] Plan: all settings fit the available RAM and disk.")
+    return (1 if issues else 0), config_path
+
+
+def _unit_has_results(data_directory: Path, unit: WorkUnit) -> bool:
+    return any((unit_directory(data_directory, unit) / "results").glob("results_*.json"))
+
+
+def _unit_journal(data_directory: Path, name: str) -> TaskJournal:
+    """Resume journal of the work units run by one shard (or progressive run)."""
+    # Units take minutes each: sync every record.
+    return TaskJournal(data_directory / SHARDS_DIRNAME / f"journal_{name}.jsonl", fsync_every=1)
+
+
+def _run_unit(unit: WorkUnit, config: dict, cli_args) -> int:
+    """Evaluate one work unit into its own result store.
+
+    The run is started from the unit directory, so the leaderboard files the
+    evaluation writes next to its results stay private to the unit instead of
+    overwriting the shared site; the leaderboard is built once by ``merge``.
+    """
+    unit_dir = unit_directory(Path(cli_args.data_directory), unit).resolve()
+    unit_dir.mkdir(parents=True, exist_ok=True)
+    unit_config_path = unit_dir / "config.yaml"
+    unit_config_path.write_text(
+        yaml.safe_dump(unit_config(config, unit), sort_keys=False), encoding="utf-8"
+    )
+    unit_args = copy.copy(cli_args)
+    vars(unit_args)["data_directory"] = str(unit_dir)
+    if getattr(unit_args, "logfile", None):
+        vars(unit_args)["logfile"] = str(Path(unit_args.logfile).resolve())
+    print(f"[evaluate] Work unit {unit.unit_id} → {unit_dir}")
+    with contextlib.chdir(unit_dir):
+        return _run_evaluation(unit_config_path, unit_args)
+
+
+def _run_shard(spec: str, config_path: Path, cli_args, frts_per_unit: int) -> int:
+    """Evaluate the work units assigned to shard ``i/N``."""
+    index, count = parse_shard(spec)
+    config = _load_config(config_path)
+    data_directory = Path(cli_args.data_directory)
+    try:
+        write_layout(data_directory, frts_per_unit)
+    except ValueError as exc:
+        print(f"[evaluate] ERROR: {exc}")
+        return 1
+    units = build_work_units(config, _dataset_references(config), frts_per_unit=frts_per_unit)
+    shard_units = assign_units(units, count)[index]
+    print(
+        f"[evaluate] Shard {index}/{count}: {len(shard_units)} of {len(units)} work units "
+        f"({sum(u.weight for u in shard_units):.0f} weight)"
+    )
+    with _unit_journal(data_directory, f"{index}of{count}") as journal:
+        return run_pending_units(
+            shard_units,
+            lambda unit: _run_unit(unit, config, cli_args),
+            journal,
+            data_directory,
+            retry_failed_only=bool(config.get("retry_failed_only")),
+        )
+
+
+def _run_progressive(config_path: Path, cli_args, full: bool, rel_ci: Optional[float]) -> int:
+    """Evaluate FRTs in stratified rounds, publishing estimates after each one.
+
+    Stops once every tracked metric's confidence interval is within
+    ``rel_ci`` of its estimate (unless *full*).  Units journaled as done are
+    skipped, so re-running with ``--full`` completes the exact evaluation.
+    """
+    config = _load_config(config_path)
+    settings = progressive_settings(config, rel_ci)
+    data_directory = Path(cli_args.data_directory)
+    references = _dataset_references(config)
+    try:
+        write_layout(data_directory, PROGRESSIVE_LAYOUT)
+    except ValueError as exc:
+        print(f"[evaluate] ERROR: {exc}")
+        return 1
+    rounds = progressive_units(config, references, settings)
+    progressive_dir = data_directory / PROGRESSIVE_DIRNAME
+    evaluated: list[WorkUnit] = []
+    exit_code = 0
+    stopped_early = False
+    with _unit_journal(data_directory, "progressive") as journal:
+        for round_index, units in enumerate(rounds, 1):
+            frts = unit_frts(config, units[0]) if units else []
+            print(
+                f"[evaluate] Progressive round {round_index}/{len(rounds)}: {len(frts)} FRTs, "
+                f"{len(units)} work units"
+            )
+            exit_code = max(
+                exit_code,
+                run_pending_units(
+                    units, lambda unit: _run_unit(unit, config, cli_args), journal, data_directory
+                ),
+            )
+            evaluated.extend(units)
+
+            entries = load_entries(
+                unit_directory(data_directory, u) / "results" for u in evaluated
+            )
+            estimates = estimate_metrics(
+                entries, settings["metrics"], settings["n_boot"], settings["confidence"],
+                settings["seed"],
+            )
+            done = round_index >= settings["min_rounds"] and converged(
+                estimates, settings["rel_ci"]
+            )
+            path = write_estimates(
+                progressive_dir, round_index, [frt.isoformat() for frt in frts], estimates, done
+            )
+            print(format_estimates(estimates, settings["confidence"]))
+            print(f"[evaluate] Estimates written to {path}")
+            if done and not full and round_index < len(rounds):
+                stopped_early = True
+                print(
+                    f"[evaluate] All intervals within ±{settings['rel_ci']:.0%}: stopping after "
+                    f"round {round_index}. Re-run with --progressive --full to complete the "
+                    "exact evaluation (evaluated FRTs are not redone)."
+                )
+                break
+
+    if stopped_early:
+        return exit_code
+    unit_dirs = [unit_directory(data_directory, u) for u in evaluated]
+    written = merge_shard_results(data_directory, config=config, unit_dirs=unit_dirs)
+    for path in written:
+        print(f"[evaluate] Merged results written to {path}")
+    _merge_telemetry(data_directory, unit_dirs)
+    if exit_code != 0 or not written:
+        return exit_code or 1
+    if _report_missing_frts(written, config, references, data_directory, evaluated):
+        return 1
+    return _build_leaderboard(data_directory / "results", config)
+
+
+def _report_missing_frts(
+    written: list[Path],
+    config: dict,
+    references: dict[str, list[str]],
+    data_directory: Path,
+    units: list[WorkUnit],
+) -> bool:
+    """Print the expected FRTs absent from merged results; True if any.
+
+    Only FRTs a reference has data for are expected: those its catalog in
+    ``<data_directory>/catalogs`` covers (every FRT without a catalog), less
+    the FRTs of work units journaled as finished cleanly.
+    """
+    frts = expected_frts(config)
+    all_refs = sorted({ref for refs in references.values() for ref in refs})
+    coverage = catalog_coverage(config, all_refs, data_directory / "catalogs")
+    finished = finished_units(data_directory)
+    covered = {}
+    for ref in all_refs:
+        done = {
+            frt for unit in units if unit.reference == ref and unit.unit_id in finished
+            for frt in unit_frts(config, unit)
+        }
+        covered[ref] = [frt for frt in coverage.get(ref, frts) if frt not in done]
+    missing = missing_frts(written, config, references, covered=covered)
+    for pair, frts in missing.items():
+        shown = ", ".join(f"{frt:%Y-%m-%d}" for frt in frts[:5])
+        more = f" (+{len(frts) - 5} more)" if len(frts) > 5 else ""
+        print(f"[evaluate] {pair}: {len(frts)} FRTs missing from merged results: {shown}{more}")
+    return bool(missing)
+
+
+def _merge_command(argv: list[str]) -> int:
+    """``merge`` command: combine shard result stores and build the leaderboard."""
+    parser = argparse.ArgumentParser(
+        prog="python -m dc1.evaluate merge",
+        description="Merge sharded evaluation results and build the leaderboard.",
+    )
+    parser.add_argument(
+        "-d", "--data_directory", type=str, default=str(PROJECT_ROOT / "dc1_output"),
+        help="Data directory shared by the shards (holds shards/).",
+    )
+    parser.add_argument("--config_name", type=str, default=DEFAULT_CONFIG_NAME)
+    parser.add_argument(
+        "--frts-per-unit", type=int, default=None,
+        help="Unit size of the shards (default: recorded in shards/layout.json).",
+    )
+    parser.add_argument(
+        "--allow-partial", action="store_true",
+        help="Merge even if some work units or FRTs have no results yet.",
+    )
+    parser.add_argument(
+        "--skip-leaderboard", action="store_true",
+        help="Only merge results; do not rebuild the leaderboard.",
+    )
+    args = parser.parse_args(argv)
+
+    data_directory = Path(args.data_directory)
+    config = _load_config(DC1_CONFIG_DIR / f"{args.config_name}.yaml")
+    references = _dataset_references(config)
+    layout = args.frts_per_unit or read_layout(data_directory)
+    if layout is None:
+        print(
+            f"[evaluate] No {SHARDS_DIRNAME}/layout.json in {data_directory}; "
+            "pass --frts-per-unit."
+        )
+        return 1
+    if layout == PROGRESSIVE_LAYOUT:
+        rounds = progressive_units(config, references, progressive_settings(config))
+        units = [unit for round_units in rounds for unit in round_units]
+    else:
+        units = build_work_units(config, references, frts_per_unit=int(layout))
+    finished = finished_units(data_directory)
+    missing = [
+        u.unit_id for u in units
+        if u.unit_id not in finished and not _unit_has_results(data_directory, u)
+    ]
+    if missing:
+        print(f"[evaluate] {len(missing)} of {len(units)} work units have not finished:")
+        for unit_id in missing[:20]:
+            print(f"  - {unit_id}")
+        if not args.allow_partial:
+            print("[evaluate] Re-run the corresponding shards or pass --allow-partial.")
+            return 1
+
+    unit_dirs = [unit_directory(data_directory, u) for u in units]
+    written = merge_shard_results(data_directory, config=config, unit_dirs=unit_dirs)
+    for path in written:
+        print(f"[evaluate] Merged results written to {path}")
+    _merge_telemetry(data_directory, unit_dirs)
+    if not written:
+        return 1
+    missing_any = _report_missing_frts(written, config, references, data_directory, units)
+    if missing_any and not args.allow_partial:
+        print("[evaluate] Re-run the corresponding shards or pass --allow-partial.")
+        return 1
+    if args.skip_leaderboard:
+        return 0
+    return _build_leaderboard(data_directory / "results", config)
+
+
+def _build_leaderboard(results_dir: Path, config: Optional[dict] = None) -> int:
+    """Build the leaderboard from a results directory with ``dcleaderboard-build``."""
+    builder = shutil.which("dcleaderboard-build")
+    if builder is None:
+        print("[evaluate] WARNING: dcleaderboard-build not found; leaderboard not rebuilt.")
+        return 0
+    leaderboard_dir = PROJECT_ROOT / "docs" / "source" / "_extra" / "leaderboard"
+    result = subprocess.run(
+        [
+            builder,
+            "--results-dir", str(results_dir),
+            "--output-dir", str(leaderboard_dir),
+            "--config", str(_LEADERBOARD_CONFIG_YAML),
+        ],
+        check=False,
+    )
+    if result.returncode != 0:
+        print("[evaluate] WARNING: leaderboard build failed.")
+        return result.returncode
+    _refresh_map_cubes(results_dir.parent, config)
+    _pack_leaderboard_map_data(*_refresh_leaderboard_cache(results_dir.parent))
+    return 0
+
+
+def _run_journaled(config_path: Path, cli_args) -> int:
+    """Run the evaluation, resuming from the task journal of a previous run.
+
+    Every (reference, FRT, lead) task is journaled in
+    ``<data_directory>/journal.jsonl`` from the results the run wrote.  While
+    no task is journaled as done, the run is one dctools run as before.  On a
+    restart only the (reference, FRT) pairs with unfinished tasks are
+    evaluated — as work units of consecutive FRTs — and merged into the
+    existing results.
+    """
+    config = _load_config(config_path)
+    data_directory = Path(cli_args.data_directory)
+    tasks = task_keys(config, _dataset_references(config))
+    keys = [key for pair_keys in tasks.values() for key in pair_keys]
+    retry_failed_only = bool(config.get("retry_failed_only"))
+
+    with TaskJournal(data_directory / TASK_JOURNAL) as journal:
+        pending = set(journal.pending(keys, retry_failed_only=retry_failed_only))
+        if not retry_failed_only and len(pending) == len(keys):
+            exit_code = 1
+            try:
+                exit_code = _run_evaluation(config_path, cli_args)
+            finally:
+                results = sorted((data_directory / "results").glob("results_*.json"))
+                journal_results(
+                    journal, results[0] if results else None, keys, complete=exit_code == 0
+                )
+            return exit_code
+
+        pairs = [pair for pair, pair_keys in tasks.items() if pending.intersection(pair_keys)]
+        print(
+            f"[evaluate] Task journal: {len(keys) - len(pending)} of {len(keys)} tasks done, "
+            f"{len(pairs)} (reference, FRT) pairs to evaluate"
+        )
+        if not pairs:
+            return 0
+        exit_code = 0
+        unit_dirs = []
+        for unit in resume_units(config, pairs):
+            frts = set(unit_frts(config, unit))
+            unit_keys = [
+                key for (_, reference, frt), pair_keys in tasks.items()
+                if reference == unit.reference and frt in frts
+                for key in pair_keys
+            ]
+            code = 1
+            try:
+                code = _run_unit(unit, config, cli_args)
+            finally:
+                journal_results(
+                    journal, unit_results_file(data_directory, unit), unit_keys,
+                    complete=code == 0,
+                )
+            exit_code = max(exit_code, code)
+            unit_dirs.append(unit_directory(data_directory, unit))
+
+    # The existing results come first, so the re-evaluated entries win.
+    written = merge_shard_results(
+        data_directory, config=config, unit_dirs=[data_directory, *unit_dirs]
+    )
+    for path in written:
+        print(f"[evaluate] Merged results written to {path}")
+    _merge_telemetry(data_directory, [data_directory, *unit_dirs])
+    return exit_code
+
+
+def _run_evaluation(config_path: Path, cli_args) -> int:
+    """Run the evaluation of *config_path*, exporting its telemetry even if it fails."""
+    sampler = RssSampler(include_children=False).start()
+    t_start = time.perf_counter()
+    try:
+        return run_from_config(config_path, evaluation_cls=DC1Evaluation, cli_args=cli_args)
+    finally:
+        peak_rss = sampler.stop()
+        _export_telemetry(cli_args, config_path, peak_rss, time.perf_counter() - t_start)
+
+
+def _source_batch_sizes(config: dict) -> dict[str, int]:
+    """Map each source dataset to the number of tasks in one of its batches."""
+    return {
+        source["dataset"]: task_batch_size(source)
+        for source in config.get("sources") or []
+        if isinstance(source, dict) and source.get("dataset")
+    }
+
+
+def _export_telemetry(cli_args, config_path: Path, peak_rss: int, wall_s: float) -> None:
+    """Write per-task telemetry (JSON Lines + Prometheus) for the finished run."""
+    data_directory = getattr(cli_args, "data_directory", None)
+    if not data_directory:
+        return
+    try:
+        config = _load_config(config_path)
+    except (OSError, yaml.YAMLError):
+        config = {}
+    if not config.get("telemetry", True):
+        return
+    try:
+        jsonl = export_run_telemetry(
+            Path(data_directory),
+            batch_sizes=_source_batch_sizes(config),
+            driver_peak_rss_bytes=peak_rss,
+            run_wall_s=wall_s,
+        )
+    except Exception as exc:  # noqa: BLE001 — telemetry must never fail a run
+        print(f"[evaluate] WARNING: telemetry export failed: {exc}")
+        return
+    if jsonl is not None:
+        print(f"[evaluate] Task telemetry written to {jsonl.parent}")
+
+
+def _merge_telemetry(data_directory: Path, unit_dirs: list[Path]) -> None:
+    """Combine the telemetry of merged work units into the run's telemetry directory."""
+    try:
+        jsonl = merge_unit_telemetry(unit_dirs, data_directory)
+    except Exception as exc:  # noqa: BLE001 — telemetry must never fail a run
+        print(f"[evaluate] WARNING: telemetry merge failed: {exc}")
+        return
+    if jsonl is not None:
+        print(f"[evaluate] Task telemetry of the work units merged into {jsonl.parent}")
+
+
+def _telemetry_summary(argv: list[str]) -> int:
+    """``telemetry`` command: rank the slowest datasets and batches of a run."""
+    parser = argparse.ArgumentParser(
+        prog="python -m dc1.evaluate telemetry",
+        description="Summarize per-task telemetry of an evaluation run.",
+    )
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default=str(PROJECT_ROOT / "dc1_output" / TELEMETRY_DIRNAME / TASKS_JSONL),
+        help="tasks.jsonl file or the data directory of a run.",
+    )
+    parser.add_argument("--top", type=int, default=10, help="Number of batches to list.")
+    args = parser.parse_args(argv)
+
+    path = Path(args.path)
+    if path.is_dir():
+        path = path / TELEMETRY_DIRNAME / TASKS_JSONL
+    if not path.is_file():
+        print(f"[evaluate] Telemetry file not found: {path}")
+        return 1
+    print(summarize(load_jsonl(path), top=args.top))
+    return 0
+
+
+def _refresh_leaderboard_cache(data_directory: Path) -> tuple[list[Path], Optional[Path]]:
+    """Update the per-model fingerprints of the leaderboard result files.
+
+    Returns:
+        tuple: The results dirs used and the ``fingerprints.json`` of the
+        cache (None if the refresh failed).
+    """
+    results_dirs = [_LEADERBOARD_RESULTS_DIR, Path(data_directory) / "results"]
+    cache_dir = Path(data_directory) / "leaderboard_cache"
+    try:
+        cache = LeaderboardCache(cache_dir)
+        changed, removed = cache.refresh(results_dirs)
+    except Exception as exc:  # noqa: BLE001 — the cache is an optimisation only
+        print(f"[evaluate] WARNING: leaderboard cache refresh failed: {exc}")
+        return results_dirs, None
+    print(
+        f"[evaluate] Leaderboard cache: {len(cache.index)} models, "
+        f"changed {changed or 'none'}"
+        + (f", removed {removed}" if removed else "")
+    )
+    fingerprints = cache_dir / FINGERPRINTS_FILE
+    return results_dirs, (fingerprints if fingerprints.is_file() else None)
+
+
+def _refresh_map_cubes(data_directory: Path, config: Optional[dict] = None) -> None:
+    """Store per-bin results as per-FRT map cubes (``frt_map_cubes`` in the YAML)."""
+    config = config or {}
+    if not config.get("frt_map_cubes", False):
+        return
+    try:
+        written = build_cubes(
+            [Path(data_directory) / "results"],
+            Path(data_directory) / CUBES_DIRNAME,
+            resolution=config.get("per_bins_resolution"),
+        )
+    except Exception as exc:  # noqa: BLE001 — per-FRT maps are optional
+        print(f"[evaluate] WARNING: map cube build failed: {exc}")
+        return
+    if written:
+        print(
+            f"[evaluate] {len(written)} per-FRT map cubes written to "
+            f"{Path(data_directory) / CUBES_DIRNAME} (browse with: python -m dc1.evaluate maps)"
+        )
+
+
+def _maps_command(argv: list[str]) -> int:
+    """``maps`` command: serve the leaderboard with per-FRT maps rendered on demand."""
+    from dc1.evaluation.map_server import serve_maps
+
+    parser = argparse.ArgumentParser(
+        prog="python -m dc1.evaluate maps",
+        description="Serve the leaderboard maps with per-FRT snapshots rendered from map cubes.",
+    )
+    parser.add_argument(
+        "-d", "--data_directory", type=str, default=str(PROJECT_ROOT / "dc1_output"),
+        help="Data directory of the run (holds results/ and map_cubes/).",
+    )
+    parser.add_argument("--config_name", type=str, default=DEFAULT_CONFIG_NAME)
+    parser.add_argument(
+        "--site-dir", type=str,
+        default=str(PROJECT_ROOT / "docs" / "source" / "_extra" / "leaderboard"),
+        help="Leaderboard directory (maps.html and map_data/).",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--rebuild", action="store_true",
+        help="Rebuild the map cubes from the per-bin results before serving.",
+    )
+    args = parser.parse_args(argv)
+
+    data_directory = Path(args.data_directory)
+    cubes_dir = data_directory / CUBES_DIRNAME
+    config = _load_config(DC1_CONFIG_DIR / f"{args.config_name}.yaml")
+    build_cubes(
+        [data_directory / "results"], cubes_dir,
+        resolution=config.get("per_bins_resolution"), force=args.rebuild,
+    )
+    if not any(cubes_dir.glob("*/*.zarr")):
+        print(f"[evaluate] No map cubes in {cubes_dir} (no per-bin results found).")
+        return 1
+    try:
+        serve_maps(Path(args.site_dir), cubes_dir, host=args.host, port=args.port)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _pack_leaderboard_map_data(
+    results_dirs: Optional[list[Path]] = None, fingerprints: Optional[Path] = None
+) -> None:
+    """Create docs leaderboard archive if map_data was generated by the run.
+
+    When *results_dirs* is given the archive is repacked incrementally: only
+    models whose result files or map files changed are recompressed, using
+    the result *fingerprints* of the leaderboard cache when available.
+    """
     map_data_dir = PROJECT_ROOT / "docs" / "source" / "_extra" / "leaderboard" / "map_data"
     pack_script = PROJECT_ROOT / "docs" / "scripts" / "pack_map_data.py"
 
@@ -164,8 +793,16 @@ def _pack_leaderboard_map_data() -> None:
         )
         return
 
+    cmd = [sys.executable, str(pack_script)]
+    if results_dirs:
+        cmd.append("--incremental")
+        for results_dir in results_dirs:
+            cmd.extend(["--results-dir", str(results_dir)])
+        if fingerprints is not None:
+            cmd.extend(["--fingerprints", str(fingerprints)])
+
     print("[evaluate] Packing leaderboard map data archive ...")
-    result = subprocess.run([sys.executable, str(pack_script)], check=False)
+    result = subprocess.run(cmd, check=False)
     if result.returncode != 0:
         print(
             "[evaluate] WARNING: map_data archive generation failed. "
@@ -174,6 +811,14 @@ def _pack_leaderboard_map_data() -> None:
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "telemetry":
+        sys.exit(_telemetry_summary(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        sys.exit(_merge_command(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "maps":
+        sys.exit(_maps_command(sys.argv[2:]))
+
+    dc1_args = _pop_dc1_args(sys.argv)
     _inject_default_paths(sys.argv)
     cli_args = parse_arguments()
     # Inject the leaderboard config path so DC1Evaluation can find it without
@@ -181,7 +826,20 @@ if __name__ == "__main__":
     if not getattr(cli_args, "leaderboard_config", None):
         vars(cli_args)["leaderboard_config"] = str(_LEADERBOARD_CONFIG_YAML)
     config_path = _resolve_dc1_config(cli_args)
-    exit_code = run_from_config(config_path, evaluation_cls=DC1Evaluation, cli_args=cli_args)
+    if dc1_args.plan or dc1_args.auto_adjust:
+        plan_code, config_path = _plan_run(
+            config_path, cli_args, dc1_args.catalog_dir, dc1_args.auto_adjust
+        )
+        if dc1_args.plan:
+            sys.exit(plan_code)
+    if dc1_args.progressive:
+        sys.exit(_run_progressive(config_path, cli_args, dc1_args.full, dc1_args.rel_ci))
+    if dc1_args.shard:
+        # Shards only write their own result stores; the leaderboard is built
+        # once by ``merge`` after every shard has finished.
+        sys.exit(_run_shard(dc1_args.shard, config_path, cli_args, dc1_args.frts_per_unit))
+    exit_code = _run_journaled(config_path, cli_args)
     if exit_code == 0:
-        _pack_leaderboard_map_data()
-    sys.exit(exit_code)
\ No newline at end of file
+        _refresh_map_cubes(Path(cli_args.data_directory), _load_config(config_path))
+        _pack_leaderboard_map_data(*_refresh_leaderboard_cache(Path(cli_args.data_directory)))
+    sys.exit(exit_code)
@@ -19,6 +19,15 @@ class DC1Evaluation(BaseDCEvaluation):
 
     CHALLENGE_NAME = "DC1"
 
+    # Model -> reference datasets evaluated when the YAML has no
+    # ``dataset_references`` (e.g. the GloNet baseline run).
+    DEFAULT_DATASET_REFERENCES = {
+        "glonet": [
+            "argo_profiles", "glorys", "jason3", "saral", "swot",  # "argo_velocities",
+            # "SSS_fields", "SST_fields",
+        ],
+    }
+
     def __init__(self, arguments: Namespace) -> None:
         """Init class.
 
@@ -62,10 +71,7 @@ class DC1Evaluation(BaseDCEvaluation):
             self.dataset_references = config_refs
         else:
             self.dataset_references = {
-                "glonet": [
-                    "argo_profiles", "glorys", "jason3", "saral", "swot",  # "argo_velocities",
-                    # "SSS_fields", "SST_fields",
-                ],
+                model: list(refs) for model, refs in self.DEFAULT_DATASET_REFERENCES.items()
             }
         self.all_datasets = list(
             set(
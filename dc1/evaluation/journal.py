@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Append-only resume journal of evaluation runs.
+
+A plain run journals every (model, reference, FRT, lead) task in
+``<data_directory>/journal.jsonl``: tasks with a results entry are recorded
+with their results file and the SHA-256 of the entry (:func:`journal_results`),
+and after a run that finished cleanly the tasks without an entry (no
+reference data) are recorded as done too.  ``--shard`` and ``--progressive``
+runs journal their work units (:mod:`dc1.evaluation.sharding`) the same way,
+keyed on the unit and checksummed on its whole results file.  On restart only
+tasks without a verified ``ok`` entry are run again — a task whose results
+file or entry was removed or modified since is redone; with
+``retry_failed_only`` just the failed ones are.
+
+Lines are flushed immediately and ``fsync``-ed every ``fsync_every`` records
+or ``fsync_interval_s`` seconds, whichever comes first.  A torn last line
+left by a crash is ignored on replay.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+
+# Task journal of a plain run, relative to its data directory.
+TASK_JOURNAL = "journal.jsonl"
+
+
+def sha256_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def entry_digest(entry: dict[str, Any]) -> str:
+    """SHA-256 hex digest of one results entry (key order independent)."""
+    return hashlib.sha256(
+        json.dumps(entry, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def task_key(model: str, reference: str, frt: Any, lead: Any) -> str:
+    """Journal key of one (model, reference, FRT, lead) evaluation task."""
+    return f"{model}|{reference}|{str(frt)[:10]}|{int(lead)}"
+
+
+def _entry_digests(path: Path) -> set[str]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return set()
+    return {
+        entry_digest(entry)
+        for entries in (data.get("results") or {}).values()
+        for entry in entries
+    }
+
+
+class TaskJournal:
+    """Append-only journal of finished evaluation tasks (work units).
+
+    Use it as a context manager (or call :meth:`close`) so the file handle
+    is flushed and closed.
+
+    Parameters
+    ----------
+    path : path-like
+        Journal file (JSON Lines).  Created if missing.
+    fsync_every : int
+        Force an ``fsync`` after this many appended records.
+    fsync_interval_s : float
+        Force an ``fsync`` when this much time passed since the last one.
+    """
+
+    def __init__(
+        self, path: Path, fsync_every: int = 16, fsync_interval_s: float = 5.0
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync_every = max(1, int(fsync_every))
+        self.fsync_interval_s = float(fsync_interval_s)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._replay()
+        self._fh = open(self.path, "a", encoding="utf-8")
+        if self._ends_torn():
+            # Terminate a torn line so the next record starts on its own line.
+            self._fh.write("\n")
+            self._fh.flush()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # -- replay ---------------------------------------------------------------
+
+    def _replay(self) -> None:
+        if not self.path.is_file():
+            return
+        with open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from a crash
+                key = entry.get("key")
+                if key:
+                    # Last entry wins: a retried task overrides its failure.
+                    self._entries[key] = entry
+
+    def _ends_torn(self) -> bool:
+        if not self.path.is_file() or self.path.stat().st_size == 0:
+            return False
+        with open(self.path, "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            return fh.read(1) != b"\n"
+
+    def _is_valid(
+        self, entry: dict[str, Any], verify: bool, digests: dict[str, set[str]]
+    ) -> bool:
+        if entry.get("status") != STATUS_OK:
+            return False
+        result_path = entry.get("result_path")
+        if not result_path:
+            return True
+        path = Path(result_path)
+        if not path.is_file():
+            return False
+        if verify and entry.get("digest"):
+            # Task entries: the entry must still be in its results file,
+            # which is hashed once per call however many tasks it holds.
+            if result_path not in digests:
+                digests[result_path] = _entry_digests(path)
+            return entry["digest"] in digests[result_path]
+        if verify and entry.get("checksum"):
+            return sha256_file(path) == entry["checksum"]
+        return True
+
+    # -- queries ----------------------------------------------------------------
+
+    def completed(self, verify: bool = True) -> dict[str, dict[str, Any]]:
+        """Entries of tasks finished successfully (result file verified)."""
+        with self._lock:
+            entries = dict(self._entries)
+        digests: dict[str, set[str]] = {}
+        return {k: e for k, e in entries.items() if self._is_valid(e, verify, digests)}
+
+    def failed(self) -> set[str]:
+        """Keys whose latest entry is a failure."""
+        with self._lock:
+            return {k for k, e in self._entries.items() if e.get("status") == STATUS_FAILED}
+
+    def pending(
+        self,
+        keys: Iterable[str],
+        retry_failed_only: bool = False,
+        verify: bool = True,
+    ) -> list[str]:
+        """Filter *keys* down to the tasks that still have to run.
+
+        Parameters
+        ----------
+        keys : iterable of str
+            All task keys of the run.
+        retry_failed_only : bool
+            Only return tasks whose latest journal entry is a failure.
+        verify : bool
+            Re-hash result files of completed tasks before trusting them.
+        """
+        keys = list(keys)
+        if retry_failed_only:
+            failed = self.failed()
+            return [k for k in keys if k in failed]
+        done = self.completed(verify=verify)
+        return [k for k in keys if k not in done]
+
+    # -- writes -----------------------------------------------------------------
+
+    def record(
+        self,
+        key: str,
+        status: str = STATUS_OK,
+        result_path: Optional[Path] = None,
+        checksum: Optional[str] = None,
+        error: Optional[str] = None,
+        digest: Optional[str] = None,
+    ) -> None:
+        """Append one task outcome to the journal.
+
+        *checksum* is the SHA-256 of the whole results file (work units),
+        *digest* the :func:`entry_digest` of the task's entry in it.
+        """
+        entry: dict[str, Any] = {
+            "key": key,
+            "status": status,
+            "time": datetime.now().isoformat(timespec="seconds"),
+        }
+        if result_path is not None:
+            entry["result_path"] = str(result_path)
+        if checksum is not None:
+            entry["checksum"] = checksum
+        if digest is not None:
+            entry["digest"] = digest
+        if error is not None:
+            entry["error"] = str(error)[:2000]
+        line = json.dumps(entry)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            self._entries[key] = entry
+            self._unsynced += 1
+            now = time.monotonic()
+            if (
+                self._unsynced >= self.fsync_every
+                or now - self._last_sync >= self.fsync_interval_s
+            ):
+                os.fsync(self._fh.fileno())
+                self._unsynced = 0
+                self._last_sync = now
+
+    def close(self) -> None:
+        """Flush, fsync and close the journal."""
+        with self._lock:
+            if self._fh.closed:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+
+    def __enter__(self) -> "TaskJournal":
+        """Return the journal itself."""
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        """Close the journal."""
+        self.close()
+
+    def __del__(self) -> None:
+        """Close the file handle of a journal that was never closed."""
+        fh = getattr(self, "_fh", None)
+        if fh is not None and not fh.closed:
+            fh.close()
+
+
+def journal_results(
+    journal: TaskJournal,
+    results_file: Optional[Path],
+    expected: Iterable[str] = (),
+    complete: bool = False,
+) -> int:
+    """Journal the tasks of a finished run from its results file.
+
+    Parameters
+    ----------
+    journal : TaskJournal
+        Task journal of the run.
+    results_file : Path, optional
+        ``results_<model>.json`` written by the run (None when it wrote none).
+    expected : iterable of str
+        :func:`task_key` of every task the run covered.
+    complete : bool
+        The run finished cleanly: expected tasks without an entry had no
+        reference data and are recorded as done.  Otherwise they are recorded
+        as failed.
+
+    Returns
+    -------
+    int
+        Number of tasks recorded with a results entry.
+    """
+    found: set[str] = set()
+    if results_file is not None and Path(results_file).is_file():
+        data = json.loads(Path(results_file).read_text(encoding="utf-8"))
+        for model, entries in (data.get("results") or {}).items():
+            for entry in entries:
+                key = task_key(
+                    model,
+                    entry.get("ref_alias"),
+                    entry.get("forecast_reference_time"),
+                    entry.get("lead_time"),
+                )
+                journal.record(
+                    key, STATUS_OK, result_path=results_file, digest=entry_digest(entry)
+                )
+                found.add(key)
+    for key in expected:
+        if key in found:
+            continue
+        if complete:
+            journal.record(key, STATUS_OK)
+        else:
+            journal.record(key, STATUS_FAILED, error="no results entry")
+    return len(found)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Per-model fingerprints of the result files behind the leaderboard.
+
+The map data archive is repacked per model
+(``docs/scripts/pack_map_data.py --incremental --fingerprints``): a model's
+archive member is only recompressed when its result files or map files
+changed.  :class:`LeaderboardCache` keeps the SHA-256 fingerprint of each
+model's result files in ``fingerprints.json``, with the size and
+modification time of the files when they were hashed, so unchanged results
+are not hashed again on every run; a file that was only touched is hashed
+again and keeps its fingerprint.
+
+The leaderboard pages are rebuilt in full by ``dcleaderboard-build``, which
+aggregates and ranks the results itself; nothing here stands in for it.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable
+
+CACHE_INDEX = "index.json"
+FINGERPRINTS_FILE = "fingerprints.json"
+
+
+def model_result_files(results_dir: Path, model: str) -> list[Path]:
+    """Result files belonging to *model* in *results_dir*."""
+    results_dir = Path(results_dir)
+    return [
+        p for p in (
+            results_dir / f"results_{model}.json",
+            results_dir / f"results_{model}_per_bins.jsonl.gz",
+        )
+        if p.is_file()
+    ]
+
+
+def fingerprint(paths: Iterable[Path], chunk_size: int = 1 << 20) -> str:
+    """SHA-256 over the names and contents of *paths*."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        digest.update(path.name.encode("utf-8"))
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def discover_models(results_dirs: Iterable[Path]) -> dict[str, Path]:
+    """Map model name → results directory (later directories win)."""
+    models: dict[str, Path] = {}
+    for results_dir in results_dirs:
+        results_dir = Path(results_dir)
+        if not results_dir.is_dir():
+            continue
+        for path in sorted(results_dir.glob("results_*.json")):
+            models[path.stem[len("results_"):]] = results_dir
+    return models
+
+
+def _stat_key(paths: Iterable[Path]) -> list[list[Any]]:
+    """Name, size and modification time of *paths*, to skip re-hashing them."""
+    return [
+        [p.name, p.stat().st_size, p.stat().st_mtime_ns] for p in sorted(Path(q) for q in paths)
+    ]
+
+
+def _write_json(path: Path, payload: Any) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class LeaderboardCache:
+    """Fingerprints of each model's result files, re-hashed only when they change.
+
+    Parameters
+    ----------
+    cache_dir : path-like
+        Directory holding the cache index and ``fingerprints.json``.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        index_path = self.cache_dir / CACHE_INDEX
+        self.index: dict[str, dict[str, Any]] = (
+            json.loads(index_path.read_text(encoding="utf-8")) if index_path.is_file() else {}
+        )
+
+    def refresh(self, results_dirs: Iterable[Path]) -> tuple[list[str], list[str]]:
+        """Update the fingerprints of added, updated and removed models.
+
+        Parameters
+        ----------
+        results_dirs : iterable of Path
+            Directories holding ``results_<model>.json`` files.
+
+        Returns
+        -------
+        tuple of list
+            ``(changed, removed)`` model names.
+        """
+        models = discover_models(results_dirs)
+        changed = []
+        for model, results_dir in sorted(models.items()):
+            files = model_result_files(results_dir, model)
+            stat = _stat_key(files)
+            cached = self.index.get(model) or {}
+            if cached.get("stat") == stat and cached.get("results_dir") == str(results_dir):
+                continue
+            fp = fingerprint(files)
+            if cached.get("fingerprint") != fp:
+                changed.append(model)
+            self.index[model] = {
+                "fingerprint": fp, "results_dir": str(results_dir), "stat": stat
+            }
+
+        removed = sorted(set(self.index) - set(models))
+        for model in removed:
+            del self.index[model]
+
+        _write_json(self.cache_dir / CACHE_INDEX, self.index)
+        _write_json(self.cache_dir / FINGERPRINTS_FILE, self.fingerprints())
+        return changed, removed
+
+    def fingerprints(self) -> dict[str, str]:
+        """Fingerprint of each model's result files."""
+        return {model: entry["fingerprint"] for model, entry in self.index.items()}
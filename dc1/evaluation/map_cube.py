@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Per-FRT map cubes: per-bin results stored once, snapshots rendered on demand.
+
+Exporting a JS map file for every FRT × lead time × variable × metric ×
+reference comes to ~26 000 files and tens of minutes, which is why
+``skip_frt_snapshots: true`` is the default and per-FRT browsing was
+normally unavailable.
+
+:func:`build_cubes` stores the per-bin results of every model
+(``results_<model>_per_bins.jsonl.gz``) once, as one compressed Zarr cube per
+model and reference — ``<cubes_dir>/<model>/<ref_alias>.zarr`` with one
+``<variable>__<metric>`` array of dimensions ``(frt, lead, [depth,] lat, lon)``
+chunked one (FRT, lead time) per chunk.  The per-bins file is streamed
+twice, first for the coordinates of each cube, then to write each entry into
+its chunk, so the build holds one entry at a time.  A map snapshot is then a
+single chunk read: :func:`render_snapshot` builds the payload of
+``map_data/<model>_<ref>_<variable>_<metric>_<lead>_<frt>.js`` only when it is
+requested (see :mod:`dc1.evaluation.map_server`).
+
+Per-bin records may be ``[lat, lon, value(, count)]`` lists (bin corner or
+centre) or mappings with ``lat``/``lon`` (optionally ``depth``) and one
+value per metric; a variable may also map metric names to records.  List
+records do not name their metric: it is the ``metric`` of the entry, else
+RMSE against observations and RMSD against gridded references.
+"""
+
+import gzip
+import json
+import math
+import os
+import shutil
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import dask.array as da
+import numpy as np
+import xarray as xr
+import zarr
+
+CUBES_DIRNAME = "map_cubes"
+# Snapshots rendered so far, per model (removed with the cubes on rebuild).
+SNAPSHOTS_DIRNAME = "snapshots"
+CUBE_VERSION = 2
+
+# Metric of list records, which carry a single value, when the entry has none.
+OBSERVATION_LIST_METRIC = "rmse"
+GRIDDED_LIST_METRIC = "rmsd"
+# Observation references, for entries without ``ref_is_observation``.
+OBSERVATION_REFS = frozenset({"argo_profiles", "jason3", "saral", "swot"})
+
+_LAT_KEYS = ("lat", "latitude", "lat_bin")
+_LON_KEYS = ("lon", "longitude", "lon_bin")
+_DEPTH_KEYS = ("depth", "depth_bin")
+_NON_METRIC_KEYS = set(_LAT_KEYS + _LON_KEYS + _DEPTH_KEYS) | {"count", "n", "n_obs"}
+
+# Bins whose edge falls on a float like -89.99999 still belong to bin 0.
+_EDGE_EPS = 1e-6
+
+
+def _fingerprint(path: Path) -> str:
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _first(record: dict[str, Any], keys: Iterable[str]) -> Any:
+    for key in keys:
+        if record.get(key) is not None:
+            return record[key]
+    return None
+
+
+def iter_bin_values(
+    records: Any, metric: Optional[str] = None
+) -> Iterator[tuple[str, np.ndarray, np.ndarray, Optional[np.ndarray], np.ndarray]]:
+    """Split the per-bin records of one variable into per-metric arrays.
+
+    Args:
+        records (Any): Per-bin records of the variable.
+        metric (str, optional): Metric of list records (RMSD when omitted).
+
+    Yields:
+        tuple: ``(metric, lat, lon, depth or None, value)``.
+    """
+    if isinstance(records, dict):
+        for name, sub in records.items():
+            yield from iter_bin_values(sub, str(name).lower())
+        return
+    if not records:
+        return
+    if isinstance(records[0], dict):
+        columns: dict[str, list[float]] = {}
+        lats, lons, depths = [], [], []
+        for rec in records:
+            lat, lon = _first(rec, _LAT_KEYS), _first(rec, _LON_KEYS)
+            if lat is None or lon is None:
+                continue
+            lats.append(float(lat))
+            lons.append(float(lon))
+            depths.append(_first(rec, _DEPTH_KEYS))
+            n = len(lats) - 1
+            for key, value in rec.items():
+                if key in _NON_METRIC_KEYS or not isinstance(value, (int, float)):
+                    continue
+                column = columns.setdefault(key.lower(), [math.nan] * n)
+                column.extend([math.nan] * (n - len(column)))
+                column.append(float(value))
+        n = len(lats)
+        depth = (
+            np.asarray([math.nan if d is None else d for d in depths], dtype="float64")
+            if any(d is not None for d in depths) else None
+        )
+        for name, column in columns.items():
+            column.extend([math.nan] * (n - len(column)))
+            yield (name, np.asarray(lats), np.asarray(lons), depth,
+                   np.asarray(column, dtype="float64"))
+        return
+    arr = np.asarray(records, dtype="float64")
+    if arr.ndim == 2 and arr.shape[1] >= 3:
+        yield metric or GRIDDED_LIST_METRIC, arr[:, 0], arr[:, 1], None, arr[:, 2]
+
+
+def list_record_metric(entry: dict[str, Any]) -> str:
+    """Metric of the list records of a per-bins entry."""
+    if entry.get("metric"):
+        return str(entry["metric"]).lower()
+    observation = entry.get("ref_is_observation")
+    if observation is None:
+        observation = entry.get("ref_alias") in OBSERVATION_REFS
+    return OBSERVATION_LIST_METRIC if observation else GRIDDED_LIST_METRIC
+
+
+def iter_per_bins(
+    path: Path,
+) -> Iterator[tuple[str, str, int, str, str, np.ndarray, np.ndarray, Optional[np.ndarray],
+                    np.ndarray]]:
+    """Stream the per-bin values of a ``results_<model>_per_bins.jsonl.gz`` file.
+
+    One entry is decoded at a time.
+
+    Yields:
+        tuple: ``(ref_alias, frt, lead, variable, metric, lat, lon, depth or None, value)``.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            ref = entry.get("ref_alias")
+            frt = str(entry.get("forecast_reference_time") or "")[:10]
+            if not ref or not frt or entry.get("lead_time") is None:
+                continue
+            lead = int(entry["lead_time"])
+            list_metric = list_record_metric(entry)
+            for variable, records in (entry.get("per_bins") or {}).items():
+                for metric, lat, lon, depth, value in iter_bin_values(records, list_metric):
+                    yield ref, frt, lead, variable, metric, lat, lon, depth, value
+
+
+@dataclass
+class _CubeLayout:
+    """Coordinates of the cube of one reference, gathered without keeping values."""
+
+    frts: set[str] = field(default_factory=set)
+    leads: set[int] = field(default_factory=set)
+    depths: set[float] = field(default_factory=set)
+    lats: set[float] = field(default_factory=set)
+    # (variable, metric) -> whether the variable has depth records.
+    arrays: dict[tuple[str, str], bool] = field(default_factory=dict)
+
+
+def read_per_bins(path: Path) -> dict[str, _CubeLayout]:
+    """Cube layout of every reference of a per-bins file (first pass of :func:`build_cubes`)."""
+    refs: dict[str, _CubeLayout] = {}
+    for ref, frt, lead, variable, metric, lat, _lon, depth, _value in iter_per_bins(path):
+        layout = refs.setdefault(ref, _CubeLayout())
+        layout.frts.add(frt)
+        layout.leads.add(lead)
+        layout.lats.update(np.unique(np.round(lat, 6)).tolist())
+        finite_depths = depth[np.isfinite(depth)] if depth is not None else np.array([])
+        has_depth = bool(finite_depths.size)
+        layout.depths.update(np.unique(finite_depths).tolist())
+        key = (variable, metric)
+        layout.arrays[key] = layout.arrays.get(key, False) or has_depth
+    return refs
+
+
+def infer_resolution(lats: np.ndarray) -> float:
+    """Bin size from the spacing of the latitudes present (2° when undetermined)."""
+    steps = np.diff(np.unique(np.round(lats, 6)))
+    steps = steps[steps > 1e-6]
+    return float(steps.min()) if steps.size else 2.0
+
+
+def _array_name(variable: str, metric: str) -> str:
+    return f"{variable}__{metric}"
+
+
+def _cube_template(layout: _CubeLayout, resolution: Optional[float]) -> xr.Dataset:
+    """Lazy all-NaN cube of one reference, chunked one (FRT, lead time) per chunk."""
+    res = float(resolution or infer_resolution(np.asarray(sorted(layout.lats))))
+    n_lat, n_lon = int(round(180 / res)), int(round(360 / res))
+    coords: dict[str, Any] = {
+        "frt": sorted(layout.frts),
+        "lead": sorted(layout.leads),
+        "lat": -90.0 + res * np.arange(n_lat),
+        "lon": -180.0 + res * np.arange(n_lon),
+    }
+    if layout.depths:
+        coords["depth"] = sorted(layout.depths)
+    data_vars = {}
+    for (variable, metric), has_depth in sorted(layout.arrays.items()):
+        # Only variables with depth records get a depth axis: surface-only
+        # variables of the same reference keep all their bins.
+        dims: tuple[str, ...] = (
+            ("frt", "lead", "depth", "lat", "lon") if has_depth else ("frt", "lead", "lat", "lon")
+        )
+        shape = tuple(len(coords[d]) for d in dims)
+        chunks = tuple(1 if d in ("frt", "lead") else n for d, n in zip(dims, shape, strict=True))
+        data_vars[_array_name(variable, metric)] = xr.Variable(
+            dims,
+            da.full(shape, np.nan, dtype="float32", chunks=chunks),
+            attrs={"variable": variable, "metric": metric},
+        )
+    return xr.Dataset(data_vars, coords=coords, attrs={"resolution": res})
+
+
+class _CubeWriter:
+    """Writes the (FRT, lead time) slices of one cube as they are read.
+
+    Each slice is exactly one chunk of its array, so a write touches no other
+    (FRT, lead time); the colour range of each array is tracked on the way.
+    """
+
+    def __init__(self, store: Path, template: xr.Dataset) -> None:
+        self.store = store
+        self.group = zarr.open_group(str(store), mode="r+")
+        self.res = float(template.attrs["resolution"])
+        self.n_lat, self.n_lon = template.sizes["lat"], template.sizes["lon"]
+        self.frt_index = {str(f): i for i, f in enumerate(template["frt"].values)}
+        self.lead_index = {int(v): i for i, v in enumerate(template["lead"].values)}
+        self.depths = template["depth"].values if "depth" in template.coords else np.array([])
+        self.ranges: dict[str, tuple[float, float]] = {}
+
+    def write(
+        self,
+        frt: str,
+        lead: int,
+        name: str,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        depth: Optional[np.ndarray],
+        value: np.ndarray,
+    ) -> None:
+        """Bin the values of one entry into the chunk of its (FRT, lead time)."""
+        array = self.group[name]
+        fi, li = self.frt_index[frt], self.lead_index[lead]
+        iy = np.floor((lat + 90.0) / self.res + _EDGE_EPS).astype(np.int64)
+        iy = np.clip(iy, 0, self.n_lat - 1)
+        ix = np.floor(np.mod(lon + 180.0, 360.0) / self.res + _EDGE_EPS).astype(np.int64)
+        ix %= self.n_lon
+        # Merged with what an earlier entry of the same slice wrote.
+        grid = array[fi, li]
+        if array.ndim == 5:
+            if depth is None:
+                return
+            ok = np.isfinite(depth)
+            grid[np.searchsorted(self.depths, depth[ok]), iy[ok], ix[ok]] = value[ok]
+        else:
+            grid[iy, ix] = value
+        array[fi, li] = grid
+        finite = grid[np.isfinite(grid)]
+        if finite.size:
+            low, high = self.ranges.get(name, (math.inf, -math.inf))
+            self.ranges[name] = (min(low, float(finite.min())), max(high, float(finite.max())))
+
+    def close(self) -> None:
+        """Record the colour range of every array and consolidate the metadata."""
+        for name, array in self.group.arrays():
+            if "metric" in array.attrs:
+                low, high = self.ranges.get(name, (None, None))
+                # One colour scale for every FRT and lead time of the group.
+                array.attrs.update(vmin=low, vmax=high)
+        zarr.consolidate_metadata(str(self.store))
+
+
+def build_cubes(
+    results_dirs: Iterable[Path],
+    cubes_dir: Path,
+    resolution: Optional[float] = None,
+    force: bool = False,
+) -> list[Path]:
+    """Build (or refresh) the map cubes of every model with per-bin results.
+
+    A model's cubes are rebuilt only when its per-bins file changed since
+    they were written.
+
+    Args:
+        results_dirs (Iterable[Path]): Directories holding ``results_*_per_bins.jsonl.gz``.
+        cubes_dir (Path): Output directory (``<model>/<ref_alias>.zarr``).
+        resolution (float, optional): Bin size in degrees (``per_bins_resolution``);
+            inferred from the data when omitted.
+        force (bool): Rebuild even unchanged models.
+
+    Returns:
+        list[Path]: Cubes written.
+    """
+    cubes_dir = Path(cubes_dir)
+    written = []
+    for results_dir in results_dirs:
+        for path in sorted(Path(results_dir).glob("results_*_per_bins.jsonl.gz")):
+            model = path.name[len("results_"):-len("_per_bins.jsonl.gz")]
+            model_dir = cubes_dir / model
+            stamp = model_dir / "source.json"
+            fingerprint = {"source": str(path.resolve()), "fingerprint": _fingerprint(path),
+                           "version": CUBE_VERSION}
+            if not force and stamp.is_file():
+                try:
+                    if json.loads(stamp.read_text(encoding="utf-8")) == fingerprint:
+                        continue
+                except ValueError:
+                    pass
+            # Two streaming passes: the coordinates of each cube, then its
+            # slices, written one entry at a time.
+            refs = read_per_bins(path)
+            if not refs:
+                continue
+            tmp_dir = cubes_dir / f".{model}.tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+            writers = {}
+            for ref, layout in sorted(refs.items()):
+                template = _cube_template(layout, resolution)
+                template.attrs.update(model=model, ref_alias=ref)
+                store = tmp_dir / f"{ref}.zarr"
+                template.to_zarr(store, mode="w", consolidated=True, compute=False)
+                writers[ref] = _CubeWriter(store, template)
+                written.append(model_dir / f"{ref}.zarr")
+            for ref, frt, lead, variable, metric, lat, lon, depth, value in iter_per_bins(path):
+                writers[ref].write(frt, lead, _array_name(variable, metric), lat, lon, depth, value)
+            for writer in writers.values():
+                writer.close()
+            (tmp_dir / "source.json").write_text(json.dumps(fingerprint), encoding="utf-8")
+            # Swap the whole model at once so readers never see a partial set.
+            shutil.rmtree(model_dir, ignore_errors=True)
+            os.replace(tmp_dir, model_dir)
+    return written
+
+
+def file_stem(key: str) -> str:
+    """File stem of a map key, as ``_fileStem`` in maps.html."""
+    return key.replace("|", "_").replace(" ", "_")
+
+
+def _depth_label(depth: float) -> str:
+    return f"{depth:g}"
+
+
+@dataclass(frozen=True)
+class SnapshotRef:
+    """Location of one on-demand snapshot in the cubes."""
+
+    cube: str
+    array: str
+    frt: str
+    lead: int
+    depth: Optional[float] = None
+
+
+class SnapshotIndex:
+    """File stems of every snapshot available from the cubes of a directory.
+
+    Args:
+        cubes_dir (Path): Directory written by :func:`build_cubes`.
+        max_open (int): Cubes kept open at once.
+    """
+
+    def __init__(self, cubes_dir: Path, max_open: int = 16) -> None:
+        self.cubes_dir = Path(cubes_dir)
+        self.max_open = max_open
+        self.snapshots: dict[str, SnapshotRef] = {}
+        self.ranges: dict[str, tuple[Optional[float], Optional[float]]] = {}
+        self.frt_list: dict[str, list[str]] = {}
+        self._open: "OrderedDict[str, xr.Dataset]" = OrderedDict()
+        for cube in sorted(self.cubes_dir.glob("*/*.zarr")):
+            self._index_cube(cube)
+
+    def _index_cube(self, cube: Path) -> None:
+        ds = xr.open_zarr(cube, consolidated=True)
+        model, ref = cube.parent.name, cube.stem
+        frts = [str(f) for f in ds["frt"].values]
+        leads = [int(v) for v in ds["lead"].values]
+        self.frt_list[ref] = sorted(set(self.frt_list.get(ref, [])) | set(frts))
+        for name, var in ds.data_vars.items():
+            depths = (
+                [float(d) for d in ds["depth"].values] if "depth" in var.dims else [None]
+            )
+            prefix = f"{model}|{ref}|{var.attrs['variable']}|{var.attrs['metric']}"
+            for frt in frts:
+                for lead in leads:
+                    for depth in depths:
+                        key = f"{prefix}|{lead}|{frt}"
+                        if depth is not None:
+                            key += f"|{_depth_label(depth)}"
+                        stem = file_stem(key)
+                        self.snapshots[stem] = SnapshotRef(str(cube), name, frt, lead, depth)
+                        self.ranges[stem] = (var.attrs.get("vmin"), var.attrs.get("vmax"))
+        ds.close()
+
+    def _dataset(self, cube: str) -> xr.Dataset:
+        ds = self._open.pop(cube, None)
+        if ds is None:
+            ds = xr.open_zarr(cube, consolidated=True)
+        self._open[cube] = ds
+        while len(self._open) > self.max_open:
+            self._open.popitem(last=False)[1].close()
+        return ds
+
+    def cache_path(self, stem: str) -> Optional[Path]:
+        """Where the rendered snapshot of *stem* is kept (None when unknown)."""
+        ref = self.snapshots.get(stem)
+        if ref is None:
+            return None
+        return Path(ref.cube).parent / SNAPSHOTS_DIRNAME / f"{stem}.js"
+
+    def render(self, stem: str) -> Optional[dict[str, Any]]:
+        """Payload of one snapshot (None when the stem is unknown)."""
+        ref = self.snapshots.get(stem)
+        if ref is None:
+            return None
+        return render_snapshot(self._dataset(ref.cube), ref)
+
+
+def render_snapshot(ds: xr.Dataset, ref: SnapshotRef) -> dict[str, Any]:
+    """Map payload of one (FRT, lead time[, depth]) slice: a single chunk read."""
+    var = ds[ref.array]
+    selection: dict[str, Any] = {"frt": ref.frt, "lead": ref.lead}
+    if ref.depth is not None and "depth" in var.dims:
+        selection["depth"] = ref.depth
+    grid = np.asarray(var.sel(selection).values, dtype="float64")
+    res = float(ds.attrs["resolution"])
+    iy, ix = np.nonzero(np.isfinite(grid))
+    lat = ds["lat"].values
+    lon = ds["lon"].values
+    data = [
+        [float(lat[y]), float(lat[y] + res), float(lon[x]), float(lon[x] + res),
+         round(float(grid[y, x]), 4)]
+        for y, x in zip(iy, ix, strict=True)
+    ]
+    # vmin / vmax follow the data: build_map_manifest reads them from the tail.
+    return {
+        "grid_type": "grid",
+        "resolution": res,
+        "data": data,
+        "vmin": var.attrs.get("vmin"),
+        "vmax": var.attrs.get("vmax"),
+    }
+
+
+def jsonp(payload: dict[str, Any]) -> str:
+    """Body of a ``map_data/*.js`` file."""
+    return "window._mapDataCallback(" + json.dumps(payload, separators=(",", ":")) + ");"
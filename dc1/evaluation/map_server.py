@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Local leaderboard server rendering per-FRT map snapshots on demand.
+
+Serves the leaderboard pages (``maps.html`` and the pre-rendered aggregate
+``map_data/*.js`` files) as a plain static server, with two additions:
+
+* ``map_data/manifest.js`` lists, on top of the files on disk, every per-FRT
+  snapshot available from the map cubes (:mod:`dc1.evaluation.map_cube`)
+  together with the FRT list of each reference, so the period selector of
+  ``maps.html`` appears;
+* a ``map_data/*.js`` file that does not exist on disk is rendered from the
+  cubes on first request and kept next to the cubes of its model
+  (``<model>/snapshots/``, dropped when the cubes are rebuilt), so later
+  requests are served from disk.
+
+Start it with ``python -m dc1.evaluate maps``.
+"""
+
+import json
+import os
+import threading
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import unquote, urlparse
+
+from loguru import logger
+
+from dc1.evaluation.map_cube import SnapshotIndex, jsonp
+
+MANIFEST_PATH = "/map_data/manifest.js"
+
+
+def read_manifest(path: Path) -> dict[str, Any]:
+    """Parse a ``manifest.js`` written by ``build_map_manifest.py`` (empty if absent)."""
+    if not path.is_file():
+        return {"files": {}, "version": 1}
+    text = path.read_text(encoding="utf-8")
+    try:
+        return json.loads(text[text.index("{"):text.rindex("}") + 1])
+    except ValueError:
+        return {"files": {}, "version": 1}
+
+
+class MapRequestHandler(SimpleHTTPRequestHandler):
+    """Static handler that falls back to the cubes for missing map files."""
+
+    def __init__(self, *args: Any, index: SnapshotIndex, **kwargs: Any) -> None:
+        self.index = index
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:  # noqa: N802 — http.server naming
+        """Serve the manifest and missing map files from the cubes, else the file."""
+        path = unquote(urlparse(self.path).path)
+        if path == MANIFEST_PATH:
+            self._send_js(self._manifest())
+            return
+        if path.startswith("/map_data/") and path.endswith(".js"):
+            stem = path[len("/map_data/"):-len(".js")]
+            if "/" not in stem and not Path(self.translate_path(self.path)).is_file():
+                body = self._snapshot(stem)
+                if body is None:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+                else:
+                    self._send_js(body)
+                return
+        super().do_GET()
+
+    def _manifest(self) -> str:
+        manifest = read_manifest(Path(self.directory) / "map_data" / "manifest.js")
+        files = dict(manifest.get("files") or {})
+        for stem, value_range in self.index.ranges.items():
+            files.setdefault(stem, list(value_range))
+        manifest["files"] = files
+        manifest["frt_list"] = self.index.frt_list
+        return "window.MAP_MANIFEST = " + json.dumps(manifest, separators=(",", ":")) + ";"
+
+    def _snapshot(self, stem: str) -> Optional[str]:
+        cached = self.index.cache_path(stem)
+        if cached is None:
+            return None
+        if cached.is_file():
+            return cached.read_text(encoding="utf-8")
+        with _RENDER_LOCK:
+            payload = self.index.render(stem)
+        if payload is None:
+            return None
+        body = jsonp(payload)
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_name(f".{cached.name}.{threading.get_ident()}.tmp")
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, cached)
+        return body
+
+    def _send_js(self, body: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/javascript; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# Cube handles are shared between request threads.
+_RENDER_LOCK = threading.Lock()
+
+
+def serve_maps(
+    site_dir: Path,
+    cubes_dir: Path,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+) -> None:
+    """Serve *site_dir* with per-FRT snapshots rendered from *cubes_dir*.
+
+    Args:
+        site_dir (Path): Leaderboard directory (``maps.html``, ``map_data/``).
+        cubes_dir (Path): Map cubes written by :func:`~dc1.evaluation.map_cube.build_cubes`.
+        host (str): Bind address.
+        port (int): Port.
+    """
+    index = SnapshotIndex(cubes_dir)
+    logger.info(
+        f"{len(index.snapshots)} per-FRT snapshots available from {cubes_dir} "
+        f"({len(index.frt_list)} references)"
+    )
+    handler = partial(
+        MapRequestHandler, directory=str(site_dir), index=index
+    )
+    with ThreadingHTTPServer((host, port), handler) as server:
+        logger.info(f"Serving {site_dir} on http://{host}:{port}/maps.html")
+        server.serve_forever()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Per-batch observation file planning.
+
+With ``n_days_forecast: 10`` and ``n_days_interval: 7`` consecutive forecast
+reference times (FRTs) overlap by three days, and ``time_tolerance`` widens
+every match window further.  Planning each (FRT, lead time) task on its own
+therefore loads and preprocesses the same observation files several times
+within a batch.
+
+:func:`plan_batch_obs_files` computes, once per batch, the union of the
+observation files needed by all tasks of that batch together with the
+file → tasks mapping.  :mod:`dc1.evaluation.planner` uses it to count the
+files a batch downloads (the union) and the loads its tasks issue (one per
+task and file: the dctools loader does not share loaded files between tasks).
+:func:`covered_frts` uses the same matching to tell which FRTs a reference
+has data for at all.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+# (forecast_reference_time, lead_time) — lead_time is expressed in days.
+TaskKey = tuple[pd.Timestamp, int]
+
+
+@dataclass
+class BatchObsPlan:
+    """Observation files required by one batch of evaluation tasks.
+
+    Attributes
+    ----------
+    files : list of str
+        Union of the observation files needed by the batch, in order of first use.
+    file_tasks : dict
+        Tasks that need each file (``path -> [(frt, lead_time), ...]``).
+    task_files : dict
+        Files needed by each task (``(frt, lead_time) -> [path, ...]``).
+    """
+
+    files: list[str] = field(default_factory=list)
+    file_tasks: dict[str, list[TaskKey]] = field(default_factory=dict)
+    task_files: dict[TaskKey, list[str]] = field(default_factory=dict)
+
+    @property
+    def n_requests(self) -> int:
+        """Number of file loads a task-by-task planning would have issued."""
+        return sum(len(paths) for paths in self.task_files.values())
+
+    @property
+    def n_shared(self) -> int:
+        """Number of files needed by more than one task."""
+        return sum(1 for tasks in self.file_tasks.values() if len(tasks) > 1)
+
+    def summary(self) -> str:
+        """One-line description of the deduplication achieved for the batch."""
+        n_unique = len(self.files)
+        saved = self.n_requests - n_unique
+        return (
+            f"{len(self.task_files)} tasks → {n_unique} unique obs files "
+            f"({self.n_requests} requests, {saved} duplicate loads avoided, "
+            f"{self.n_shared} files shared)"
+        )
+
+
+def _entry_field(entry: Any, name: str) -> Any:
+    """Read *name* from a catalog entry (mapping or attribute-style record)."""
+    if isinstance(entry, Mapping):
+        return entry.get(name)
+    return getattr(entry, name, None)
+
+
+def _iter_catalog(catalog: Any) -> Iterable[Any]:
+    """Iterate over catalog rows, accepting DataFrames as well as sequences."""
+    if hasattr(catalog, "to_dict") and hasattr(catalog, "columns"):
+        return catalog.to_dict("records")
+    return catalog
+
+
+def task_window(
+    frt: Any, lead_time: int, time_tolerance_hours: float
+) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """Return the observation time window matched against one task.
+
+    Parameters
+    ----------
+    frt : datetime-like
+        Forecast reference time.
+    lead_time : int
+        Lead time in days.
+    time_tolerance_hours : float
+        Half-width of the matching window (``time_tolerance`` in the YAML).
+
+    Returns
+    -------
+    tuple of pandas.Timestamp
+        ``(start, end)`` bounds of the window, both inclusive.
+    """
+    valid_time = pd.Timestamp(frt) + pd.Timedelta(days=int(lead_time))
+    tolerance = pd.Timedelta(hours=float(time_tolerance_hours))
+    return valid_time - tolerance, valid_time + tolerance
+
+
+def plan_batch_obs_files(
+    tasks: Iterable[tuple[Any, int]],
+    catalog: Any,
+    time_tolerance_hours: float,
+    path_key: str = "path",
+    start_key: str = "date_start",
+    end_key: str = "date_end",
+) -> BatchObsPlan:
+    """Compute the union of observation files required by a batch of tasks.
+
+    Parameters
+    ----------
+    tasks : iterable of (frt, lead_time)
+        Tasks of the batch.
+    catalog : DataFrame or iterable of records
+        Observation catalog; each entry must expose a path and the time
+        coverage of the file.
+    time_tolerance_hours : float
+        Matching tolerance of the source (hours).
+    path_key, start_key, end_key : str
+        Names of the catalog fields holding the file path and time coverage.
+
+    Returns
+    -------
+    BatchObsPlan
+        The per-batch plan.
+    """
+    entries = []
+    for entry in _iter_catalog(catalog):
+        path = _entry_field(entry, path_key)
+        start = _entry_field(entry, start_key)
+        end = _entry_field(entry, end_key)
+        if path is None or start is None:
+            continue
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end) if end is not None else start
+        entries.append((str(path), start, end))
+
+    if not entries:
+        return BatchObsPlan(task_files={(pd.Timestamp(f), int(lt)): [] for f, lt in tasks})
+
+    # Sort once by start time so each task only scans candidates whose
+    # coverage can still intersect its window.
+    entries.sort(key=lambda e: e[1])
+    starts = np.array([e[1].value for e in entries], dtype=np.int64)
+    ends = np.array([e[2].value for e in entries], dtype=np.int64)
+    # Running max of end times: files before the first index whose running
+    # max reaches the window start can never intersect it.
+    ends_cummax = np.maximum.accumulate(ends)
+
+    plan = BatchObsPlan()
+    seen: dict[str, int] = {}
+    for frt, lead_time in tasks:
+        key = (pd.Timestamp(frt), int(lead_time))
+        if key in plan.task_files:
+            continue
+        w_start, w_end = task_window(key[0], key[1], time_tolerance_hours)
+        lo = int(np.searchsorted(ends_cummax, w_start.value, side="left"))
+        hi = int(np.searchsorted(starts, w_end.value, side="right"))
+        selected = [
+            entries[i][0] for i in range(lo, hi) if ends[i] >= w_start.value
+        ]
+        plan.task_files[key] = selected
+        for path in selected:
+            if path not in seen:
+                seen[path] = len(plan.files)
+                plan.files.append(path)
+            plan.file_tasks.setdefault(path, []).append(key)
+    return plan
+
+
+def covered_frts(
+    frts: Iterable[Any],
+    n_leads: int,
+    catalog: Any,
+    time_tolerance_hours: float,
+) -> Optional[list[Any]]:
+    """FRTs for which *catalog* holds data in the match window of at least one lead.
+
+    Returns
+    -------
+    list or None
+        The covered FRTs of *frts*, in order; None when no catalog entry
+        carries a time coverage, so coverage is unknown.
+    """
+    frts = list(frts)
+    plan = plan_batch_obs_files(
+        [(frt, lead) for frt in frts for lead in range(n_leads)], catalog, time_tolerance_hours
+    )
+    if not plan.files and not any(
+        _entry_field(entry, "date_start") is not None for entry in _iter_catalog(catalog)
+    ):
+        return None
+    covered = {key[0] for key, paths in plan.task_files.items() if paths}
+    return [frt for frt in frts if pd.Timestamp(frt) in covered]
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Pre-run memory, disk and cost planning (``python -m dc1.evaluate --plan``).
+
+The YAML carries hand-computed budgets ("6×3GB = 18GB worker budget",
+"npy~5.7 GB fits in 21 GB free RAM") and an over-sized setting is otherwise
+only discovered by an OOM hours into a run.  :func:`build_plan` derives, for
+every reference evaluated, the task and batch counts, bytes to download, peak
+disk use, peak worker and driver memory and the ``map_data`` output size from
+the config (presets, ``per_bins_resolution``, ``skip_frt_snapshots``...) and,
+when available, the local catalog of the source.  :func:`check_plan` compares
+them with the RAM and disk of the machine and :func:`auto_adjust` lowers the
+offending settings.
+
+Per-file sizes come from catalog ``size`` fields when present, otherwise from
+:data:`DEFAULT_PROFILES`, which a source can override with a ``plan_profile``
+mapping in the YAML.  Estimates are deliberately conservative.
+"""
+
+import copy
+import json
+import math
+import shutil
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Optional
+
+import psutil
+from tabulate import tabulate
+
+from dc1.evaluation.obs_cache import covered_frts, plan_batch_obs_files, task_window
+from dc1.evaluation.sharding import expected_frts
+
+# Decimal units, as in Dask memory limits ("3GB" = 3e9 bytes).
+MB = 1000 ** 2
+GB = 1000 ** 3
+
+# files_per_day: files covering one day of data; file_mb: download size;
+# mem_mb: in-memory size of one file once preprocessed (driver / worker).
+DEFAULT_PROFILES: dict[str, dict[str, float]] = {
+    "swot": {"files_per_day": 20, "file_mb": 12, "mem_mb": 13},
+    "saral": {"files_per_day": 14, "file_mb": 2, "mem_mb": 4},
+    "jason3": {"files_per_day": 13, "file_mb": 2, "mem_mb": 4},
+    "argo_profiles": {"files_per_day": 1, "file_mb": 30, "mem_mb": 100},
+    "glorys": {"files_per_day": 1, "file_mb": 500, "mem_mb": 1500},
+}
+_FALLBACK_PROFILE = {"files_per_day": 1, "file_mb": 100, "mem_mb": 300}
+
+# Python-dict footprint of one per-bins entry (calibrated on "5 vars × 20
+# depths × 60 480 bins ≈ 5 GB" for glorys at 1°).
+PER_BIN_ENTRY_BYTES = 830
+# Interpreter, Dask scheduler and client overhead of the driver process.
+DRIVER_BASELINE_BYTES = int(1.5 * GB)
+# JSON bytes per grid cell in a map_data file.
+MAP_BYTES_PER_CELL = 14
+
+_UNITS = {"B": 1, "KB": 1000, "MB": MB, "GB": GB, "TB": 1000 ** 4,
+          "KIB": 1024, "MIB": 1024 ** 2, "GIB": 1024 ** 3, "TIB": 1024 ** 4}
+
+
+def parse_size(value: Any) -> int:
+    """Parse a Dask-style memory size (``"3GB"``, ``"512MiB"``, bytes) to bytes."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper().replace(" ", "")
+    number = text.rstrip("KMGTIB")
+    unit = text[len(number):] or "B"
+    if unit not in _UNITS:
+        raise ValueError(f"Unrecognized memory size: {value!r}")
+    return int(float(number) * _UNITS[unit])
+
+
+def format_bytes(n_bytes: float) -> str:
+    """Human-readable size."""
+    for unit, factor in (("TB", 1000 ** 4), ("GB", GB), ("MB", MB), ("KB", 1000)):
+        if abs(n_bytes) >= factor:
+            return f"{n_bytes / factor:.1f} {unit}"
+    return f"{n_bytes:.0f} B"
+
+
+def _axis_size(spec: Any) -> int:
+    if isinstance(spec, dict):
+        return int(round((float(spec["stop"]) - float(spec["start"])) / float(spec["step"])))
+    return len(spec) if spec is not None else 1
+
+
+def _target_dims(config: dict[str, Any]) -> dict[str, Any]:
+    return config.get("target_dimensions_surface" if config.get("surface_only", True)
+                      else "target_dimensions") or {}
+
+
+def _sources_by_name(config: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    return {
+        s["dataset"]: s for s in config.get("sources") or []
+        if isinstance(s, dict) and s.get("dataset")
+    }
+
+
+def load_catalog(catalog_dir: Optional[Path], source: str) -> Optional[list[dict[str, Any]]]:
+    """Read ``<catalog_dir>/<source>.json`` / ``.geojson`` (list or GeoJSON features)."""
+    if catalog_dir is None:
+        return None
+    for suffix in (".json", ".geojson"):
+        path = Path(catalog_dir) / f"{source}{suffix}"
+        if path.is_file():
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            if isinstance(payload, dict) and "features" in payload:
+                return [
+                    {**(f.get("properties") or {}), "geometry": f.get("geometry")}
+                    for f in payload["features"]
+                ]
+            return payload if isinstance(payload, list) else None
+    return None
+
+
+def _window_days(tasks: list[tuple[datetime, int]], tolerance_h: float) -> list[set]:
+    """Calendar days touched by the match window of each task."""
+    days = []
+    for frt, lead in tasks:
+        start, end = task_window(frt, lead, tolerance_h)
+        # An end exactly at midnight does not touch the next day.
+        first = start.date()
+        last = max(first, (end - timedelta(microseconds=1)).date())
+        days.append({first + timedelta(days=i) for i in range((last - first).days + 1)})
+    return days
+
+
+@dataclass
+class SourcePlan:
+    """Estimated cost of evaluating one reference dataset."""
+
+    source: str
+    observation: bool
+    n_tasks: int
+    n_batches: int
+    batch_size: int
+    n_workers: int
+    threads_per_worker: int
+    worker_limit_bytes: int
+    worker_restart_fraction: float
+    files_per_batch: int
+    download_bytes: int
+    peak_disk_bytes: int
+    task_bytes: int
+    driver_peak_bytes: int
+    map_files: int
+    map_bytes: int
+    from_catalog: bool = False
+
+    @property
+    def worker_peak_bytes(self) -> int:
+        """Working set of one worker running its concurrent tasks."""
+        return self.task_bytes * self.threads_per_worker
+
+    @property
+    def ram_bytes(self) -> int:
+        """RAM reserved by the workers plus the driver peak."""
+        return self.n_workers * self.worker_limit_bytes + self.driver_peak_bytes
+
+
+@dataclass
+class RunPlan:
+    """Cost estimates of a whole run and the resources of the machine."""
+
+    sources: list[SourcePlan]
+    n_frts: int
+    prediction_bytes: int
+    prediction_day_bytes: int
+    available_ram_bytes: int
+    free_disk_bytes: int
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def download_bytes(self) -> int:
+        """Predictions plus every source's downloads."""
+        return self.prediction_bytes + sum(s.download_bytes for s in self.sources)
+
+    @property
+    def map_bytes(self) -> int:
+        """map_data size of every source."""
+        return sum(s.map_bytes for s in self.sources)
+
+
+def task_batch_size(source_cfg: dict[str, Any]) -> int:
+    """Tasks per batch of a source.
+
+    Observation sources are batched by ``obs_batch_size``, gridded ones by
+    ``gridded_batch_size`` (``obs_batch_size`` when unset).
+    """
+    if source_cfg.get("observation_dataset", True):
+        size = source_cfg.get("obs_batch_size")
+    else:
+        size = source_cfg.get("gridded_batch_size") or source_cfg.get("obs_batch_size")
+    return int(size or 1)
+
+
+def plan_source(
+    config: dict[str, Any],
+    source_cfg: dict[str, Any],
+    models: list[str],
+    frts: list[datetime],
+    pred_day_bytes: int,
+    catalog: Optional[list[dict[str, Any]]] = None,
+) -> SourcePlan:
+    """Estimate the cost of evaluating *models* against one reference."""
+    name = source_cfg["dataset"]
+    observation = bool(source_cfg.get("observation_dataset", True))
+    profile = {
+        **DEFAULT_PROFILES.get(name, _FALLBACK_PROFILE),
+        **(source_cfg.get("plan_profile") or {}),
+    }
+    n_leads = int(config.get("n_days_forecast") or 10)
+    tolerance_h = float(source_cfg.get("time_tolerance", 12)) if observation else 0.0
+    batch_size = task_batch_size(source_cfg)
+    cleanup = bool(config.get("cleanup_between_batches", False))
+
+    tasks = [(frt, lead) for _ in models for frt in frts for lead in range(n_leads)]
+    batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+
+    sizes: dict[str, float] = {}
+    if catalog:
+        for entry in catalog:
+            if entry.get("path") is not None and entry.get("size"):
+                sizes[str(entry["path"])] = float(entry["size"])
+    file_bytes = profile["file_mb"] * MB
+    mem_ratio = profile["mem_mb"] / profile["file_mb"]
+
+    # A file needed by several tasks of a batch is downloaded once, but each
+    # task loads and preprocesses its own copy of it.
+    batch_files: list[int] = []
+    batch_bytes: list[float] = []
+    batch_load_bytes: list[float] = []
+    max_task_files = 0
+    all_files: set = set()
+    for batch in batches:
+        if catalog:
+            plan = plan_batch_obs_files(batch, catalog, tolerance_h)
+            max_task_files = max([max_task_files] + [len(ps) for ps in plan.task_files.values()])
+            all_files.update(plan.files)
+            batch_files.append(len(plan.files))
+            batch_bytes.append(sum(sizes.get(p, file_bytes) for p in plan.files))
+            batch_load_bytes.append(
+                sum(sizes.get(p, file_bytes) for ps in plan.task_files.values() for p in ps)
+            )
+        else:
+            days = _window_days(batch, tolerance_h)
+            union = set().union(*days) if days else set()
+            n_files = int(math.ceil(len(union) * profile["files_per_day"]))
+            max_task_files = max(
+                [max_task_files] + [int(math.ceil(len(d) * profile["files_per_day"])) for d in days]
+            )
+            all_files.update(union)
+            batch_files.append(n_files)
+            batch_bytes.append(n_files * file_bytes)
+            batch_load_bytes.append(
+                sum(math.ceil(len(d) * profile["files_per_day"]) for d in days) * file_bytes
+            )
+
+    if cleanup:
+        # Files are deleted after each batch: shared files are fetched again.
+        download = sum(batch_bytes)
+        peak_disk = max(batch_bytes, default=0)
+    elif catalog:
+        download = peak_disk = sum(sizes.get(p, file_bytes) for p in all_files)
+    else:
+        download = peak_disk = len(all_files) * profile["files_per_day"] * file_bytes
+
+    task_mem = max_task_files * profile["mem_mb"] * MB + 2 * pred_day_bytes
+    n_workers = int(source_cfg.get("n_parallel_workers") or 1)
+    threads = int(source_cfg.get("nthreads_per_worker") or 1)
+
+    # Per-bins results of the tasks running concurrently are held by the driver
+    # and copied once more when serialized.
+    res = float(config.get("per_bins_resolution") or 2)
+    n_cells = max(1, int((360 / res) * (180 / res)))
+    n_vars = len(source_cfg.get("eval_variables") or []) or 1
+    per_bins = n_cells * n_vars * PER_BIN_ENTRY_BYTES * 2 * min(n_workers * threads, batch_size)
+    # The driver loads and preprocesses the observation files of every task of
+    # a batch; gridded references are only opened by the workers.
+    obs_in_driver = max(batch_load_bytes, default=0) * mem_ratio if observation else 0
+    driver_peak = int(DRIVER_BASELINE_BYTES + obs_in_driver + per_bins)
+
+    n_metrics = len(source_cfg.get("metrics") or []) or 1
+    map_files = len(models) * n_vars * n_metrics * (n_leads + 1)
+    if not config.get("skip_frt_snapshots", True):
+        map_files += len(models) * n_vars * n_metrics * n_leads * len(frts)
+    return SourcePlan(
+        source=name,
+        observation=observation,
+        n_tasks=len(tasks),
+        n_batches=len(batches),
+        batch_size=batch_size,
+        n_workers=n_workers,
+        threads_per_worker=threads,
+        worker_limit_bytes=parse_size(source_cfg.get("memory_limit_per_worker") or "4GB"),
+        worker_restart_fraction=float(config.get("max_worker_memory_fraction") or 1.0),
+        files_per_batch=max(batch_files, default=0),
+        download_bytes=int(download),
+        peak_disk_bytes=int(peak_disk),
+        task_bytes=int(task_mem),
+        driver_peak_bytes=driver_peak,
+        map_files=map_files,
+        map_bytes=map_files * n_cells * MAP_BYTES_PER_CELL,
+        from_catalog=bool(catalog),
+    )
+
+
+def build_plan(
+    config: dict[str, Any],
+    dataset_references: dict[str, list[str]],
+    data_directory: Path,
+    catalog_dir: Optional[Path] = None,
+    available_ram_bytes: Optional[int] = None,
+    free_disk_bytes: Optional[int] = None,
+) -> RunPlan:
+    """Estimate the cost of every reference of a run.
+
+    Args:
+        config (dict): Loaded DC1 YAML config.
+        dataset_references (dict): ``model -> [reference, ...]`` being evaluated.
+        data_directory (Path): Output directory (disk space is checked there).
+        catalog_dir (Path, optional): Directory holding ``<source>.json`` catalogs.
+        available_ram_bytes (int, optional): Defaults to the available system RAM.
+        free_disk_bytes (int, optional): Defaults to the free space of *data_directory*.
+
+    Returns:
+        RunPlan: Per-source estimates and machine resources.
+    """
+    sources = _sources_by_name(config)
+    frts = [datetime.combine(frt, time()) for frt in expected_frts(config)]
+    n_leads = int(config.get("n_days_forecast") or 10)
+
+    dims = _target_dims(config)
+    n_cells = (
+        _axis_size(dims.get("lat")) * _axis_size(dims.get("lon")) * _axis_size(dims.get("depth"))
+    )
+    prediction_bytes = 0
+    pred_day_bytes = 0
+    for model in dataset_references:
+        n_vars = len((sources.get(model) or {}).get("eval_variables") or []) or 5
+        day = n_cells * n_vars * 4  # float32
+        pred_day_bytes = max(pred_day_bytes, day)
+        prediction_bytes += day * n_leads * len(frts)
+
+    references: dict[str, list[str]] = {}
+    for model, refs in dataset_references.items():
+        for ref in refs:
+            references.setdefault(ref, []).append(model)
+
+    warnings = []
+    source_plans = []
+    for ref, models in sorted(references.items()):
+        if ref not in sources:
+            warnings.append(f"{ref}: no source entry in the config; not planned")
+            continue
+        source_plans.append(
+            plan_source(
+                config, sources[ref], models, frts, pred_day_bytes,
+                catalog=load_catalog(catalog_dir, ref),
+            )
+        )
+
+    if available_ram_bytes is None:
+        available_ram_bytes = int(psutil.virtual_memory().available)
+    if free_disk_bytes is None:
+        probe = Path(data_directory)
+        while not probe.exists() and probe != probe.parent:
+            probe = probe.parent
+        free_disk_bytes = int(shutil.disk_usage(probe).free)
+    return RunPlan(
+        sources=source_plans,
+        n_frts=len(frts),
+        prediction_bytes=int(prediction_bytes),
+        prediction_day_bytes=int(pred_day_bytes),
+        available_ram_bytes=available_ram_bytes,
+        free_disk_bytes=free_disk_bytes,
+        warnings=warnings,
+    )
+
+
+def catalog_coverage(
+    config: dict[str, Any], references: list[str], catalog_dir: Optional[Path]
+) -> dict[str, list[date]]:
+    """FRTs of the run that each reference's local catalog holds data for.
+
+    References without a catalog (or whose catalog has no time coverage)
+    are left out: their coverage is unknown.
+    """
+    sources = _sources_by_name(config)
+    frts = expected_frts(config)
+    n_leads = int(config.get("n_days_forecast") or 10)
+    coverage = {}
+    for ref in references:
+        catalog = load_catalog(catalog_dir, ref)
+        if not catalog:
+            continue
+        source_cfg = sources.get(ref) or {}
+        observation = bool(source_cfg.get("observation_dataset", True))
+        tolerance_h = float(source_cfg.get("time_tolerance", 12)) if observation else 0.0
+        covered = covered_frts(frts, n_leads, catalog, tolerance_h)
+        if covered is not None:
+            coverage[ref] = covered
+    return coverage
+
+
+def check_plan(plan: RunPlan) -> list[str]:
+    """Settings that exceed the machine's RAM or disk (empty when all fit)."""
+    issues = []
+    for s in plan.sources:
+        budget = s.worker_limit_bytes * s.worker_restart_fraction
+        if s.worker_peak_bytes > budget:
+            issues.append(
+                f"{s.source}: {s.threads_per_worker} concurrent task(s) per worker need "
+                f"~{format_bytes(s.worker_peak_bytes)}, above {s.worker_restart_fraction:.0%} "
+                f"of memory_limit_per_worker ({format_bytes(budget)})"
+            )
+        if s.ram_bytes > plan.available_ram_bytes:
+            issues.append(
+                f"{s.source}: {s.n_workers} workers × {format_bytes(s.worker_limit_bytes)} + "
+                f"driver ~{format_bytes(s.driver_peak_bytes)} = {format_bytes(s.ram_bytes)} "
+                f"exceeds available RAM ({format_bytes(plan.available_ram_bytes)})"
+            )
+        if s.peak_disk_bytes > plan.free_disk_bytes:
+            issues.append(
+                f"{s.source}: ~{format_bytes(s.peak_disk_bytes)} of downloaded files exceed "
+                f"free disk ({format_bytes(plan.free_disk_bytes)})"
+            )
+    if plan.map_bytes > plan.free_disk_bytes:
+        issues.append(
+            f"map_data: ~{format_bytes(plan.map_bytes)} exceeds free disk "
+            f"({format_bytes(plan.free_disk_bytes)}); keep skip_frt_snapshots: true"
+        )
+    return issues
+
+
+def auto_adjust(
+    config: dict[str, Any],
+    dataset_references: dict[str, list[str]],
+    plan: RunPlan,
+    catalog_dir: Optional[Path] = None,
+) -> tuple[dict[str, Any], list[str]]:
+    """Lower per-source settings until every source fits the machine.
+
+    Reduces ``nthreads_per_worker`` while one worker's tasks exceed its
+    limit, ``obs_batch_size`` / ``gridded_batch_size`` while downloads exceed
+    the free disk, then, while workers plus driver exceed the RAM, whichever
+    of the batch size and ``n_parallel_workers`` frees more memory.  Sources
+    that do not fit even at the minimum are left for :func:`check_plan`.
+
+    Returns:
+        tuple: Adjusted copy of *config* and a description of each change.
+    """
+    adjusted = copy.deepcopy(config)
+    sources = _sources_by_name(adjusted)
+    plans = {s.source: s for s in plan.sources}
+    frts = [datetime.combine(frt, time()) for frt in expected_frts(adjusted)]
+    models_by_ref: dict[str, list[str]] = {}
+    for model, refs in dataset_references.items():
+        for ref in refs:
+            models_by_ref.setdefault(ref, []).append(model)
+
+    changes = []
+    for name, sp in plans.items():
+        cfg = sources[name]
+        batch_key = (
+            "gridded_batch_size"
+            if not sp.observation and "gridded_batch_size" in cfg
+            else "obs_batch_size"
+        )
+        original = {k: cfg.get(k) for k in ("nthreads_per_worker", batch_key, "n_parallel_workers")}
+
+        def replan(cfg: dict[str, Any] = cfg, name: str = name) -> SourcePlan:
+            return plan_source(
+                adjusted, cfg, models_by_ref[name], frts, plan.prediction_day_bytes,
+                catalog=load_catalog(catalog_dir, name),
+            )
+
+        budget = sp.worker_limit_bytes * sp.worker_restart_fraction
+        while sp.worker_peak_bytes > budget and sp.threads_per_worker > 1:
+            cfg["nthreads_per_worker"] = sp.threads_per_worker - 1
+            sp = replan()
+        while sp.peak_disk_bytes > plan.free_disk_bytes and sp.batch_size > 1:
+            cfg[batch_key] = max(1, sp.batch_size // 2)
+            sp = replan()
+        while sp.ram_bytes > plan.available_ram_bytes:
+            # Take the step that frees more memory: halving the batch (about
+            # half of the driver's batch working set) or dropping one worker.
+            batch_gain = (
+                (sp.driver_peak_bytes - DRIVER_BASELINE_BYTES) / 2 if sp.batch_size > 1 else 0
+            )
+            worker_gain = sp.worker_limit_bytes if sp.n_workers > 1 else 0
+            if batch_gain <= 0 and worker_gain <= 0:
+                break
+            if batch_gain >= worker_gain:
+                cfg[batch_key] = max(1, sp.batch_size // 2)
+            else:
+                cfg["n_parallel_workers"] = sp.n_workers - 1
+            sp = replan()
+        for key, before in original.items():
+            if cfg.get(key) != before:
+                changes.append(f"{name}: {key} {before} → {cfg.get(key)}")
+    return adjusted, changes
+
+
+def format_plan(plan: RunPlan) -> str:
+    """Report table of a plan."""
+    rows = [
+        [
+            s.source, s.n_tasks, f"{s.n_batches} × {s.batch_size}", s.files_per_batch,
+            format_bytes(s.download_bytes), format_bytes(s.peak_disk_bytes),
+            f"{format_bytes(s.worker_peak_bytes)} / {format_bytes(s.worker_limit_bytes)}",
+            f"{s.n_workers}×{s.threads_per_worker}",
+            format_bytes(s.driver_peak_bytes), format_bytes(s.ram_bytes),
+            f"{s.map_files} ({format_bytes(s.map_bytes)})",
+            "catalog" if s.from_catalog else "profile",
+        ]
+        for s in plan.sources
+    ]
+    table = tabulate(
+        rows,
+        headers=["source", "tasks", "batches", "files/batch", "download", "peak disk",
+                 "worker peak/limit", "workers", "driver peak", "RAM", "map files", "sizes"],
+    )
+    return (
+        f"{table}\n\n"
+        f"FRTs: {plan.n_frts}   predictions: {format_bytes(plan.prediction_bytes)}   "
+        f"total download: {format_bytes(plan.download_bytes)}   "
+        f"map_data: {format_bytes(plan.map_bytes)}\n"
+        f"Available RAM: {format_bytes(plan.available_ram_bytes)}   "
+        f"free disk: {format_bytes(plan.free_disk_bytes)}"
+    )
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Progressive evaluation: early metric estimates from a stratified FRT sample.
+
+A full-year run covers ~51 forecast reference times (FRTs) per reference and
+takes hours, while model development usually only needs an approximate
+ranking.  Progressive mode evaluates FRTs in rounds of evenly spaced FRTs — every
+fourth weekly FRT, i.e. about one per month, from a seeded random offset —
+and after each round estimates every metric as the mean over the FRTs
+evaluated so far, with a bootstrap confidence interval (FRTs are resampled,
+so lead times and grid points of one FRT stay together).
+
+Because the FRTs of a round are evenly spaced, each reference evaluates a
+round in one work unit of :mod:`dc1.evaluation.sharding` (a single run whose
+FRT interval is widened to the round's spacing), so stopping early loses
+nothing: resuming runs only the missing units and the final ``merge`` is the
+exact full evaluation.
+"""
+
+import json
+import math
+import os
+import random
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+from tabulate import tabulate
+
+from dc1.evaluation.sharding import WorkUnit, expected_frts, strided_units
+
+PROGRESSIVE_DIRNAME = "progressive"
+ESTIMATES_FILE = "estimates.json"
+
+# Metrics estimated by default (RMSD for gridded references, RMSE/MAE for
+# observations).
+DEFAULT_METRICS = ("rmsd", "rmse", "mae")
+
+
+def stratified_rounds(
+    frts: list[date], seed: int = 0, n_rounds: int = 4
+) -> list[list[date]]:
+    """Split FRTs into *n_rounds* rounds of evenly spaced FRTs.
+
+    Round ``k`` takes every *n_rounds*-th FRT from an offset drawn with a
+    seeded RNG, so each round spans the whole period (a systematic sample:
+    with weekly FRTs and 4 rounds, one FRT every four weeks).  The order only
+    depends on *frts*, *seed* and *n_rounds*, so a resumed run replays the
+    same rounds.
+
+    Args:
+        frts (list): FRTs (see :func:`dc1.evaluation.sharding.expected_frts`).
+        seed (int): Shuffle seed of the round offsets.
+        n_rounds (int): Number of rounds (spacing of a round, in FRTs).
+
+    Returns:
+        list[list]: Rounds of FRTs, each sorted by date.
+    """
+    frts = sorted(frts)
+    n_rounds = max(1, min(int(n_rounds), len(frts)))
+    offsets = list(range(n_rounds))
+    random.Random(seed).shuffle(offsets)
+    return [frts[offset::n_rounds] for offset in offsets]
+
+
+def progressive_units(
+    config: dict[str, Any], dataset_references: dict[str, list[str]], settings: dict[str, Any]
+) -> list[list[WorkUnit]]:
+    """Work units of every round: one per (model, reference), in round order."""
+    return [
+        strided_units(config, dataset_references, frts)
+        for frts in stratified_rounds(expected_frts(config), settings["seed"], settings["rounds"])
+    ]
+
+
+def load_entries(results_dirs: Iterable[Path]) -> dict[str, list[dict[str, Any]]]:
+    """Collect result entries per model from ``results_<model>.json`` files."""
+    entries: dict[str, list[dict[str, Any]]] = {}
+    for results_dir in results_dirs:
+        for path in sorted(Path(results_dir).glob("results_*.json")):
+            data = json.loads(path.read_text(encoding="utf-8"))
+            for model, model_entries in (data.get("results") or {}).items():
+                entries.setdefault(model, []).extend(model_entries)
+    return entries
+
+
+def frt_samples(
+    entries: dict[str, list[dict[str, Any]]], metrics: Iterable[str] = DEFAULT_METRICS
+) -> dict[tuple[str, str, str, str], dict[str, float]]:
+    """Per-FRT value (mean over lead times) of each model/ref/variable/metric."""
+    metrics = {m.lower() for m in metrics}
+    sums: dict[tuple[str, str, str, str], dict[str, list[float]]] = {}
+    for model, model_entries in entries.items():
+        for entry in model_entries:
+            frt = str(entry.get("forecast_reference_time"))
+            for item in entry.get("result") or []:
+                metric = str(item.get("Metric", "")).lower()
+                value = item.get("Value")
+                if metric not in metrics or value is None or not math.isfinite(float(value)):
+                    continue
+                key = (model, str(entry.get("ref_alias")), str(item.get("Variable")), metric)
+                acc = sums.setdefault(key, {}).setdefault(frt, [0.0, 0])
+                acc[0] += float(value)
+                acc[1] += 1
+    return {
+        key: {frt: total / count for frt, (total, count) in per_frt.items()}
+        for key, per_frt in sums.items()
+    }
+
+
+def bootstrap_ci(
+    values: Iterable[float], n_boot: int = 1000, confidence: float = 0.95, seed: int = 0
+) -> tuple[float, float, float]:
+    """Mean of *values* with a percentile bootstrap confidence interval.
+
+    Returns:
+        tuple: ``(mean, low, high)``; the interval collapses to the mean for
+        fewer than two values.
+    """
+    arr = np.asarray(list(values), dtype="float64")
+    mean = float(arr.mean())
+    if arr.size < 2:
+        return mean, mean, mean
+    rng = np.random.default_rng(seed)
+    means = arr[rng.integers(0, arr.size, size=(n_boot, arr.size))].mean(axis=1)
+    tail = (1.0 - confidence) / 2.0 * 100.0
+    low, high = np.percentile(means, [tail, 100.0 - tail])
+    return mean, float(low), float(high)
+
+
+@dataclass
+class Estimate:
+    """Running estimate of one metric."""
+
+    model: str
+    ref_alias: str
+    variable: str
+    metric: str
+    mean: float
+    ci_low: float
+    ci_high: float
+    n_frts: int
+
+    @property
+    def relative_half_width(self) -> float:
+        """Half-width of the interval relative to the estimate."""
+        half = (self.ci_high - self.ci_low) / 2.0
+        return half / abs(self.mean) if self.mean else (0.0 if half == 0 else math.inf)
+
+
+def estimate_metrics(
+    entries: dict[str, list[dict[str, Any]]],
+    metrics: Iterable[str] = DEFAULT_METRICS,
+    n_boot: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> list[Estimate]:
+    """Bootstrap estimates of every tracked metric from the entries so far."""
+    estimates = []
+    for key, per_frt in sorted(frt_samples(entries, metrics).items(), key=lambda kv: str(kv[0])):
+        mean, low, high = bootstrap_ci(per_frt.values(), n_boot, confidence, seed)
+        estimates.append(Estimate(*key, mean=mean, ci_low=low, ci_high=high, n_frts=len(per_frt)))
+    return estimates
+
+
+def converged(estimates: list[Estimate], rel_ci: float, min_frts: int = 2) -> bool:
+    """True when every interval half-width is within *rel_ci* of its estimate."""
+    return bool(estimates) and all(
+        e.n_frts >= min_frts and e.relative_half_width <= rel_ci for e in estimates
+    )
+
+
+def format_estimates(estimates: list[Estimate], confidence: float = 0.95) -> str:
+    """Table of the running estimates."""
+    rows = [
+        [
+            e.model, e.ref_alias, e.variable, e.metric, e.n_frts,
+            f"{e.mean:.4g}", f"[{e.ci_low:.4g}, {e.ci_high:.4g}]",
+            f"±{100 * e.relative_half_width:.1f}%",
+        ]
+        for e in estimates
+    ]
+    return tabulate(
+        rows,
+        headers=["model", "ref", "variable", "metric", "FRTs", "estimate",
+                 f"{confidence:.0%} CI", "rel."],
+    )
+
+
+def write_estimates(
+    directory: Path,
+    round_index: int,
+    frts: list[str],
+    estimates: list[Estimate],
+    done: bool,
+) -> Path:
+    """Append a round to ``estimates.json`` (the full history of the run)."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / ESTIMATES_FILE
+    history: dict[str, Any] = (
+        json.loads(path.read_text(encoding="utf-8")) if path.is_file() else {"rounds": []}
+    )
+    history["rounds"] = [r for r in history["rounds"] if r["round"] != round_index]
+    history["rounds"].append(
+        {
+            "round": round_index,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "frts": frts,
+            "estimates": [asdict(e) for e in estimates],
+        }
+    )
+    history["converged"] = done
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(history, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def progressive_settings(config: dict[str, Any], rel_ci: Optional[float] = None) -> dict[str, Any]:
+    """Progressive-mode settings from the YAML config (``progressive_*`` keys).
+
+    ``progressive_rounds`` defaults to the number of FRTs in four weeks, so a
+    round holds about one FRT per month.
+    """
+    interval = int(config.get("n_days_interval") or 7)
+    return {
+        "rounds": int(config.get("progressive_rounds") or max(1, round(28 / interval))),
+        "rel_ci": float(rel_ci if rel_ci is not None else config.get("progressive_rel_ci", 0.05)),
+        "min_rounds": int(config.get("progressive_min_rounds", 2)),
+        "n_boot": int(config.get("progressive_bootstrap", 1000)),
+        "confidence": float(config.get("progressive_confidence", 0.95)),
+        "seed": int(config.get("progressive_seed", 0)),
+        "metrics": tuple(config.get("progressive_metrics") or DEFAULT_METRICS),
+    }
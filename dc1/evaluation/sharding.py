@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Deterministic partitioning of a DC1 evaluation into independent work units.
+
+A full-year run is split into *work units*, one per (reference dataset,
+run of consecutive FRTs).  Each unit is a regular evaluation run restricted via
+the existing ``dataset_references`` and ``start_time``/``end_time`` config
+keys, with its own result store under ``<data_directory>/shards/<unit_id>/``.
+Units are assigned to ``N`` shards deterministically, so independent hosts or
+processes started with ``--shard i/N`` (``0 <= i < N``) cover the whole run
+exactly once.  :func:`merge_shard_results` then combines the unit stores into
+the usual ``results/results_<model>.json`` (and per-bins file), and
+:func:`missing_frts` checks the merged FRTs against :func:`expected_frts`.
+"""
+
+import copy
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping, Optional, Union
+
+from dc1.evaluation.journal import (
+    STATUS_FAILED,
+    STATUS_OK,
+    TaskJournal,
+    sha256_file,
+    task_key,
+)
+
+SHARDS_DIRNAME = "shards"
+LAYOUT_FILE = "layout.json"
+# Layout recorded by progressive runs, whose units are the rounds' FRTs.
+PROGRESSIVE_LAYOUT = "progressive"
+
+# Forecast reference times fall on this weekday (Monday is 0).
+FRT_WEEKDAY = 2
+
+# Relative cost of one FRT per reference, used to balance shards.
+# Swath and gridded references dominate wall time; override per source with
+# ``shard_weight`` in the YAML.
+DEFAULT_SOURCE_WEIGHTS = {
+    "swot": 4.0,
+    "glorys": 3.0,
+    "argo_profiles": 2.0,
+}
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """One reference dataset over a run of FRTs.
+
+    The unit evaluates every ``step``-th FRT of the full run from *start* to
+    *end*: consecutive FRTs by default, evenly spaced ones for progressive
+    rounds.
+    """
+
+    model: str
+    reference: str
+    start: date  # first FRT
+    end: date  # last FRT (inclusive)
+    weight: float = 1.0
+    step: int = 1
+
+    @property
+    def unit_id(self) -> str:
+        """Directory-safe identifier, stable across hosts."""
+        unit_id = f"{self.model}_{self.reference}_{self.start:%Y%m%d}_{self.end:%Y%m%d}"
+        return unit_id if self.step == 1 else f"{unit_id}_every{self.step}"
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse ``"i/N"`` into ``(i, N)`` with ``0 <= i < N``."""
+    try:
+        index_str, count_str = spec.split("/", 1)
+        index, count = int(index_str), int(count_str)
+    except ValueError as exc:
+        raise ValueError(f"Invalid shard spec {spec!r}: expected 'i/N'") from exc
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec {spec!r}: need 0 <= i < N")
+    return index, count
+
+
+def _to_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)).date()
+
+
+def expected_frts(config: dict[str, Any]) -> list[date]:
+    """Forecast reference times evaluated for the ``start_time``/``end_time`` of *config*.
+
+    FRTs start on the first Wednesday on or after ``start_time`` and follow
+    every ``n_days_interval`` days; an FRT is kept only if its whole forecast
+    (``n_days_forecast`` days) ends by ``end_time``.
+    """
+    start = _to_date(config["start_time"])
+    end = _to_date(config["end_time"])
+    step = timedelta(days=int(config.get("n_days_interval") or 7))
+    horizon = timedelta(days=int(config.get("n_days_forecast") or 10))
+    frt = start + timedelta(days=(FRT_WEEKDAY - start.weekday()) % 7)
+    frts = []
+    while frt + horizon <= end:
+        frts.append(frt)
+        frt += step
+    return frts
+
+
+def source_weights(config: dict[str, Any]) -> dict[str, float]:
+    """Per-reference cost weights (``shard_weight`` in sources overrides defaults)."""
+    weights = dict(DEFAULT_SOURCE_WEIGHTS)
+    for source in config.get("sources") or []:
+        if isinstance(source, dict) and source.get("shard_weight") is not None:
+            weights[source["dataset"]] = float(source["shard_weight"])
+    return weights
+
+
+def build_work_units(
+    config: dict[str, Any],
+    dataset_references: dict[str, list[str]],
+    frts_per_unit: int = 4,
+    frts: Optional[list[date]] = None,
+) -> list[WorkUnit]:
+    """Enumerate the work units of a run in a canonical order.
+
+    Parameters
+    ----------
+    config : dict
+        Loaded DC1 YAML config.
+    dataset_references : dict
+        ``model -> [reference, ...]`` mapping being evaluated.
+    frts_per_unit : int
+        Number of consecutive FRTs grouped into one unit.
+    frts : list of date, optional
+        FRTs to cover (defaults to :func:`expected_frts` of *config*).
+
+    Returns
+    -------
+    list of WorkUnit
+        Units sorted by model, reference and start date.
+    """
+    frts = expected_frts(config) if frts is None else sorted(frts)
+    weights = source_weights(config)
+    frts_per_unit = max(1, int(frts_per_unit))
+    units = []
+    for model in sorted(dataset_references):
+        for reference in sorted(dataset_references[model]):
+            for k in range(0, len(frts), frts_per_unit):
+                block = frts[k:k + frts_per_unit]
+                units.append(
+                    WorkUnit(
+                        model=model,
+                        reference=reference,
+                        start=block[0],
+                        end=block[-1],
+                        weight=weights.get(reference, 1.0) * len(block),
+                    )
+                )
+    return units
+
+
+def task_keys(
+    config: dict[str, Any], dataset_references: dict[str, list[str]]
+) -> dict[tuple[str, str, date], list[str]]:
+    """Journal keys of the tasks of a run, grouped per (model, reference, FRT).
+
+    Each FRT is evaluated at leads ``0 .. n_days_forecast - 1``.
+    """
+    leads = range(int(config.get("n_days_forecast") or 10))
+    return {
+        (model, reference, frt): [task_key(model, reference, frt, lead) for lead in leads]
+        for model in sorted(dataset_references)
+        for reference in sorted(dataset_references[model])
+        for frt in expected_frts(config)
+    }
+
+
+def resume_units(
+    config: dict[str, Any], pending: Iterable[tuple[str, str, date]]
+) -> list[WorkUnit]:
+    """Work units covering the (model, reference, FRT) triples still to evaluate.
+
+    Consecutive pending FRTs of a reference share one unit, so finished FRTs
+    between them are not evaluated again.
+    """
+    frts = expected_frts(config)
+    position = {frt: k for k, frt in enumerate(frts)}
+    weights = source_weights(config)
+    runs: dict[tuple[str, str], list[list[date]]] = {}
+    for model, reference, frt in sorted(pending):
+        blocks = runs.setdefault((model, reference), [])
+        if blocks and position[frt] == position[blocks[-1][-1]] + 1:
+            blocks[-1].append(frt)
+        else:
+            blocks.append([frt])
+    return [
+        WorkUnit(
+            model=model,
+            reference=reference,
+            start=block[0],
+            end=block[-1],
+            weight=weights.get(reference, 1.0) * len(block),
+        )
+        for (model, reference), blocks in sorted(runs.items())
+        for block in blocks
+    ]
+
+
+def strided_units(
+    config: dict[str, Any],
+    dataset_references: dict[str, list[str]],
+    frts: list[date],
+) -> list[WorkUnit]:
+    """One work unit per (model, reference) covering evenly spaced *frts*.
+
+    Raises
+    ------
+    ValueError
+        If *frts* are not evenly spaced by a multiple of ``n_days_interval``.
+    """
+    frts = sorted(frts)
+    interval = int(config.get("n_days_interval") or 7)
+    gaps = {(b - a).days for a, b in zip(frts, frts[1:], strict=False)}
+    if len(gaps) > 1 or any(gap % interval for gap in gaps):
+        raise ValueError(f"FRTs are not evenly spaced by a multiple of n_days_interval: {frts}")
+    step = gaps.pop() // interval if gaps else 1
+    weights = source_weights(config)
+    return [
+        WorkUnit(
+            model=model,
+            reference=reference,
+            start=frts[0],
+            end=frts[-1],
+            weight=weights.get(reference, 1.0) * len(frts),
+            step=step,
+        )
+        for model in sorted(dataset_references)
+        for reference in sorted(dataset_references[model])
+    ]
+
+
+def assign_units(units: Iterable[WorkUnit], n_shards: int) -> list[list[WorkUnit]]:
+    """Distribute units over *n_shards* shards, balancing total weight.
+
+    Longest-processing-time greedy assignment with fully deterministic
+    tie-breaking (weight, then canonical unit order, then lowest shard
+    index): every host computes the same partition from the same config.
+    """
+    shards: list[list[WorkUnit]] = [[] for _ in range(n_shards)]
+    loads = [0.0] * n_shards
+    ordered = sorted(
+        enumerate(units), key=lambda item: (-item[1].weight, item[0])
+    )
+    for _, unit in ordered:
+        target = min(range(n_shards), key=lambda i: (loads[i], i))
+        shards[target].append(unit)
+        loads[target] += unit.weight
+    for shard in shards:
+        shard.sort(key=lambda u: (u.model, u.reference, u.start))
+    return shards
+
+
+def unit_config(config: dict[str, Any], unit: WorkUnit) -> dict[str, Any]:
+    """Derive the YAML config of one work unit from the full-run config.
+
+    The window runs from the first FRT of the unit to the end of the forecast
+    of its last FRT, with the FRT interval widened to the unit's step, so
+    exactly the FRTs of the unit are evaluated.  Per-FRT map snapshots are
+    skipped: maps are built once from the merged results.
+    """
+    horizon = timedelta(days=int(config.get("n_days_forecast") or 10))
+    derived = copy.deepcopy(config)
+    derived["start_time"] = unit.start.isoformat()
+    derived["end_time"] = (unit.end + horizon).isoformat()
+    if unit.step > 1:
+        derived["n_days_interval"] = int(config.get("n_days_interval") or 7) * unit.step
+    derived["dataset_references"] = {unit.model: [unit.reference]}
+    derived["skip_frt_snapshots"] = True
+    return derived
+
+
+def unit_frts(config: dict[str, Any], unit: WorkUnit) -> list[date]:
+    """FRTs evaluated by *unit*."""
+    return expected_frts(unit_config(config, unit))
+
+
+def unit_directory(data_directory: Path, unit: WorkUnit) -> Path:
+    """Result store of one work unit."""
+    return Path(data_directory) / SHARDS_DIRNAME / unit.unit_id
+
+
+def write_layout(data_directory: Path, frts_per_unit: Union[int, str]) -> Path:
+    """Record the unit layout of the shards in ``shards/layout.json``.
+
+    *frts_per_unit* is the unit size of ``--shard`` runs, or
+    :data:`PROGRESSIVE_LAYOUT` for a progressive run.
+
+    Raises
+    ------
+    ValueError
+        If shards of this data directory were started with another layout.
+    """
+    path = Path(data_directory) / SHARDS_DIRNAME / LAYOUT_FILE
+    recorded = read_layout(data_directory)
+    if recorded is not None and recorded != frts_per_unit:
+        raise ValueError(
+            f"Shards in {path.parent} were started with --frts-per-unit {recorded}, "
+            f"not {frts_per_unit}"
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"frts_per_unit": frts_per_unit}), encoding="utf-8")
+    return path
+
+
+def read_layout(data_directory: Path) -> Optional[Union[int, str]]:
+    """``frts_per_unit`` recorded by :func:`write_layout` (None when absent)."""
+    path = Path(data_directory) / SHARDS_DIRNAME / LAYOUT_FILE
+    if not path.is_file():
+        return None
+    layout = json.loads(path.read_text(encoding="utf-8"))["frts_per_unit"]
+    return layout if layout == PROGRESSIVE_LAYOUT else int(layout)
+
+
+def unit_results_file(data_directory: Path, unit: WorkUnit) -> Optional[Path]:
+    """Results JSON written by a work unit (None when it has none yet)."""
+    results_dir = unit_directory(data_directory, unit) / "results"
+    files = sorted(results_dir.glob("results_*.json")) if results_dir.is_dir() else []
+    return files[0] if files else None
+
+
+def run_pending_units(
+    units: Iterable[WorkUnit],
+    run_unit: Callable[[WorkUnit], int],
+    journal: TaskJournal,
+    data_directory: Path,
+    retry_failed_only: bool = False,
+) -> int:
+    """Run the units the journal does not record as done, journaling each outcome.
+
+    A unit is done when its latest journal entry is ``ok`` and its results
+    file still has the recorded checksum.  A unit whose run returns 0 without
+    writing a results file had no reference data and is done too; a unit whose
+    run returns non-zero is journaled as failed.
+
+    Parameters
+    ----------
+    units : iterable of WorkUnit
+        Units of this run, in execution order.
+    run_unit : callable
+        Evaluates one unit into :func:`unit_directory`; returns an exit code.
+    journal : TaskJournal
+        Resume journal of the run.
+    data_directory : Path
+        Root data directory holding ``shards/``.
+    retry_failed_only : bool
+        Only run units whose latest journal entry is a failure.
+
+    Returns
+    -------
+    int
+        Highest exit code of the units run (0 when all succeeded).
+    """
+    by_id = {unit.unit_id: unit for unit in units}
+    pending = journal.pending(by_id, retry_failed_only=retry_failed_only)
+    if len(pending) < len(by_id):
+        print(
+            f"[evaluate] Resume journal: {len(by_id) - len(pending)} of {len(by_id)} "
+            "work units already done"
+        )
+    exit_code = 0
+    for unit_id in pending:
+        try:
+            code = run_unit(by_id[unit_id])
+        except Exception as exc:
+            journal.record(unit_id, STATUS_FAILED, error=repr(exc))
+            raise
+        results = unit_results_file(data_directory, by_id[unit_id])
+        if code == 0 and results is not None:
+            journal.record(unit_id, STATUS_OK, result_path=results, checksum=sha256_file(results))
+        elif code == 0:
+            # Finished cleanly without entries: the reference has no data
+            # for these FRTs, which running the unit again will not change.
+            journal.record(unit_id, STATUS_OK)
+        else:
+            journal.record(unit_id, STATUS_FAILED, error=f"exit code {code}")
+            exit_code = max(exit_code, code)
+    return exit_code
+
+
+def finished_units(data_directory: Path) -> set[str]:
+    """Work units journaled as done by any shard or progressive run of *data_directory*."""
+    done: set[str] = set()
+    for path in sorted((Path(data_directory) / SHARDS_DIRNAME).glob("journal_*.jsonl")):
+        with TaskJournal(path) as journal:
+            done.update(journal.completed())
+    return done
+
+
+def _entry_key(entry: dict[str, Any]) -> tuple[Any, ...]:
+    return (
+        entry.get("ref_alias"),
+        entry.get("forecast_reference_time"),
+        entry.get("lead_time"),
+    )
+
+
+def merge_shard_results(
+    data_directory: Path,
+    config: Optional[dict[str, Any]] = None,
+    unit_dirs: Optional[Iterable[Path]] = None,
+) -> list[Path]:
+    """Combine per-unit result stores into ``<data_directory>/results``.
+
+    Result entries are de-duplicated on (ref_alias, FRT, lead time) — later
+    units win — and sorted; per-bins ``.jsonl.gz`` files are concatenated
+    (concatenated gzip members form a valid gzip stream).
+
+    Parameters
+    ----------
+    data_directory : Path
+        Root data directory holding ``shards/``.
+    config : dict, optional
+        Full-run config, recorded in the merged metadata.
+    unit_dirs : iterable of Path, optional
+        Unit stores to merge (default: every directory under ``shards/``).
+
+    Returns
+    -------
+    list of Path
+        Merged results JSON files, one per model.
+    """
+    data_directory = Path(data_directory)
+    if unit_dirs is None:
+        shards_dir = data_directory / SHARDS_DIRNAME
+        unit_dirs = (
+            sorted(p for p in shards_dir.iterdir() if p.is_dir()) if shards_dir.is_dir() else []
+        )
+    unit_dirs = list(unit_dirs)
+
+    merged: dict[str, dict[tuple[Any, ...], dict[str, Any]]] = {}
+    n_errors: dict[str, int] = {}
+    per_bins: dict[str, list[Path]] = {}
+    n_units = 0
+    for unit_dir in unit_dirs:
+        results_dir = Path(unit_dir) / "results"
+        if not results_dir.is_dir():
+            continue
+        results_files = sorted(results_dir.glob("results_*.json"))
+        n_units += bool(results_files)
+        for path in results_files:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            for model, entries in (data.get("results") or {}).items():
+                bucket = merged.setdefault(model, {})
+                for entry in entries:
+                    bucket[_entry_key(entry)] = entry
+                n_errors[model] = n_errors.get(model, 0) + int(
+                    (data.get("metadata") or {}).get("n_errors") or 0
+                )
+        for path in sorted(results_dir.glob("results_*_per_bins.jsonl.gz")):
+            model = path.name[len("results_"):-len("_per_bins.jsonl.gz")]
+            per_bins.setdefault(model, []).append(path)
+
+    out_dir = data_directory / "results"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for model, bucket in sorted(merged.items()):
+        entries = [bucket[k] for k in sorted(bucket, key=lambda k: tuple(str(x) for x in k))]
+        metadata: dict[str, Any] = {
+            "evaluation_date": datetime.now().isoformat(),
+            "total_entries": len(entries),
+            "n_errors": n_errors.get(model, 0),
+            "merged_from_units": n_units,
+        }
+        if config:
+            metadata["config"] = {
+                key: config.get(key)
+                for key in ("start_time", "end_time", "n_days_forecast", "n_days_interval")
+            }
+        out_path = out_dir / f"results_{model}.json"
+        out_path.write_text(
+            json.dumps({"dataset": model, "results": {model: entries}, "metadata": metadata}),
+            encoding="utf-8",
+        )
+        written.append(out_path)
+
+    for model, paths in per_bins.items():
+        # Written aside first: the target may itself be one of the inputs
+        # when a resumed run merges its units into the existing results.
+        target = out_dir / f"results_{model}_per_bins.jsonl.gz"
+        partial = target.with_name(target.name + ".partial")
+        with open(partial, "wb") as out:
+            for path in paths:
+                with open(path, "rb") as src:
+                    shutil.copyfileobj(src, out)
+        os.replace(partial, target)
+    return written
+
+
+def missing_frts(
+    results_files: Iterable[Path],
+    config: dict[str, Any],
+    dataset_references: dict[str, list[str]],
+    covered: Optional[Mapping[str, Iterable[date]]] = None,
+) -> dict[str, list[date]]:
+    """Expected FRTs absent from merged results, per ``model/reference``.
+
+    Parameters
+    ----------
+    results_files : iterable of Path
+        Merged ``results_<model>.json`` files.
+    config : dict
+        Full-run config (defines :func:`expected_frts`).
+    dataset_references : dict
+        ``model -> [reference, ...]`` mapping that was evaluated.
+    covered : dict, optional
+        ``reference -> FRTs`` the reference has data for; only those are
+        checked.  References not listed are checked on every expected FRT.
+
+    Returns
+    -------
+    dict
+        ``"model/reference" -> [FRT, ...]`` for every pair missing FRTs.
+    """
+    found: dict[str, set[date]] = {}
+    for path in results_files:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        for model, entries in (data.get("results") or {}).items():
+            for entry in entries:
+                frt = entry.get("forecast_reference_time")
+                if frt is not None:
+                    found.setdefault(f"{model}/{entry.get('ref_alias')}", set()).add(_to_date(frt))
+    expected = expected_frts(config)
+    covered = {ref: set(frts) for ref, frts in (covered or {}).items()}
+    missing = {}
+    for model in sorted(dataset_references):
+        for reference in sorted(dataset_references[model]):
+            key = f"{model}/{reference}"
+            checked = [frt for frt in expected if frt in covered.get(reference, expected)]
+            absent = [frt for frt in checked if frt not in found.get(key, set())]
+            if absent:
+                missing[key] = absent
+    return missing
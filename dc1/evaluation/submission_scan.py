@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Concurrent, metadata-only scan of multi-file submissions.
+
+A submission given as a directory of per-init-date stores (e.g. 52 weekly
+``YYYYMMDD.zarr``) or as a glob of ``.nc`` files used to be opened one file
+after another, once by validation and again by evaluation.  On network
+filesystems each open costs seconds.
+
+:func:`scan_submission` opens every store lazily in a thread pool, reading
+only (consolidated) metadata and the dimension coordinates, and checks that
+all stores share the reference grid; each store is closed as soon as its
+metadata is read.  The scan stops early once ``max_grid_mismatches`` stores
+disagree.  The resulting :class:`SubmissionIndex` is saved with the results
+as a record of the scanned submission, and reused by later ``dc1.submit``
+commands while no store has changed.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import xarray as xr
+
+INDEX_FILENAME = "submission_index.json"
+INDEX_VERSION = 1
+
+STORE_SUFFIXES = (".zarr", ".nc", ".nc4")
+
+# Coordinate names accepted for each axis (see ``dc1.submit info``).
+COORD_ALIASES = {
+    "lat": ("lat", "latitude"),
+    "lon": ("lon", "longitude"),
+    "depth": ("depth", "lev"),
+    "time": ("time",),
+}
+
+# Tolerance on coordinate values, as in the submission notebook.  Scans,
+# the writer and the per-forecast validation all match grids with it.
+COORD_ATOL = 0.01
+
+_DATE_IN_NAME = re.compile(r"(\d{4})-?(\d{2})-?(\d{2})")
+
+
+def expand_submission_paths(data_path: str) -> list[str]:
+    """List the stores of a submission.
+
+    Args:
+        data_path (str): Single store, directory of per-date stores, or glob.
+
+    Returns:
+        list[str]: Store paths in sorted order.
+    """
+    if glob.has_magic(data_path):
+        return sorted(glob.glob(data_path))
+    path = Path(data_path)
+    if path.is_dir() and not path.name.endswith(".zarr") and not (path / ".zgroup").exists():
+        return sorted(
+            str(child) for child in path.iterdir()
+            if child.name.endswith(STORE_SUFFIXES) and not child.name.startswith(".")
+        )
+    return [str(path)]
+
+
+def store_mtime(path: str) -> float:
+    """Modification time of a store (consolidated metadata for Zarr)."""
+    p = Path(path)
+    for meta in (p / ".zmetadata", p / "zarr.json"):
+        if meta.is_file():
+            return meta.stat().st_mtime
+    return p.stat().st_mtime
+
+
+def open_store(path: str) -> Any:
+    """Open a store lazily (metadata + coordinates only); the caller closes it."""
+    if path.rstrip("/").endswith(".zarr") or Path(path, ".zgroup").exists():
+        # consolidated=None: use .zmetadata when present, else list the store.
+        return xr.open_zarr(path, consolidated=None, chunks={})
+    return xr.open_dataset(path, chunks={})
+
+
+def _find_coord(ds: Any, axis: str) -> Optional[str]:
+    for name in COORD_ALIASES[axis]:
+        if name in ds.coords or name in ds.dims:
+            return name
+    return None
+
+
+def grid_summary(values: Any) -> dict[str, Any]:
+    """Size, bounds, step, distance to a regular grid and digest of a 1-D coordinate."""
+    arr = np.asarray(values, dtype="float64").ravel()
+    residual = (
+        float(np.max(np.abs(arr - np.linspace(arr[0], arr[-1], arr.size)))) if arr.size else 0.0
+    )
+    return {
+        "size": int(arr.size),
+        "first": float(arr[0]) if arr.size else None,
+        "last": float(arr[-1]) if arr.size else None,
+        "step": float(arr[1] - arr[0]) if arr.size > 1 else None,
+        "residual": residual,
+        # Rounded so that float32/float64 encodings of the same grid agree.
+        "digest": hashlib.sha1(np.round(arr, 5).tobytes()).hexdigest(),
+    }
+
+
+def grid_matches(summary: dict[str, Any], reference: dict[str, Any]) -> bool:
+    """True when two :func:`grid_summary` coordinates agree within :data:`COORD_ATOL`.
+
+    Equal digests match.  Otherwise each coordinate is a regular grid from
+    *first* to *last* plus at most *residual*, so every value is within the
+    endpoint offset plus both residuals of the reference; irregular grids
+    (large residuals) only match by digest.
+    """
+    if summary.get("digest") is not None and summary.get("digest") == reference.get("digest"):
+        return True
+    try:
+        offset = max(
+            abs(summary["first"] - reference["first"]), abs(summary["last"] - reference["last"])
+        )
+        bound = offset + summary["residual"] + reference["residual"]
+    except (KeyError, TypeError):
+        return False
+    return summary["size"] == reference["size"] and bound <= COORD_ATOL
+
+
+@dataclass
+class StoreMetadata:
+    """Metadata of one submission store."""
+
+    path: str
+    mtime: float = 0.0
+    init_date: Optional[str] = None
+    variables: dict[str, dict[str, Any]] = field(default_factory=dict)
+    grid: dict[str, dict[str, Any]] = field(default_factory=dict)
+    depth: Optional[list[float]] = None
+    lead_times: Optional[list[float]] = None
+    grid_ok: Optional[bool] = None
+    error: Optional[str] = None
+
+
+def read_store_metadata(path: str) -> StoreMetadata:
+    """Read variables, grid and lead times of one store without loading data."""
+    meta = StoreMetadata(path=path)
+    try:
+        meta.mtime = store_mtime(path)
+        ds = open_store(path)
+    except Exception as exc:  # noqa: BLE001 — reported per store
+        meta.error = f"{type(exc).__name__}: {exc}"
+        return meta
+    with ds:
+        try:
+            return describe_dataset(meta, ds)
+        except Exception as exc:  # noqa: BLE001 — e.g. undecodable times
+            meta.error = f"{type(exc).__name__}: {exc}"
+            return meta
+
+
+def describe_dataset(meta: StoreMetadata, ds: Any) -> StoreMetadata:
+    """Fill *meta* from the metadata and coordinates of an (open) dataset."""
+    meta.variables = {
+        name: {"dims": list(var.dims), "shape": list(var.shape), "dtype": str(var.dtype)}
+        for name, var in ds.data_vars.items()
+    }
+    for axis in ("lat", "lon"):
+        name = _find_coord(ds, axis)
+        if name is not None:
+            meta.grid[axis] = grid_summary(ds[name].values)
+    depth_name = _find_coord(ds, "depth")
+    if depth_name is not None:
+        meta.depth = [float(d) for d in np.asarray(ds[depth_name].values).ravel()]
+
+    time_name = _find_coord(ds, "time")
+    times = np.asarray(ds[time_name].values).ravel() if time_name else np.array([])
+    match = _DATE_IN_NAME.search(Path(meta.path).name)
+    if match:
+        meta.init_date = "-".join(match.groups())
+    elif times.size and np.issubdtype(times.dtype, np.datetime64):
+        meta.init_date = str(times[0].astype("datetime64[D]"))
+    if times.size:
+        if np.issubdtype(times.dtype, np.datetime64):
+            leads = (times - times[0]) / np.timedelta64(1, "D")
+        else:
+            leads = times.astype("float64")
+        meta.lead_times = [float(v) for v in leads]
+    return meta
+
+
+def _grid_matches(meta: StoreMetadata, reference: dict[str, dict[str, Any]]) -> bool:
+    return all(grid_matches(meta.grid.get(axis, {}), ref) for axis, ref in reference.items())
+
+
+@dataclass
+class SubmissionIndex:
+    """Result of :func:`scan_submission`, persisted as JSON."""
+
+    data_path: str
+    stores: list[StoreMetadata]
+    reference_grid: dict[str, dict[str, Any]]
+    n_grid_mismatches: int = 0
+    n_errors: int = 0
+    n_not_scanned: int = 0
+    aborted: bool = False
+    created: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+    @property
+    def ok(self) -> bool:
+        """True when every store was read and matches the reference grid."""
+        return not self.aborted and self.n_grid_mismatches == 0 and self.n_errors == 0
+
+    def by_init_date(self) -> dict[str, StoreMetadata]:
+        """Readable stores keyed by their init date."""
+        return {s.init_date: s for s in self.stores if s.error is None and s.init_date}
+
+    def summary(self) -> str:
+        """One-line human-readable summary."""
+        text = (
+            f"{len(self.stores)} stores scanned, {self.n_grid_mismatches} grid mismatches, "
+            f"{self.n_errors} unreadable"
+        )
+        if self.aborted:
+            text += " — too many grid mismatches"
+            if self.n_not_scanned:
+                text += f", stopped early with {self.n_not_scanned} not scanned"
+        return text
+
+    def is_fresh(self) -> bool:
+        """True when every indexed store still exists with the same mtime."""
+        try:
+            return all(store_mtime(s.path) == s.mtime for s in self.stores)
+        except OSError:
+            return False
+
+    def save(self, path: Path) -> Path:
+        """Write the index atomically as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": INDEX_VERSION, **asdict(self)}
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "SubmissionIndex":
+        """Read an index written by :meth:`save`."""
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        if payload.pop("version", None) != INDEX_VERSION:
+            raise ValueError(f"Unsupported submission index version in {path}")
+        payload["stores"] = [StoreMetadata(**s) for s in payload["stores"]]
+        return cls(**payload)
+
+
+def scan_submission(
+    data_path: str,
+    reference_grid: Optional[dict[str, Any]] = None,
+    max_workers: int = 16,
+    max_grid_mismatches: Optional[int] = 1,
+    reader: Callable[[str], StoreMetadata] = read_store_metadata,
+) -> SubmissionIndex:
+    """Read the metadata of every store of a submission concurrently.
+
+    Args:
+        data_path (str): Single store, directory of per-date stores, or glob.
+        reference_grid (dict, optional): ``{"lat": values, "lon": values}``
+            expected grid.  Defaults to the grid of the first store.
+        max_workers (int): Number of stores opened concurrently.
+        max_grid_mismatches (int, optional): Stop once this many stores do not
+            match the reference grid (``None`` or 0 scans everything).
+        reader (Callable): Reads one store (overridable for other backends).
+
+    Returns:
+        SubmissionIndex: Per-store metadata, in path order.
+    """
+    paths = expand_submission_paths(data_path)
+    results: dict[str, StoreMetadata] = {}
+    remaining = list(paths)
+
+    if reference_grid is not None:
+        reference = {axis: grid_summary(values) for axis, values in reference_grid.items()}
+    else:
+        # The first store defines the grid; read it before fanning out so the
+        # reference does not depend on completion order.
+        reference = {}
+        while remaining and not reference:
+            first = reader(remaining.pop(0))
+            results[first.path] = first
+            reference = dict(first.grid)
+
+    n_mismatches = 0
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+        pending = {pool.submit(reader, p) for p in remaining}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                meta = future.result()
+                results[meta.path] = meta
+                if meta.error is None and reference:
+                    meta.grid_ok = _grid_matches(meta, reference)
+                    n_mismatches += not meta.grid_ok
+            if max_grid_mismatches and n_mismatches >= max_grid_mismatches and pending:
+                for future in pending:
+                    future.cancel()
+                # Stores already being opened finish; their results are kept.
+                for future in pending:
+                    if not future.cancelled():
+                        meta = future.result()
+                        results[meta.path] = meta
+                break
+
+    for meta in results.values():
+        if meta.error is None and reference and meta.grid_ok is None:
+            meta.grid_ok = _grid_matches(meta, reference)
+    stores = [results[p] for p in paths if p in results]
+    n_grid_mismatches = sum(s.grid_ok is False for s in stores)
+    threshold = max_grid_mismatches or 0
+    return SubmissionIndex(
+        data_path=str(data_path),
+        stores=stores,
+        reference_grid=reference,
+        n_grid_mismatches=n_grid_mismatches,
+        n_errors=sum(s.error is not None for s in stores),
+        n_not_scanned=len(paths) - len(stores),
+        # Reaching the threshold aborts the submission, even when the last
+        # mismatching store was also the last one scanned.
+        aborted=bool(threshold) and n_grid_mismatches >= threshold,
+    )
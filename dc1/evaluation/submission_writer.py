@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Streaming submission writer: validate forecasts in memory as they are produced.
+
+The usual workflow writes a year of per-init-date forecasts to disk, then
+``dc1.submit validate`` re-opens and re-reads every store to check grid,
+variables, lead times and NaN fraction.  :class:`SubmissionWriter` takes the
+``xarray.Dataset`` of each init date straight from model inference instead:
+
+* the DC1 checks run on the in-memory arrays (vectorized, one pass per
+  variable) before anything is written; a lazy (dask) forecast is computed
+  once and kept in memory for both the checks and the write;
+* valid forecasts are written to ``<output_dir>/YYYYMMDD.zarr`` in a
+  background thread, chunked one lead time per chunk (the access pattern of
+  the evaluation), while the model computes the next init date;
+* every result is appended to ``validation_report.jsonl`` and, on
+  :meth:`SubmissionWriter.close`, the submission index of
+  :mod:`dc1.evaluation.submission_scan` is written from the in-memory
+  metadata, so ``dc1.submit run`` does not open the stores again.
+
+Example::
+
+    from dc1.evaluation.submission_writer import SubmissionSpec, SubmissionWriter
+
+    with SubmissionWriter("my_model/", SubmissionSpec.from_dc_config("dc1")) as writer:
+        for init_date in init_dates:
+            writer.add(init_date, model.forecast(init_date))
+    print(writer.summary())
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from dc1.evaluation.submission_scan import (
+    COORD_ALIASES,
+    COORD_ATOL,
+    INDEX_FILENAME,
+    StoreMetadata,
+    SubmissionIndex,
+    describe_dataset,
+    grid_matches,
+    grid_summary,
+    store_mtime,
+)
+
+REPORT_FILENAME = "validation_report.jsonl"
+
+# DC1 defaults (see ``python -m dc1.submit info``).
+DC1_VARIABLES = ("zos", "thetao", "so", "uo", "vo")
+DC1_LAT = np.arange(-78.0, 90.0 + 0.125, 0.25)
+DC1_LON = np.arange(-180.0, 180.0, 0.25)
+DC1_LEAD_TIMES = tuple(range(10))
+
+# One lead time per chunk: the evaluation reads whole global fields of one
+# lead time at a time.
+DEFAULT_CHUNKS = {"time": 1, "lat": -1, "lon": -1}
+
+DateLike = Union[str, date, datetime, np.datetime64, pd.Timestamp]
+
+
+@dataclass
+class SubmissionSpec:
+    """Expected content of one per-init-date forecast."""
+
+    lat: np.ndarray = field(default_factory=lambda: DC1_LAT.copy())
+    lon: np.ndarray = field(default_factory=lambda: DC1_LON.copy())
+    lead_times: Sequence[float] = DC1_LEAD_TIMES
+    variables: Sequence[str] = DC1_VARIABLES
+    max_nan_fraction: float = 0.10
+
+    @classmethod
+    def from_dc_config(cls, config: str = "dc1", **overrides: Any) -> "SubmissionSpec":
+        """Build the spec from a Data Challenge config, as ``dc1.submit info`` does."""
+        from dctools.submission.validator import SubmissionValidator
+
+        v = SubmissionValidator.from_dc_config(config)
+        spec = cls()
+        if v.target_lat is not None:
+            spec.lat = np.asarray(v.target_lat, dtype="float64")
+        if v.target_lon is not None:
+            spec.lon = np.asarray(v.target_lon, dtype="float64")
+        if v.target_time_values is not None:
+            spec.lead_times = tuple(v.target_time_values)
+        if v.required_variables:
+            spec.variables = tuple(v.required_variables)
+        for key, value in overrides.items():
+            setattr(spec, key, value)
+        return spec
+
+
+@dataclass
+class ForecastValidation:
+    """Validation result of one forecast, one line of the report."""
+
+    init_date: str
+    passed: bool
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+    nan_fraction: dict[str, float] = field(default_factory=dict)
+    path: Optional[str] = None
+    written: bool = False
+    write_seconds: Optional[float] = None
+    write_error: Optional[str] = None
+
+
+def _coord_name(ds: xr.Dataset, axis: str) -> Optional[str]:
+    for name in COORD_ALIASES[axis]:
+        if name in ds.coords or name in ds.dims:
+            return name
+    return None
+
+
+def _init_date_str(init_date: DateLike) -> str:
+    return pd.Timestamp(init_date).strftime("%Y-%m-%d")
+
+
+def _lead_days(times: np.ndarray, init_date: str) -> np.ndarray:
+    if np.issubdtype(times.dtype, np.datetime64):
+        return (times - np.datetime64(init_date, "ns")) / np.timedelta64(1, "D")
+    return times.astype("float64")
+
+
+def validate_forecast(
+    ds: xr.Dataset, init_date: DateLike, spec: Optional[SubmissionSpec] = None
+) -> ForecastValidation:
+    """Check one in-memory forecast against the DC1 spec.
+
+    Variables, grid, lead times and NaN fraction are checked without writing
+    or re-reading anything; NaN fractions of all variables are reduced in a
+    single vectorized pass (and a single compute for dask-backed data).
+
+    Args:
+        ds (xr.Dataset): Forecast of one init date, ``(time, [depth,] lat, lon)``.
+        init_date (date-like): Forecast reference time.
+        spec (SubmissionSpec, optional): Expected content (DC1 defaults).
+
+    Returns:
+        ForecastValidation: Errors and warnings found.
+    """
+    spec = spec or SubmissionSpec()
+    result = ForecastValidation(init_date=_init_date_str(init_date), passed=False)
+    errors, warnings = result.errors, result.warnings
+
+    missing = [v for v in spec.variables if v not in ds.data_vars]
+    if missing:
+        errors.append(f"missing variables: {', '.join(missing)}")
+
+    for axis, expected in (("lat", spec.lat), ("lon", spec.lon)):
+        name = _coord_name(ds, axis)
+        if name is None:
+            errors.append(f"no {axis} coordinate ({'/'.join(COORD_ALIASES[axis])})")
+            continue
+        values = np.asarray(ds[name].values, dtype="float64")
+        if values.shape != expected.shape:
+            errors.append(f"{axis}: {values.size} points, expected {expected.size}")
+        elif not np.allclose(values, expected, atol=COORD_ATOL):
+            worst = float(np.max(np.abs(values - expected)))
+            errors.append(f"{axis}: values differ from the target grid (max {worst:.4g}°)")
+
+    time_name = _coord_name(ds, "time")
+    if time_name is None:
+        errors.append("no time coordinate")
+    else:
+        leads = _lead_days(np.asarray(ds[time_name].values).ravel(), result.init_date)
+        expected_leads = np.asarray(spec.lead_times, dtype="float64")
+        if leads.shape != expected_leads.shape:
+            errors.append(f"time: {leads.size} lead times, expected {expected_leads.size}")
+        elif not np.allclose(leads, expected_leads):
+            errors.append(f"time: lead times {leads.tolist()} != {expected_leads.tolist()}")
+
+    present = [v for v in spec.variables if v in ds.data_vars]
+    if present:
+        fractions = ds[present].isnull().mean().compute()
+        for name in present:
+            frac = float(fractions[name])
+            result.nan_fraction[name] = round(frac, 6)
+            if frac > spec.max_nan_fraction:
+                errors.append(f"{name}: {frac:.1%} NaN (max {spec.max_nan_fraction:.0%})")
+            elif frac == 1.0:
+                warnings.append(f"{name}: all values are NaN")
+        extra = sorted(set(ds.data_vars) - set(spec.variables))
+        if extra:
+            warnings.append(f"extra variables not evaluated: {', '.join(extra)}")
+
+    result.passed = not errors
+    return result
+
+
+def index_problems(index: SubmissionIndex, spec: Optional[SubmissionSpec] = None) -> list[str]:
+    """Checks of a quick validation that a submission index fails.
+
+    A scan (or writer) index records the variables, grid and lead times of
+    every store, which is all a quick validation reads; an empty list means
+    the stores need not be opened again to run it.
+
+    Args:
+        index (SubmissionIndex): Index scanned against the grid of *spec*.
+        spec (SubmissionSpec, optional): Expected content (DC1 defaults).
+
+    Returns:
+        list[str]: One message per failing store or check.
+    """
+    spec = spec or SubmissionSpec()
+    problems = []
+    if index.aborted or index.n_not_scanned:
+        problems.append("scan stopped before every store was read")
+    expected_leads = np.asarray(spec.lead_times, dtype="float64")
+    for store in index.stores:
+        if store.error:
+            problems.append(f"{store.path}: unreadable ({store.error})")
+            continue
+        if store.grid_ok is not True:
+            problems.append(f"{store.path}: grid differs from the target grid")
+        missing = [v for v in spec.variables if v not in store.variables]
+        if missing:
+            problems.append(f"{store.path}: missing variables: {', '.join(missing)}")
+        leads = np.asarray(store.lead_times or [], dtype="float64")
+        if leads.shape != expected_leads.shape or not np.allclose(leads, expected_leads):
+            problems.append(f"{store.path}: lead times {leads.tolist()}")
+    return problems
+
+
+def read_report(output_dir: Union[str, Path]) -> dict[str, ForecastValidation]:
+    """Latest result of each init date in ``<output_dir>/validation_report.jsonl``."""
+    path = Path(output_dir) / REPORT_FILENAME
+    results: dict[str, ForecastValidation] = {}
+    if not path.is_file():
+        return results
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                result = ForecastValidation(**json.loads(line))
+                results[result.init_date] = result
+    return results
+
+
+def report_validates(index: Optional[SubmissionIndex], output_dir: Union[str, Path]) -> bool:
+    """True when the writer's report already validates every store of *index*.
+
+    Every forecast in the report passed and was written, every store of the
+    index is one of them, and no store changed since it was indexed: the
+    full validation would only re-read what the writer checked in memory.
+    """
+    if index is None or not index.stores or not index.is_fresh():
+        return False
+    try:
+        results = read_report(output_dir)
+    except (ValueError, TypeError):
+        return False
+    if not results or not all(r.passed and r.written for r in results.values()):
+        return False
+    written = {os.path.abspath(r.path) for r in results.values() if r.path}
+    return all(os.path.abspath(s.path) in written for s in index.stores)
+
+
+def _persist_written(ds: xr.Dataset, spec: SubmissionSpec) -> xr.Dataset:
+    """Compute the lazy variables that are validated and written, once.
+
+    Validation and the write would otherwise each compute the dask graph of
+    the forecast (i.e. run the model output pipeline twice).
+    """
+    keep = [v for v in spec.variables if v in ds.data_vars and ds[v].chunks is not None]
+    if not keep:
+        return ds
+    return ds.assign(ds[keep].persist().data_vars)
+
+
+def _standardize(ds: xr.Dataset, spec: SubmissionSpec, chunks: dict[str, int]) -> xr.Dataset:
+    """Rename coordinate aliases and set the on-disk chunking."""
+    renames = {}
+    for axis in ("lat", "lon", "depth"):
+        name = _coord_name(ds, axis)
+        if name is not None and name != axis:
+            renames[name] = axis
+    ds = ds.rename(renames) if renames else ds
+    ds = ds[[v for v in spec.variables if v in ds.data_vars]]
+    for var in ds.variables.values():
+        # Encodings inherited from a source store would override the chunking.
+        var.encoding.pop("chunks", None)
+        var.encoding.pop("preferred_chunks", None)
+    return ds.chunk({dim: size for dim, size in chunks.items() if dim in ds.dims})
+
+
+class SubmissionWriter:
+    """Validate and write per-init-date forecasts as model inference produces them.
+
+    Validation runs in the caller's thread on the in-memory dataset; writes run
+    in a background pool.  At most ``max_pending`` forecasts are held in memory
+    while waiting to be written: :meth:`add` blocks beyond that.
+
+    Args:
+        output_dir (str | Path): Submission directory (``YYYYMMDD.zarr`` stores).
+        spec (SubmissionSpec, optional): Expected content (DC1 defaults).
+        max_pending (int): Forecasts queued for writing before :meth:`add` blocks.
+        chunks (dict, optional): On-disk chunking (one lead time per chunk).
+        write_invalid (bool): Also write forecasts that fail validation.
+    """
+
+    def __init__(
+        self,
+        output_dir: Union[str, Path],
+        spec: Optional[SubmissionSpec] = None,
+        max_pending: int = 2,
+        chunks: Optional[dict[str, int]] = None,
+        write_invalid: bool = False,
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.spec = spec or SubmissionSpec()
+        self.chunks = dict(chunks or DEFAULT_CHUNKS)
+        self.write_invalid = write_invalid
+        self.report_path = self.output_dir / REPORT_FILENAME
+        self.results: dict[str, ForecastValidation] = {}
+        self._stores: dict[str, StoreMetadata] = {}
+        self._futures: list[Future] = []
+        self._slots = threading.BoundedSemaphore(max(1, int(max_pending)))
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(max_pending)),
+                                        thread_name_prefix="dc1-writer")
+        self._closed = False
+
+    def __enter__(self) -> "SubmissionWriter":
+        """Return the writer itself."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Wait for pending writes and write the submission index."""
+        self.close()
+
+    def add(self, init_date: DateLike, ds: xr.Dataset) -> ForecastValidation:
+        """Validate one forecast and queue it for writing.
+
+        Args:
+            init_date (date-like): Forecast reference time.
+            ds (xr.Dataset): Forecast, as returned by the model.
+
+        Returns:
+            ForecastValidation: Validation result (``written`` is updated once
+            the background write finishes).
+        """
+        if self._closed:
+            raise RuntimeError("SubmissionWriter is closed")
+        ds = _persist_written(ds, self.spec)
+        result = validate_forecast(ds, init_date, self.spec)
+        with self._lock:
+            if result.init_date in self.results:
+                result.warnings.append("init date submitted twice; previous forecast replaced")
+            self.results[result.init_date] = result
+        if not (result.passed or self.write_invalid):
+            self._record(result)
+            return result
+
+        store = self.output_dir / f"{result.init_date.replace('-', '')}.zarr"
+        result.path = str(store)
+        data = _standardize(ds, self.spec, self.chunks)
+        # Metadata for the submission index comes from memory, not from disk,
+        # and describes what is written (renamed coordinates, spec variables).
+        meta = describe_dataset(StoreMetadata(path=str(store)), data)
+        meta.init_date = result.init_date
+
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(self._write, data, store, result, meta)
+        except BaseException:
+            self._slots.release()
+            raise
+        self._futures.append(future)
+        return result
+
+    def _write(
+        self, ds: xr.Dataset, store: Path, result: ForecastValidation, meta: StoreMetadata
+    ) -> None:
+        tmp = store.with_name(f".{store.name}.tmp")
+        start = time.perf_counter()
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            ds.to_zarr(tmp, mode="w", consolidated=True)
+            # Replace the previous store only once the new one is complete.
+            shutil.rmtree(store, ignore_errors=True)
+            os.replace(tmp, store)
+            meta.mtime = store_mtime(str(store))
+            result.written = True
+        except Exception as exc:  # noqa: BLE001 — reported per forecast
+            result.write_error = f"{type(exc).__name__}: {exc}"
+            shutil.rmtree(tmp, ignore_errors=True)
+        finally:
+            result.write_seconds = round(time.perf_counter() - start, 3)
+            self._slots.release()
+        if result.written:
+            with self._lock:
+                self._stores[result.init_date] = meta
+        self._record(result)
+
+    def _record(self, result: ForecastValidation) -> None:
+        line = json.dumps(asdict(result)) + "\n"
+        with self._lock, self.report_path.open("a", encoding="utf-8") as fh:
+            fh.write(line)
+
+    def close(self) -> Optional[SubmissionIndex]:
+        """Wait for pending writes and write the submission index.
+
+        Returns:
+            SubmissionIndex | None: Index of the written stores (None if no
+            store was written).
+        """
+        if self._closed:
+            return None
+        self._closed = True
+        self._pool.shutdown(wait=True)
+        for future in self._futures:
+            future.result()
+        if not self._stores:
+            return None
+        stores = [self._stores[k] for k in sorted(self._stores)]
+        reference = {axis: grid_summary(values)
+                     for axis, values in (("lat", self.spec.lat), ("lon", self.spec.lon))}
+        for meta in stores:
+            meta.grid_ok = all(
+                grid_matches(meta.grid.get(axis, {}), ref) for axis, ref in reference.items()
+            )
+        index = SubmissionIndex(
+            data_path=str(self.output_dir),
+            stores=stores,
+            reference_grid=reference,
+            n_grid_mismatches=sum(not s.grid_ok for s in stores),
+        )
+        index.save(self.output_dir / INDEX_FILENAME)
+        return index
+
+    def summary(self) -> str:
+        """One-line human-readable summary."""
+        results = list(self.results.values())
+        n_failed = sum(not r.passed for r in results)
+        n_written = sum(r.written for r in results)
+        n_write_errors = sum(r.write_error is not None for r in results)
+        text = f"{len(results)} forecasts validated, {n_failed} failed, {n_written} written"
+        if n_write_errors:
+            text += f", {n_write_errors} write errors"
+        return text
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Structured per-task telemetry for DC1 evaluation runs.
+
+Each evaluation task (one reference dataset × FRT × lead time) is described by
+a :class:`TaskMetrics` record: wait (download + preprocess) time, compute time
+and number of matched observations, as reported by dctools in the results
+file, plus the observation batch the task belonged to.  Tasks run inside
+dctools, which does not report bytes downloaded, per-task peak RSS or
+interpolation time, so those are not recorded; the peak RSS of the driver
+process is sampled for the whole run instead (:class:`RssSampler`).  Records
+are written to a JSON Lines file and can be exported as a Prometheus text file
+(``node_exporter`` textfile collector format).
+
+:func:`merge_unit_telemetry` combines the telemetry of the work units of a
+sharded or progressive run once they are merged.
+
+:func:`summarize` ranks the slowest datasets and batches from a JSON Lines
+file; it backs the ``python -m dc1.evaluate telemetry`` command.
+"""
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+# psutil is installed as a dependency of memory-profiler.
+import psutil
+from tabulate import tabulate
+
+TELEMETRY_DIRNAME = "telemetry"
+TASKS_JSONL = "tasks.jsonl"
+PROMETHEUS_FILE = "dc1_evaluation.prom"
+# Run-level measurements (driver peak RSS, wall time), read back by the merge.
+RUN_JSON = "run.json"
+
+
+@dataclass
+class TaskMetrics:
+    """Performance counters of one evaluation task."""
+
+    dataset: str
+    frt: Optional[str] = None
+    lead_time: Optional[int] = None
+    batch: Optional[int] = None
+    status: str = "ok"
+    wait_s: float = 0.0
+    compute_s: float = 0.0
+    n_obs: int = 0
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def total_s(self) -> float:
+        """Wall time spent on the task (wait + compute)."""
+        return self.wait_s + self.compute_s
+
+
+class RssSampler:
+    """Background sampler of the peak resident set size of this process tree."""
+
+    def __init__(self, interval: float = 0.5, include_children: bool = True) -> None:
+        self.interval = interval
+        self.include_children = include_children
+        self.peak_rss_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._proc = psutil.Process(os.getpid())
+
+    def _rss(self) -> int:
+        rss = self._proc.memory_info().rss
+        if self.include_children:
+            for child in self._proc.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    pass
+        return rss
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.peak_rss_bytes = max(self.peak_rss_bytes, self._rss())
+            except psutil.Error:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self) -> "RssSampler":
+        """Start sampling in a daemon thread."""
+        self.peak_rss_bytes = self._rss()
+        self._thread = threading.Thread(target=self._run, name="dc1-rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> int:
+        """Stop sampling and return the peak RSS (bytes)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2 * self.interval)
+        return self.peak_rss_bytes
+
+
+class TelemetryRecorder:
+    """Append :class:`TaskMetrics` records to a JSON Lines file.
+
+    Parameters
+    ----------
+    output_dir : path-like
+        Directory receiving ``tasks.jsonl`` and the Prometheus text file.
+    """
+
+    def __init__(self, output_dir: Path) -> None:
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.jsonl_path = self.output_dir / TASKS_JSONL
+        self._lock = threading.Lock()
+
+    def record(self, metrics: TaskMetrics) -> None:
+        """Append one record (thread-safe)."""
+        line = json.dumps(asdict(metrics), default=str)
+        with self._lock, open(self.jsonl_path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+    def record_many(self, records: Iterable[TaskMetrics]) -> int:
+        """Append several records; returns how many were written."""
+        lines = [json.dumps(asdict(m), default=str) for m in records]
+        if lines:
+            with self._lock, open(self.jsonl_path, "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+        return len(lines)
+
+
+def metrics_from_results(
+    results_path: Path, batch_sizes: Optional[dict[str, int]] = None
+) -> list[TaskMetrics]:
+    """Build task records from a ``results_<model>.json`` file.
+
+    Every result entry already carries ``duration_s`` (compute),
+    ``preprocess_s`` (download + preprocessing wait) and ``n_points``
+    (matched observations).  A dataset's tasks are batched in (FRT, lead
+    time) order, ``obs_batch_size`` tasks at a time, so the batch index is
+    the rank of the entry in that order divided by the batch size.
+
+    Parameters
+    ----------
+    results_path : Path
+        Results JSON written by the evaluation.
+    batch_sizes : dict, optional
+        ``dataset -> obs_batch_size``; without it ``batch`` is left unset.
+
+    Returns
+    -------
+    list of TaskMetrics
+        One record per result entry.
+    """
+    data = json.loads(Path(results_path).read_text(encoding="utf-8"))
+    batch_sizes = batch_sizes or {}
+    entries = [e for model_entries in data.get("results", {}).values() for e in model_entries]
+
+    by_dataset: dict[str, list[dict[str, Any]]] = {}
+    for entry in entries:
+        by_dataset.setdefault(entry.get("ref_alias", "unknown"), []).append(entry)
+
+    records = []
+    for ref, ref_entries in by_dataset.items():
+        # Entries without an FRT or lead time sort last.
+        ref_entries.sort(key=_task_order)
+        batch_size = int(batch_sizes.get(ref) or 0)
+        for rank, entry in enumerate(ref_entries):
+            records.append(
+                TaskMetrics(
+                    dataset=ref,
+                    frt=entry.get("forecast_reference_time"),
+                    lead_time=entry.get("lead_time"),
+                    batch=rank // batch_size if batch_size else None,
+                    status="error" if entry.get("error") else "ok",
+                    wait_s=float(entry.get("preprocess_s") or 0.0),
+                    compute_s=float(entry.get("duration_s") or 0.0),
+                    n_obs=int(entry.get("n_points") or 0),
+                )
+            )
+    return records
+
+
+def _task_order(entry: dict[str, Any]) -> tuple[bool, str, bool, int]:
+    frt = entry.get("forecast_reference_time")
+    lead = entry.get("lead_time")
+    return frt is None, str(frt or ""), lead is None, int(lead or 0)
+
+
+def load_jsonl(path: Path) -> list[TaskMetrics]:
+    """Read task records back from a JSON Lines file (torn lines are skipped)."""
+    known = {f.name for f in fields(TaskMetrics)}
+    records = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                data = json.loads(line)
+                records.append(TaskMetrics(**{k: v for k, v in data.items() if k in known}))
+            except (json.JSONDecodeError, TypeError, AttributeError):
+                continue
+    return records
+
+
+def _prom_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def write_prometheus(
+    records: Iterable[TaskMetrics],
+    path: Path,
+    run_labels: Optional[dict[str, str]] = None,
+    run_metrics: Optional[dict[str, float]] = None,
+) -> Path:
+    """Write per-dataset aggregates in the Prometheus text exposition format."""
+    per_dataset: dict[str, dict[str, float]] = {}
+    for m in records:
+        agg = per_dataset.setdefault(
+            m.dataset,
+            {"tasks": 0, "errors": 0, "wait": 0.0, "compute": 0.0, "obs": 0},
+        )
+        agg["tasks"] += 1
+        agg["errors"] += m.status != "ok"
+        agg["wait"] += m.wait_s
+        agg["compute"] += m.compute_s
+        agg["obs"] += m.n_obs
+
+    base = ",".join(f'{k}="{_prom_label(v)}"' for k, v in (run_labels or {}).items())
+    series = [
+        ("dc1_tasks_total", "counter", "Evaluation tasks completed.", "tasks"),
+        ("dc1_task_errors_total", "counter", "Evaluation tasks that failed.", "errors"),
+        ("dc1_task_wait_seconds_total", "counter", "Download/preprocess wait time.", "wait"),
+        ("dc1_task_compute_seconds_total", "counter", "Task compute time.", "compute"),
+        ("dc1_observations_matched_total", "counter", "Observations matched.", "obs"),
+    ]
+    lines = []
+    for name, kind, help_text, key in series:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for dataset in sorted(per_dataset):
+            labels = f'dataset="{_prom_label(dataset)}"' + (f",{base}" if base else "")
+            lines.append(f"{name}{{{labels}}} {per_dataset[dataset][key]}")
+    for name, value in (run_metrics or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{{{base}}} {value}" if base else f"{name} {value}")
+
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    # Atomic replace: the textfile collector must never read a partial file.
+    os.replace(tmp, path)
+    return path
+
+
+def summarize(records: list[TaskMetrics], top: int = 10) -> str:
+    """Rank the slowest datasets and batches.
+
+    Parameters
+    ----------
+    records : list of TaskMetrics
+        Task records (e.g. from :func:`load_jsonl`).
+    top : int
+        Number of batches to list.
+
+    Returns
+    -------
+    str
+        Printable report.
+    """
+    if not records:
+        return "No telemetry records."
+
+    by_dataset: dict[str, list[TaskMetrics]] = {}
+    by_batch: dict[tuple[str, Any], list[TaskMetrics]] = {}
+    for m in records:
+        by_dataset.setdefault(m.dataset, []).append(m)
+        by_batch.setdefault((m.dataset, m.batch), []).append(m)
+
+    def _row(label: list[Any], items: list[TaskMetrics]) -> list[Any]:
+        total = sum(m.total_s for m in items)
+        return label + [
+            len(items),
+            round(total, 1),
+            round(sum(m.wait_s for m in items), 1),
+            round(sum(m.compute_s for m in items), 1),
+            round(total / len(items), 2),
+            sum(m.n_obs for m in items),
+        ]
+
+    metric_headers = ["tasks", "total s", "wait s", "compute s", "s/task", "n_obs"]
+    ds_rows = sorted(
+        (_row([name], items) for name, items in by_dataset.items()),
+        key=lambda r: r[2], reverse=True,
+    )
+    batch_rows = sorted(
+        (_row([name, batch], items) for (name, batch), items in by_batch.items()),
+        key=lambda r: r[3], reverse=True,
+    )[:top]
+    return (
+        "Slowest datasets\n"
+        + tabulate(ds_rows, headers=["dataset"] + metric_headers)
+        + f"\n\nSlowest batches (top {top})\n"
+        + tabulate(batch_rows, headers=["dataset", "batch"] + metric_headers)
+    )
+
+
+def export_run_telemetry(
+    data_directory: Path,
+    batch_sizes: Optional[dict[str, int]] = None,
+    driver_peak_rss_bytes: int = 0,
+    run_wall_s: float = 0.0,
+) -> Optional[Path]:
+    """Export telemetry for every results file of a finished run.
+
+    Writes ``<data_directory>/telemetry/tasks.jsonl`` (rewritten, not
+    appended, so repeated runs do not duplicate records), the Prometheus
+    text file and the run measurements next to it.
+
+    Returns
+    -------
+    Path or None
+        The JSON Lines path, or None when no results file was found.
+    """
+    results_dir = Path(data_directory) / "results"
+    results_files = sorted(
+        p for p in results_dir.glob("results_*.json") if "_per_bins" not in p.name
+    ) if results_dir.is_dir() else []
+    if not results_files:
+        return None
+
+    out_dir = Path(data_directory) / TELEMETRY_DIRNAME
+    recorder = TelemetryRecorder(out_dir)
+    recorder.jsonl_path.unlink(missing_ok=True)
+    records = []
+    for results_path in results_files:
+        records.extend(metrics_from_results(results_path, batch_sizes))
+    recorder.record_many(records)
+    _write_run_metrics(out_dir, records, driver_peak_rss_bytes, run_wall_s)
+    return recorder.jsonl_path
+
+
+def _write_run_metrics(
+    out_dir: Path, records: list[TaskMetrics], driver_peak_rss_bytes: int, run_wall_s: float
+) -> None:
+    run = {"driver_peak_rss_bytes": int(driver_peak_rss_bytes), "run_wall_s": float(run_wall_s)}
+    (out_dir / RUN_JSON).write_text(json.dumps(run), encoding="utf-8")
+    write_prometheus(
+        records,
+        out_dir / PROMETHEUS_FILE,
+        run_metrics={
+            "dc1_driver_peak_rss_bytes": driver_peak_rss_bytes,
+            "dc1_run_wall_seconds": round(run_wall_s, 3),
+        },
+    )
+
+
+def merge_unit_telemetry(unit_dirs: Iterable[Path], data_directory: Path) -> Optional[Path]:
+    """Combine the telemetry of work units into ``<data_directory>/telemetry/``.
+
+    Each unit numbers the batches of a dataset from 0, so batches are
+    renumbered after those of the previous units; records keep their unit in
+    ``extra["unit"]``.  The driver peak RSS is the largest of the units and
+    the wall time their sum.
+
+    Returns
+    -------
+    Path or None
+        The JSON Lines path, or None when no unit has telemetry.
+    """
+    records: list[TaskMetrics] = []
+    offsets: dict[str, int] = {}
+    peak_rss, wall_s = 0, 0.0
+    for unit_dir in unit_dirs:
+        telemetry_dir = Path(unit_dir) / TELEMETRY_DIRNAME
+        if not (telemetry_dir / TASKS_JSONL).is_file():
+            continue
+        unit_records = load_jsonl(telemetry_dir / TASKS_JSONL)
+        next_offsets = dict(offsets)
+        for m in unit_records:
+            if m.batch is not None:
+                m.batch += offsets.get(m.dataset, 0)
+                next_offsets[m.dataset] = max(next_offsets.get(m.dataset, 0), m.batch + 1)
+            m.extra = {**m.extra, "unit": Path(unit_dir).name}
+        offsets = next_offsets
+        records.extend(unit_records)
+        try:
+            run = json.loads((telemetry_dir / RUN_JSON).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            run = {}
+        peak_rss = max(peak_rss, int(run.get("driver_peak_rss_bytes") or 0))
+        wall_s += float(run.get("run_wall_s") or 0.0)
+    if not records:
+        return None
+
+    out_dir = Path(data_directory) / TELEMETRY_DIRNAME
+    recorder = TelemetryRecorder(out_dir)
+    recorder.jsonl_path.unlink(missing_ok=True)
+    recorder.record_many(records)
+    _write_run_metrics(out_dir, records, peak_rss, wall_s)
+    return recorder.jsonl_path
@@ -27,6 +27,7 @@ import subprocess
 import sys
 import warnings
 from pathlib import Path
+from typing import Optional
 
 # Ensure the repository root is importable when running as a script.
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -215,12 +216,118 @@ def _add_common_args(parser: argparse.ArgumentParser) -> None:
         default=0.10,
         help="Maximum NaN fraction per variable (0-1, default 0.10).",
     )
+    parser.add_argument(
+        "--scan-workers",
+        type=int,
+        default=16,
+        help="Stores opened concurrently when scanning a directory/glob submission (default 16).",
+    )
+    parser.add_argument(
+        "--max-grid-mismatches",
+        type=int,
+        default=1,
+        help=(
+            "Stop the metadata scan once this many stores are not on the DC1 "
+            "target grid (0 = scan everything, default 1)."
+        ),
+    )
+
+
+def _scan_submission(args: argparse.Namespace):
+    """Concurrently read the metadata of a directory/glob submission.
+
+    Returns None for single-store submissions.
+    """
+    from dc1.evaluation.submission_scan import (
+        INDEX_FILENAME,
+        SubmissionIndex,
+        expand_submission_paths,
+        scan_submission,
+    )
+    from dc1.evaluation.submission_writer import DC1_LAT, DC1_LON
+
+    paths = expand_submission_paths(args.data_path)
+    if len(paths) <= 1:
+        return None
+    # Written by dc1.evaluation.submission_writer from the in-memory forecasts.
+    written_index = Path(args.data_path) / INDEX_FILENAME
+    if written_index.is_file():
+        try:
+            index = SubmissionIndex.load(written_index)
+        except (ValueError, KeyError, TypeError):
+            index = None
+        if (
+            index is not None
+            and index.is_fresh()
+            and sorted(os.path.abspath(s.path) for s in index.stores)
+            == sorted(os.path.abspath(p) for p in paths)
+        ):
+            print(f"[submit] Reusing {written_index} ({index.summary()})")
+            return index
+    print(f"[submit] Scanning metadata of {len(paths)} stores ({args.scan_workers} concurrent) ...")
+    index = scan_submission(
+        args.data_path,
+        reference_grid={"lat": DC1_LAT, "lon": DC1_LON},
+        max_workers=args.scan_workers,
+        max_grid_mismatches=args.max_grid_mismatches,
+    )
+    for store in index.stores:
+        if store.error:
+            print(f"[submit]   unreadable: {store.path} ({store.error})")
+        elif store.grid_ok is False:
+            print(f"[submit]   grid differs from the DC1 grid: {store.path}")
+    print(f"[submit] {index.summary()}")
+    return index
+
+
+def _index_passes_quick_validation(index) -> bool:
+    """True when the scan index already shows what a quick validation checks.
+
+    Variables, grid and lead times of every store are in the index, so the
+    stores are not opened again by the dctools quick validation.  Problems are
+    printed and leave the decision to dctools.
+    """
+    from dc1.evaluation.submission_writer import index_problems
+
+    if index is None:
+        return False
+    problems = index_problems(index)
+    for problem in problems[:20]:
+        print(f"[submit]   {problem}")
+    if problems:
+        return False
+    print(
+        f"[submit] Quick validation passed from the scan index: {len(index.stores)} stores "
+        "have the DC1 variables, grid and lead times."
+    )
+    return True
+
+
+def _report_validates(args: argparse.Namespace, index) -> bool:
+    """True when the SubmissionWriter report of the submission covers every store."""
+    from dc1.evaluation.submission_writer import REPORT_FILENAME, report_validates
+
+    if not report_validates(index, args.data_path):
+        return False
+    print(
+        f"[submit] Validation skipped: {REPORT_FILENAME} shows that every forecast passed "
+        "when it was written, and no store changed since."
+    )
+    return True
 
 
 def _cmd_validate(args: argparse.Namespace) -> int:
     """Handle the 'validate' command."""
     from dctools.submission import ModelSubmission
 
+    index = _scan_submission(args)
+    if index is not None and index.aborted:
+        print("[submit] Validation stopped: too many stores on a different grid.")
+        return 1
+    save_path = args.output or args.save_report
+    if args.quick and not save_path and _index_passes_quick_validation(index):
+        return 0
+
     sub = ModelSubmission(
         model_name=args.model_name,
         data_path=args.data_path,
@@ -237,7 +344,6 @@ def _cmd_validate(args: argparse.Namespace) -> int:
     print(report.pretty())
 
     # --output is a shorter alias for --save-report
-    save_path = args.output or args.save_report
     if save_path:
         report.save_json(save_path)
         print(f"Report saved to {save_path}")
@@ -249,6 +355,23 @@ def _cmd_run(args: argparse.Namespace) -> int:
     """Handle the 'run' command."""
     from dctools.submission import ModelSubmission
 
+    from dc1.evaluation.submission_scan import INDEX_FILENAME
+
+    index = _scan_submission(args)
+    if index is not None:
+        if index.aborted and not args.force:
+            print("[submit] Submission stopped: too many stores on a different grid "
+                  "(use --force to evaluate anyway).")
+            return 1
+        # Record of the scanned stores, kept with the results.
+        index.save(Path(args.data_directory or "output") / INDEX_FILENAME)
+
+    skip_validation = (
+        args.skip_validation
+        or _report_validates(args, index)
+        or (args.quick_validation and _index_passes_quick_validation(index))
+    )
+
     sub = ModelSubmission(
         model_name=args.model_name,
         data_path=args.data_path,
@@ -263,19 +386,46 @@ def _cmd_run(args: argparse.Namespace) -> int:
 
     exit_code = sub.submit(
         data_directory=args.data_directory,
-        skip_validation=args.skip_validation,
+        skip_validation=skip_validation,
         quick_validation=args.quick_validation,
         force=args.force,
     )
 
     if exit_code == 0 and not args.skip_map_data_pack:
-        _pack_leaderboard_map_data_archive()
+        data_directory = Path(args.data_directory or "output")
+        results_dirs = [
+            PROJECT_ROOT / "dc1" / "leaderboard_results",
+            data_directory / "results",
+        ]
+        _pack_leaderboard_map_data_archive(
+            results_dirs, _result_fingerprints(data_directory, results_dirs)
+        )
 
     return exit_code
 
 
-def _pack_leaderboard_map_data_archive() -> None:
-    """Create docs leaderboard archive if map_data was generated by the run."""
+def _result_fingerprints(data_directory: Path, results_dirs: list[Path]) -> Optional[Path]:
+    """Refresh the leaderboard cache fingerprints; return ``fingerprints.json`` (None on error)."""
+    from dc1.evaluation.leaderboard_cache import FINGERPRINTS_FILE, LeaderboardCache
+
+    cache_dir = data_directory / "leaderboard_cache"
+    try:
+        LeaderboardCache(cache_dir).refresh(results_dirs)
+    except Exception as exc:  # noqa: BLE001 — the cache is an optimisation only
+        print(f"[submit] WARNING: leaderboard cache refresh failed: {exc}")
+        return None
+    return cache_dir / FINGERPRINTS_FILE
+
+
+def _pack_leaderboard_map_data_archive(
+    results_dirs: Optional[list[Path]] = None, fingerprints: Optional[Path] = None
+) -> None:
+    """Create docs leaderboard archive if map_data was generated by the run.
+
+    With *results_dirs*, only the archive members of models whose results
+    changed are recompressed (``pack_map_data.py --incremental``), using the
+    result *fingerprints* of the leaderboard cache when available.
+    """
     map_data_dir = PROJECT_ROOT / "docs" / "source" / "_extra" / "leaderboard" / "map_data"
     pack_script = PROJECT_ROOT / "docs" / "scripts" / "pack_map_data.py"
 
@@ -286,8 +436,16 @@ def _pack_leaderboard_map_data_archive() -> None:
         )
         return
 
+    cmd = [sys.executable, str(pack_script)]
+    if results_dirs:
+        cmd.append("--incremental")
+        for results_dir in results_dirs:
+            cmd.extend(["--results-dir", str(results_dir)])
+        if fingerprints is not None:
+            cmd.extend(["--fingerprints", str(fingerprints)])
+
     print("[submit] Packing leaderboard map data archive ...")
-    result = subprocess.run([sys.executable, str(pack_script)], check=False)
+    result = subprocess.run(cmd, check=False)
     if result.returncode != 0:
         print(
             "[submit] WARNING: map_data archive generation failed. "
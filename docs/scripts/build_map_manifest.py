@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Write map_data/manifest.js listing the map files that exist.
+
+The map viewer (maps.html) derives a file name from the selectors and used to
+probe up to four key formats in turn, each miss being a failed ``<script>``
+request.  With the manifest it resolves the file in a single lookup and only
+requests files that exist.
+
+The manifest is a JSONP-style script setting ``window.MAP_MANIFEST``::
+
+    window.MAP_MANIFEST = {"version": 1, "files": {"<file stem>": [vmin, vmax], ...}};
+
+where ``<file stem>`` is the file name without ``.js`` (the data key with
+``|`` and spaces replaced by ``_``, as computed by ``getFilename()``).
+
+Usage
+-----
+    python docs/scripts/build_map_manifest.py            # write the manifest
+    python docs/scripts/build_map_manifest.py --info     # show stats only
+
+``pack_map_data.py`` calls this before packing, so the archive always ships
+an up-to-date manifest.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+MAP_DATA_DIR = (
+    Path(__file__).resolve().parents[1] / "source" / "_extra" / "leaderboard" / "map_data"
+)
+MANIFEST_NAME = "manifest.js"
+MANIFEST_VERSION = 1
+
+_CALLBACK_PREFIX = "window._mapDataCallback("
+# vmin / vmax are written after the (large) data array: read the tail only.
+_TAIL_BYTES = 4096
+_RANGE_RE = re.compile(r'"(vmin|vmax)"\s*:\s*(-?[\d.eE+-]+|null|NaN)')
+
+
+def _value_range(path: Path) -> list[float | None]:
+    with open(path, "rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        fh.seek(max(0, fh.tell() - _TAIL_BYTES))
+        tail = fh.read().decode("utf-8", errors="replace")
+    found = dict(_RANGE_RE.findall(tail))
+    if "vmin" not in found or "vmax" not in found:
+        # Unusual key order: fall back to parsing the whole payload.
+        text = path.read_text(encoding="utf-8").strip()
+        if text.startswith(_CALLBACK_PREFIX):
+            text = text[len(_CALLBACK_PREFIX):].rstrip(";").rstrip(")")
+        payload = json.loads(text)
+        found = {k: payload.get(k) for k in ("vmin", "vmax")}
+    return [_to_float(found.get("vmin")), _to_float(found.get("vmax"))]
+
+
+def _to_float(value) -> float | None:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return round(value, 6) if value == value else None
+
+
+def build_manifest(map_data_dir: Path = MAP_DATA_DIR) -> dict:
+    """Collect the stem and value range of every map file."""
+    files = {}
+    for path in sorted(map_data_dir.glob("*.js")):
+        if path.name == MANIFEST_NAME:
+            continue
+        try:
+            files[path.stem] = _value_range(path)
+        except (OSError, ValueError) as exc:
+            print(f"  WARNING: skipped {path.name}: {exc}", file=sys.stderr)
+    return {"version": MANIFEST_VERSION, "files": files}
+
+
+def write_manifest(map_data_dir: Path = MAP_DATA_DIR) -> tuple[Path, int]:
+    """Write ``manifest.js``; the file is left untouched when unchanged.
+
+    Returns the manifest path and the number of listed files.
+    """
+    manifest = build_manifest(map_data_dir)
+    content = (
+        "window.MAP_MANIFEST = "
+        + json.dumps(manifest, separators=(",", ":"), sort_keys=True)
+        + ";\n"
+    )
+    target = map_data_dir / MANIFEST_NAME
+    if not target.is_file() or target.read_text(encoding="utf-8") != content:
+        tmp = target.with_suffix(".js.tmp")
+        tmp.write_text(content, encoding="utf-8")
+        os.replace(tmp, target)
+    return target, len(manifest["files"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write map_data/manifest.js")
+    parser.add_argument("--info", action="store_true", help="Print stats without writing")
+    args = parser.parse_args()
+
+    if not MAP_DATA_DIR.is_dir():
+        print(f"ERROR: {MAP_DATA_DIR} does not exist.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.info:
+        manifest = build_manifest()
+        print(f"Map files: {len(manifest['files'])}")
+        return
+
+    target, n_files = write_manifest()
+    print(f"Manifest: {n_files} files -> {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,26 @@ Usage
 -----
     python docs/scripts/pack_map_data.py            # create archive
     python docs/scripts/pack_map_data.py --info      # show stats only
+    python docs/scripts/pack_map_data.py --incremental --results-dir dc1_output/results
+    python docs/scripts/pack_map_data.py --incremental --results-dir dc1_output/results \
+        --fingerprints dc1_output/leaderboard_cache/fingerprints.json
 
 The archive is written to:
     docs/source/_extra/leaderboard/map_data.tar.gz
 
+``map_data/manifest.js`` (see build_map_manifest.py) is refreshed first so the
+archive always ships a manifest matching its files.
+
+With ``--incremental`` map files are grouped per model and each group is
+compressed into its own gzip member, cached under ``docs/.map_data_cache/``.  A group is only
+recompressed when its fingerprint changes: the names and contents of its map
+files, combined with the fingerprint of the model's result files when
+``--results-dir`` is given (read from the ``fingerprints.json`` of the
+leaderboard cache with ``--fingerprints``).  The archive is the concatenation of
+the cached members: a multi-member gzip stream holding one continuous tar
+stream, which ``tar xzf`` and Python's ``tarfile`` read like any other
+archive.
+
 It is then uploaded to a GitHub Release via the GitHub Actions workflow
 (.github/workflows/docs.yml) and downloaded by ReadTheDocs during its
 pre-build step (see .readthedocs.yaml).
@@ -17,24 +33,200 @@ pre-build step (see .readthedocs.yaml).
 from __future__ import annotations
 
 import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
 import sys
 import tarfile
 from pathlib import Path
 
+from build_map_manifest import write_manifest
+
 LEADERBOARD_DIR = Path(__file__).resolve().parents[1] / "source" / "_extra" / "leaderboard"
 MAP_DATA_DIR = LEADERBOARD_DIR / "map_data"
 ARCHIVE_PATH = LEADERBOARD_DIR / "map_data.tar.gz"
+# Kept outside _extra/ so Sphinx does not publish it with the site.
+CACHE_DIR = Path(__file__).resolve().parents[1] / ".map_data_cache"
+
+# Group for map files that do not belong to a known model (e.g. manifests).
+SHARED_GROUP = "_shared"
+_BLOCK = tarfile.BLOCKSIZE
+
+
+def _model_names(results_dirs: list[Path]) -> list[str]:
+    models = set()
+    for results_dir in results_dirs:
+        if results_dir.is_dir():
+            models.update(p.stem[len("results_"):] for p in results_dir.glob("results_*.json"))
+    return sorted(models)
+
+
+def _group_files(
+    files: list[Path], models: list[str], map_data_dir: Path = MAP_DATA_DIR
+) -> dict[str, list[Path]]:
+    """Group map files by model name prefix (longest match wins)."""
+    prefixes = sorted(models, key=len, reverse=True)
+    groups: dict[str, list[Path]] = {}
+    for f in files:
+        rel = f.relative_to(map_data_dir).as_posix()
+        group = next((m for m in prefixes if rel.startswith(f"{m}_")), None)
+        if group is None:
+            # Without a results directory, assume model names contain no "_".
+            group = rel.split("_", 1)[0] if not models and "_" in rel else SHARED_GROUP
+        groups.setdefault(group, []).append(f)
+    return groups
+
+
+def _results_fingerprint(results_dirs: list[Path], model: str) -> str | None:
+    digest = hashlib.sha256()
+    found = False
+    for results_dir in results_dirs:
+        for path in (
+            results_dir / f"results_{model}.json",
+            results_dir / f"results_{model}_per_bins.jsonl.gz",
+        ):
+            if path.is_file():
+                found = True
+                digest.update(path.name.encode())
+                with open(path, "rb") as fh:
+                    for chunk in iter(lambda: fh.read(1 << 20), b""):
+                        digest.update(chunk)
+    return digest.hexdigest() if found else None
+
+
+def _files_fingerprint(files: list[Path], map_data_dir: Path = MAP_DATA_DIR) -> str:
+    """SHA-256 over the names and contents of *files*.
+
+    Content rather than modification times: the map files are rewritten by
+    every leaderboard build, mostly with identical bytes, and hashing them is
+    far cheaper than recompressing them.
+    """
+    digest = hashlib.sha256()
+    for f in files:
+        digest.update(f"{f.relative_to(map_data_dir).as_posix()}\n".encode())
+        with open(f, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_fragment(files: list[Path], target: Path, map_data_dir: Path = MAP_DATA_DIR) -> None:
+    """Write tar members for *files* (no end-of-archive marker) as one gzip member."""
+    tmp = target.with_suffix(target.suffix + ".tmp")
+    with gzip.open(tmp, "wb", compresslevel=6) as gz:
+        for f in files:
+            info = tarfile.TarInfo(f"map_data/{f.relative_to(map_data_dir).as_posix()}")
+            st = f.stat()
+            info.size = st.st_size
+            info.mtime = int(st.st_mtime)
+            info.mode = 0o644
+            gz.write(info.tobuf(tarfile.GNU_FORMAT, "utf-8", "surrogateescape"))
+            with open(f, "rb") as src:
+                shutil.copyfileobj(src, gz)
+            remainder = st.st_size % _BLOCK
+            if remainder:
+                gz.write(b"\0" * (_BLOCK - remainder))
+    os.replace(tmp, target)
+
+
+def pack_full(
+    map_data_dir: Path = MAP_DATA_DIR,
+    archive_path: Path = ARCHIVE_PATH,
+    progress_every: int = 2000,
+) -> int:
+    """Compress every file of *map_data_dir* into *archive_path*; return the file count."""
+    files = sorted(p for p in map_data_dir.rglob("*") if p.is_file())
+    with tarfile.open(archive_path, "w:gz", compresslevel=6) as tar:
+        for i, f in enumerate(files, 1):
+            tar.add(f, arcname=f"map_data/{f.relative_to(map_data_dir).as_posix()}")
+            if progress_every and i % progress_every == 0:
+                print(f"  {i}/{len(files)} ...")
+    return len(files)
+
+
+def pack_incremental(
+    results_dirs: list[Path],
+    map_data_dir: Path = MAP_DATA_DIR,
+    archive_path: Path = ARCHIVE_PATH,
+    cache_dir: Path = CACHE_DIR,
+    fingerprints: dict[str, str] | None = None,
+) -> tuple[list[str], list[str]]:
+    """Rebuild the archive from cached per-model members.
+
+    *fingerprints* maps models to the fingerprint of their result files (as
+    written by the leaderboard cache); models missing from it are hashed here.
+
+    Returns:
+        tuple: All groups of the archive and the groups recompressed.
+    """
+    files = sorted(p for p in map_data_dir.rglob("*") if p.is_file())
+    groups = _group_files(files, _model_names(results_dirs), map_data_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index_path = cache_dir / "index.json"
+    index = json.loads(index_path.read_text()) if index_path.is_file() else {}
+
+    rebuilt = []
+    for group, group_files in sorted(groups.items()):
+        names_fp = _files_fingerprint(group_files, map_data_dir)
+        results_fp = None
+        if group != SHARED_GROUP:
+            results_fp = (fingerprints or {}).get(group) or _results_fingerprint(
+                results_dirs, group
+            )
+        # Map files can change without the results (e.g. a new leaderboard
+        # config), so their content fingerprint is always part of the key.
+        key = f"{results_fp}|{names_fp}" if results_fp else names_fp
+        fragment = cache_dir / f"{group}.tar.gz"
+        if index.get(group) == key and fragment.is_file():
+            continue
+        _write_fragment(group_files, fragment, map_data_dir)
+        index[group] = key
+        rebuilt.append(group)
+
+    for stale in sorted(set(index) - set(groups)):
+        (cache_dir / f"{stale}.tar.gz").unlink(missing_ok=True)
+        del index[stale]
+    index_path.write_text(json.dumps(index, indent=1))
+
+    end_member = cache_dir / "_end.tar.gz"
+    if not end_member.is_file():
+        with gzip.open(end_member, "wb") as gz:
+            gz.write(b"\0" * (2 * _BLOCK))
+
+    tmp = archive_path.with_suffix(".gz.tmp")
+    with open(tmp, "wb") as out:
+        for group in sorted(groups):
+            with open(cache_dir / f"{group}.tar.gz", "rb") as src:
+                shutil.copyfileobj(src, out)
+        with open(end_member, "rb") as src:
+            shutil.copyfileobj(src, out)
+    os.replace(tmp, archive_path)
+    return sorted(groups), rebuilt
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Pack map_data into tar.gz")
     parser.add_argument("--info", action="store_true", help="Print stats without creating archive")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse cached per-model archive members whose fingerprint is unchanged")
+    parser.add_argument("--results-dir", action="append", default=[], metavar="DIR",
+                        help="Results directory used to group files and fingerprint models "
+                             "(repeatable)")
+    parser.add_argument("--fingerprints", type=str, default=None, metavar="JSON",
+                        help="fingerprints.json of the leaderboard cache (model -> result "
+                             "fingerprint), used instead of re-hashing the result files")
     args = parser.parse_args()
 
     if not MAP_DATA_DIR.is_dir():
         print(f"ERROR: {MAP_DATA_DIR} does not exist.", file=sys.stderr)
         sys.exit(1)
 
+    if not args.info:
+        manifest_path, n_listed = write_manifest(MAP_DATA_DIR)
+        print(f"Manifest: {n_listed} map files listed in {manifest_path.name}")
+
     files = sorted(p for p in MAP_DATA_DIR.rglob("*") if p.is_file())
     total_size = sum(f.stat().st_size for f in files)
     print(f"Files:    {len(files)}")
@@ -47,17 +239,21 @@ def main() -> None:
             print("Archive:  not yet created")
         return
 
-    print(f"Compressing to {ARCHIVE_PATH} ...")
-    with tarfile.open(ARCHIVE_PATH, "w:gz", compresslevel=6) as tar:
-        for i, f in enumerate(files, 1):
-            arcname = f"map_data/{f.relative_to(MAP_DATA_DIR).as_posix()}"
-            tar.add(f, arcname=arcname)
-            if i % 2000 == 0:
-                print(f"  {i}/{len(files)} ...")
-
-    archive_size = ARCHIVE_PATH.stat().st_size
-    ratio = total_size / archive_size if archive_size else 0
-    print(f"Done: {archive_size / 1e6:.1f} MB  (ratio {ratio:.1f}x)")
+    if args.incremental:
+        fingerprints = (
+            json.loads(Path(args.fingerprints).read_text()) if args.fingerprints else None
+        )
+        groups, rebuilt = pack_incremental(
+            [Path(d) for d in args.results_dir], fingerprints=fingerprints
+        )
+        print(f"Groups:   {len(groups)} ({len(rebuilt)} recompressed: {', '.join(rebuilt) or 'none'})")
+        print(f"Done: {ARCHIVE_PATH.stat().st_size / 1e6:.1f} MB")
+    else:
+        print(f"Compressing to {ARCHIVE_PATH} ...")
+        pack_full()
+        archive_size = ARCHIVE_PATH.stat().st_size
+        ratio = total_size / archive_size if archive_size else 0
+        print(f"Done: {archive_size / 1e6:.1f} MB  (ratio {ratio:.1f}x)")
     print(f"\nNext steps:")
     print(f"  1. Stage for git (tracked via git-lfs):")
     print(f"     git add {ARCHIVE_PATH}")
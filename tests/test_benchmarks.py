@@ -0,0 +1,120 @@
+"""Tests for the benchmark inputs and the map_data packing script they time."""
+
+import sys
+import tarfile
+from pathlib import Path
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "docs" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import pack_map_data  # type: ignore[import-not-found]  # noqa: E402
+
+from benchmarks.run_benchmarks import _interpolation, _metric_kernels, compare  # noqa: E402
+from benchmarks.synthetic import (  # noqa: E402
+    make_prediction,
+    make_references,
+    write_per_bins,
+    write_submission,
+)
+from dc1.evaluation.map_cube import read_per_bins  # noqa: E402
+from dc1.evaluation.submission_scan import scan_submission  # noqa: E402
+from dc1.evaluation.submission_writer import SubmissionSpec, validate_forecast  # noqa: E402
+
+
+def _members(archive: Path) -> dict[str, bytes]:
+    members = {}
+    with tarfile.open(archive, "r:gz") as tar:
+        for member in tar.getmembers():
+            fh = tar.extractfile(member)
+            if fh is not None:
+                members[member.name] = fh.read()
+    return members
+
+
+def test_synthetic_forecast_passes_validation():
+    """The synthetic forecast is a valid DC1 forecast on its sub-sampled grid."""
+    ds = make_prediction(scale=8)
+    spec = SubmissionSpec(lat=ds["lat"].values, lon=ds["lon"].values)
+    result = validate_forecast(ds, "2024-01-03", spec)
+    assert result.passed, result.errors
+    assert 0 < result.nan_fraction["zos"] < 0.1
+
+
+def test_synthetic_references_cover_every_support():
+    """Gridded, along-track, swath and profile references are generated for a forecast."""
+    ds = make_prediction(scale=8)
+    refs = make_references(ds, scale=8)
+    assert refs.gridded["zos"].shape == ds["zos"].shape
+    assert refs.n_obs == len(refs.along_track) + refs.swath["ssha_filtered"].size + 100
+    assert refs.along_track["lat"].abs().max() <= 66.0
+
+
+def test_backend_benchmarks_time_or_skip():
+    """Interpolation and metric kernels are timed when their backend is installed."""
+    ds = make_prediction(scale=16)
+    refs = make_references(ds, scale=16)
+    for bench in (_interpolation, _metric_kernels):
+        timing = bench(ds, refs, 1)
+        assert "skipped" in timing or timing["repeat"] == 1
+
+
+def test_synthetic_submission_is_scanned(tmp_path):
+    """Every written store is read and shares the grid of the first one."""
+    paths = write_submission(tmp_path / "sub", n_dates=3, scale=16)
+    index = scan_submission(str(tmp_path / "sub"), max_grid_mismatches=0)
+    assert index.ok
+    assert [s.init_date for s in index.stores] == ["2024-01-03", "2024-01-10", "2024-01-17"]
+    assert len(paths) == 3
+
+
+def test_synthetic_per_bins_are_read_per_reference(tmp_path):
+    """The per-bins file holds a gridded (rmsd) and an along-track (rmse) reference."""
+    path = write_per_bins(tmp_path / "results_m_per_bins.jsonl.gz", n_frts=1, resolution=10.0)
+    refs = read_per_bins(path)
+    assert sorted(refs) == ["glorys", "jason3"]
+    assert ("zos", "rmsd") in refs["glorys"].arrays and ("zos", "rmse") in refs["jason3"].arrays
+    assert len(refs["glorys"].arrays) == 5
+
+
+def _map_data(root: Path) -> Path:
+    map_data = root / "map_data"
+    map_data.mkdir(parents=True)
+    for model in ("modela", "modelb"):
+        for lead in range(3):
+            (map_data / f"{model}_glorys_zos_rmsd_{lead}.js").write_text(f"{model}{lead}")
+    return map_data
+
+
+def test_incremental_archive_matches_full_archive(tmp_path):
+    """The concatenated per-model members read back like a single tar.gz."""
+    map_data = _map_data(tmp_path)
+    full, incremental = tmp_path / "full.tar.gz", tmp_path / "incremental.tar.gz"
+    assert pack_map_data.pack_full(map_data, full, progress_every=0) == 6
+    groups, rebuilt = pack_map_data.pack_incremental(
+        [], map_data, incremental, tmp_path / "cache"
+    )
+    assert groups == rebuilt == ["modela", "modelb"]
+    assert _members(incremental) == _members(full)
+
+
+def test_incremental_repack_recompresses_changed_model_only(tmp_path):
+    """Only the group whose files changed is recompressed."""
+    map_data = _map_data(tmp_path)
+    archive, cache = tmp_path / "map_data.tar.gz", tmp_path / "cache"
+    pack_map_data.pack_incremental([], map_data, archive, cache)
+    (map_data / "modelb_glorys_zos_rmsd_1.js").write_text("changed!")
+    _, rebuilt = pack_map_data.pack_incremental([], map_data, archive, cache)
+    assert rebuilt == ["modelb"]
+    assert _members(archive)["map_data/modelb_glorys_zos_rmsd_1.js"] == b"changed!"
+
+
+def test_compare_flags_regressions_and_ignores_skipped():
+    """Slowdowns above the threshold are counted; skipped benchmarks are ignored."""
+    baseline = {"meta": {"commit": "old"}, "results": {"small": {
+        "a": {"min_s": 1.0}, "b": {"min_s": 1.0}, "c": {"skipped": "no dctools"},
+    }}}
+    current = {"meta": {}, "results": {"small": {
+        "a": {"min_s": 1.5}, "b": {"min_s": 1.1}, "c": {"min_s": 9.0},
+    }}}
+    assert compare(current, baseline, threshold=0.2) == 1
@@ -0,0 +1,181 @@
+"""Tests for the resume journal of plain, sharded and progressive runs."""
+
+import gzip
+import json
+from datetime import date
+
+import pytest
+
+from dc1.evaluation.journal import STATUS_FAILED, TaskJournal, journal_results
+from dc1.evaluation.sharding import (
+    WorkUnit,
+    merge_shard_results,
+    resume_units,
+    run_pending_units,
+    task_keys,
+    unit_directory,
+)
+
+
+def _units(n):
+    return [
+        WorkUnit("glonet", "glorys", date(2024, 1, 1 + 7 * k), date(2024, 1, 8 + 7 * k))
+        for k in range(n)
+    ]
+
+
+def _runner(data_directory, calls, fail=()):
+    def run(unit):
+        calls.append(unit.unit_id)
+        if unit.unit_id in fail:
+            return 2
+        results = unit_directory(data_directory, unit) / "results"
+        results.mkdir(parents=True, exist_ok=True)
+        (results / "results_glonet.json").write_text(json.dumps({"unit": unit.unit_id}))
+        return 0
+    return run
+
+
+def test_restart_skips_units_with_intact_results(tmp_path):
+    """Only units not journaled as done (or whose results changed) run again."""
+    units = _units(3)
+    journal_path = tmp_path / "journal.jsonl"
+    calls: list[str] = []
+    with TaskJournal(journal_path) as journal:
+        assert run_pending_units(units, _runner(tmp_path, calls), journal, tmp_path) == 0
+    assert calls == [u.unit_id for u in units]
+
+    # Tamper with one result file: its checksum no longer matches.
+    tampered = unit_directory(tmp_path, units[1]) / "results" / "results_glonet.json"
+    tampered.write_text("{}")
+    calls.clear()
+    with TaskJournal(journal_path) as journal:
+        run_pending_units(units, _runner(tmp_path, calls), journal, tmp_path)
+    assert calls == [units[1].unit_id]
+
+
+def test_failed_units_are_journaled_and_retried_alone(tmp_path):
+    """A failing unit is recorded as failed; retry_failed_only re-runs just it."""
+    units = _units(3)
+    journal_path = tmp_path / "journal.jsonl"
+    calls: list[str] = []
+    with TaskJournal(journal_path) as journal:
+        code = run_pending_units(
+            units[:2], _runner(tmp_path, calls, fail={units[1].unit_id}), journal, tmp_path
+        )
+    assert code == 2
+    with TaskJournal(journal_path) as journal:
+        assert journal.failed() == {units[1].unit_id}
+        calls.clear()
+        run_pending_units(units, _runner(tmp_path, calls), journal, tmp_path,
+                          retry_failed_only=True)
+    assert calls == [units[1].unit_id]
+
+
+def test_exception_is_journaled_as_failure(tmp_path):
+    """A unit raising is recorded as failed before the exception propagates."""
+    unit = _units(1)[0]
+
+    def boom(_unit):
+        raise RuntimeError("cluster lost")
+
+    with TaskJournal(tmp_path / "journal.jsonl") as journal:
+        with pytest.raises(RuntimeError):
+            run_pending_units([unit], boom, journal, tmp_path)
+    with TaskJournal(tmp_path / "journal.jsonl") as journal:
+        assert journal.failed() == {unit.unit_id}
+
+
+def test_torn_last_line_is_ignored_and_terminated(tmp_path):
+    """A partial line left by a crash is skipped and the next record starts cleanly."""
+    path = tmp_path / "journal.jsonl"
+    path.write_text(json.dumps({"key": "a", "status": "ok"}) + '\n{"key": "b", "sta')
+    with TaskJournal(path) as journal:
+        assert set(journal.completed()) == {"a"}
+        journal.record("c", STATUS_FAILED, error="x")
+    with TaskJournal(path) as journal:
+        assert set(journal.completed()) == {"a"} and journal.failed() == {"c"}
+    assert path.read_text().count("\n") == 3
+
+
+def test_close_releases_the_file_handle(tmp_path):
+    """Closing twice is harmless and leaves no handle open."""
+    journal = TaskJournal(tmp_path / "journal.jsonl")
+    journal.close()
+    journal.close()
+    assert journal._fh.closed
+
+
+def _results(path, entries):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"results": {"glonet": entries}}))
+    return path
+
+
+def _entry(ref, frt, lead, rmse=1.0):
+    return {
+        "ref_alias": ref,
+        "forecast_reference_time": f"{frt}T00:00:00",
+        "lead_time": lead,
+        "result": rmse,
+    }
+
+
+def test_tasks_are_journaled_and_verified_per_entry(tmp_path):
+    """Each (reference, FRT, lead) task is done while its own entry is intact."""
+    config = {"start_time": "2024-01-01", "end_time": "2024-01-15", "n_days_forecast": 2}
+    tasks = task_keys(config, {"glonet": ["glorys", "jason3"]})
+    keys = [key for pair_keys in tasks.values() for key in pair_keys]
+    assert len(keys) == 2 * 2 * 2  # references x FRTs (Jan 3, Jan 10) x leads
+    results = _results(
+        tmp_path / "results" / "results_glonet.json",
+        [_entry("glorys", frt, lead) for frt in ("2024-01-03", "2024-01-10") for lead in (0, 1)],
+    )
+    with TaskJournal(tmp_path / "journal.jsonl") as journal:
+        # A clean run: jason3 had no data, so its tasks are done without entries.
+        assert journal_results(journal, results, keys, complete=True) == 4
+        assert journal.pending(keys) == []
+
+    data = json.loads(results.read_text())
+    data["results"]["glonet"][3]["result"] = 2.0  # glorys, Jan 10, lead 1
+    results.write_text(json.dumps(data))
+    with TaskJournal(tmp_path / "journal.jsonl") as journal:
+        assert journal.pending(keys) == ["glonet|glorys|2024-01-10|1"]
+
+
+def test_failed_run_leaves_tasks_without_entries_to_retry(tmp_path):
+    """After a failed run, tasks without an entry are journaled as failed."""
+    keys = ["glonet|glorys|2024-01-03|0", "glonet|glorys|2024-01-03|1"]
+    results = _results(tmp_path / "results_glonet.json", [_entry("glorys", "2024-01-03", 0)])
+    with TaskJournal(tmp_path / "journal.jsonl") as journal:
+        journal_results(journal, results, keys, complete=False)
+        assert journal.failed() == {keys[1]}
+        assert journal.pending(keys, retry_failed_only=True) == [keys[1]]
+
+
+def test_resume_units_group_consecutive_pending_frts():
+    """Pending FRTs of a reference form units of consecutive FRTs only."""
+    config = {"start_time": "2024-01-01", "end_time": "2024-02-15", "n_days_forecast": 2}
+    frts = [date(2024, 1, 3), date(2024, 1, 10), date(2024, 1, 24), date(2024, 1, 31)]
+    units = resume_units(config, [("glonet", "glorys", frt) for frt in frts])
+    assert [(u.start, u.end) for u in units] == [
+        (date(2024, 1, 3), date(2024, 1, 10)),
+        (date(2024, 1, 24), date(2024, 1, 31)),
+    ]
+
+
+def test_merge_into_existing_results_keeps_their_per_bins(tmp_path):
+    """A resumed run merges its units into the results directory it reads from."""
+    _results(tmp_path / "results" / "results_glonet.json", [_entry("glorys", "2024-01-03", 0)])
+    unit = tmp_path / "shards" / "u"
+    _results(unit / "results" / "results_glonet.json", [_entry("glorys", "2024-01-10", 0)])
+    for directory, payload in ((tmp_path, b"a\n"), (unit, b"b\n")):
+        with gzip.open(directory / "results" / "results_glonet_per_bins.jsonl.gz", "wb") as fh:
+            fh.write(payload)
+
+    written = merge_shard_results(tmp_path, unit_dirs=[tmp_path, unit])
+    merged = json.loads(written[0].read_text())["results"]["glonet"]
+    assert [e["forecast_reference_time"][:10] for e in merged] == ["2024-01-03", "2024-01-10"]
+    per_bins = tmp_path / "results" / "results_glonet_per_bins.jsonl.gz"
+    with gzip.open(per_bins, "rb") as fh:
+        assert fh.read() == b"a\nb\n"
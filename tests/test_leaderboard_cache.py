@@ -0,0 +1,95 @@
+"""Tests for the per-model result fingerprints and their use by the map archive."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "docs" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import pack_map_data  # type: ignore[import-not-found]  # noqa: E402
+
+from dc1.evaluation.leaderboard_cache import (  # noqa: E402
+    FINGERPRINTS_FILE,
+    LeaderboardCache,
+)
+
+
+def _write_results(results_dir: Path, model: str, rmsd: float, bias: float) -> None:
+    results_dir.mkdir(parents=True, exist_ok=True)
+    entries = [
+        {
+            "ref_alias": "glorys",
+            "lead_time": lead,
+            "result": [
+                {"Variable": "zos", "Metric": "rmsd", "Value": rmsd + lead},
+                {"Variable": "zos", "Metric": "bias", "Value": bias},
+                {"Variable": "zos", "Metric": "count", "Value": 10},
+            ],
+        }
+        for lead in range(2)
+    ]
+    (results_dir / f"results_{model}.json").write_text(json.dumps({"results": {model: entries}}))
+
+
+def test_refresh_reports_changed_models_only(tmp_path):
+    """Unchanged models keep their fingerprint; updated and removed ones are handled."""
+    results = tmp_path / "results"
+    _write_results(results, "a", rmsd=1.0, bias=0.5)
+    _write_results(results, "b", rmsd=2.0, bias=-0.1)
+    cache = LeaderboardCache(tmp_path / "cache")
+    assert cache.refresh([results]) == (["a", "b"], [])
+    assert LeaderboardCache(tmp_path / "cache").refresh([results]) == ([], [])
+
+    _write_results(results, "b", rmsd=0.5, bias=-0.1)
+    (results / "results_a.json").unlink()
+    cache = LeaderboardCache(tmp_path / "cache")
+    assert cache.refresh([results]) == (["b"], ["a"])
+    fingerprints = json.loads((tmp_path / "cache" / FINGERPRINTS_FILE).read_text())
+    assert list(fingerprints) == ["b"]
+
+
+def test_touched_results_keep_their_fingerprint(tmp_path):
+    """Results rewritten with the same bytes are re-hashed but not reported as changed."""
+    results = tmp_path / "results"
+    _write_results(results, "a", rmsd=1.0, bias=0.5)
+    cache = LeaderboardCache(tmp_path / "cache")
+    cache.refresh([results])
+    before = cache.fingerprints()
+    os.utime(results / "results_a.json", ns=(0, 0))
+    assert LeaderboardCache(tmp_path / "cache").refresh([results]) == ([], [])
+    assert json.loads((tmp_path / "cache" / FINGERPRINTS_FILE).read_text()) == before
+
+
+def test_repack_follows_results_and_map_files(tmp_path):
+    """A group is reused while results and map files are unchanged, rebuilt otherwise."""
+    results = tmp_path / "results"
+    _write_results(results, "a", rmsd=1.0, bias=0.5)
+    map_data = tmp_path / "map_data"
+    map_data.mkdir()
+    map_file = map_data / "a_glorys_zos_rmsd_0.js"
+    map_file.write_text("v1")
+    archive, pack_cache = tmp_path / "map_data.tar.gz", tmp_path / "pack_cache"
+    cache = LeaderboardCache(tmp_path / "cache")
+    cache.refresh([results])
+    fingerprints = {m: e["fingerprint"] for m, e in cache.index.items()}
+
+    def repack():
+        return pack_map_data.pack_incremental(
+            [results], map_data, archive, pack_cache, fingerprints=fingerprints
+        )[1]
+
+    assert repack() == ["a"]
+    assert repack() == []
+    # Map files rewritten with the same bytes by a new leaderboard build.
+    map_file.write_text("v1")
+    os.utime(map_file, ns=(0, 0))
+    assert repack() == []
+    # Map files regenerated with the same results (e.g. new display config).
+    map_file.write_text("v2")
+    assert repack() == ["a"]
+    _write_results(results, "a", rmsd=3.0, bias=0.5)
+    cache.refresh([results])
+    fingerprints = {m: e["fingerprint"] for m, e in cache.index.items()}
+    assert repack() == ["a"]
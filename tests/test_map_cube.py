@@ -0,0 +1,103 @@
+"""Tests for the per-FRT map cubes and on-demand snapshots."""
+
+import gzip
+import json
+from pathlib import Path
+
+from dc1.evaluation.map_cube import SnapshotIndex, build_cubes, jsonp, read_per_bins
+
+# No real per-bins sample ships with the repo (map_data.tar.gz is a Git LFS
+# pointer), so the fixture mixes the record shapes the cubes accept: list
+# records on a gridded and an observation reference, and mapping records with
+# a depth next to a surface-only variable.
+ENTRIES = [
+    {
+        "ref_alias": "glorys",
+        "ref_is_observation": False,
+        "forecast_reference_time": "2024-01-03T00:00:00",
+        "lead_time": 0,
+        "per_bins": {
+            "zos": [[0.0, 0.0, 0.5, 3], [10.0, 20.0, 0.25, 1]],
+            "thetao": [
+                {"lat": 0.0, "lon": 0.0, "depth": 0.5, "rmsd": 1.5},
+                {"lat": 10.0, "lon": 20.0, "depth": 100.0, "rmsd": 0.75},
+            ],
+        },
+    },
+    {
+        "ref_alias": "jason3",
+        "ref_is_observation": True,
+        "forecast_reference_time": "2024-01-03T00:00:00",
+        "lead_time": 0,
+        "per_bins": {"zos": [[-20.0, 170.0, 0.125, 2]]},
+    },
+    {
+        "ref_alias": "saral",
+        "forecast_reference_time": "2024-01-03T00:00:00",
+        "lead_time": 0,
+        "per_bins": {"zos": [[-20.0, 170.0, 0.125, 2]]},
+    },
+]
+
+
+def _per_bins(results_dir: Path) -> Path:
+    results_dir.mkdir(parents=True)
+    path = results_dir / "results_m_per_bins.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        fh.writelines(json.dumps(entry) + "\n" for entry in ENTRIES)
+    return path
+
+
+def test_list_records_take_the_metric_of_their_reference(tmp_path):
+    """List records are RMSD against gridded references and RMSE against observations."""
+    refs = read_per_bins(_per_bins(tmp_path / "results"))
+    assert sorted(refs["glorys"].arrays) == [("thetao", "rmsd"), ("zos", "rmsd")]
+    assert sorted(refs["jason3"].arrays) == [("zos", "rmse")]
+    assert sorted(refs["saral"].arrays) == [("zos", "rmse")]
+
+
+def test_surface_variables_keep_their_bins_next_to_depth_variables(tmp_path):
+    """Only variables with depth records get a depth axis in a cube."""
+    _per_bins(tmp_path / "results")
+    build_cubes([tmp_path / "results"], tmp_path / "cubes", resolution=10.0)
+    index = SnapshotIndex(tmp_path / "cubes")
+
+    surface = index.render("m_glorys_zos_rmsd_0_2024-01-03")
+    assert surface is not None
+    assert sorted(cell[4] for cell in surface["data"]) == [0.25, 0.5]
+    assert "m_glorys_thetao_rmsd_0_2024-01-03_100" in index.snapshots
+    assert "m_glorys_zos_rmsd_0_2024-01-03_100" not in index.snapshots
+    deep = index.render("m_glorys_thetao_rmsd_0_2024-01-03_100")
+    assert deep is not None and [cell[4] for cell in deep["data"]] == [0.75]
+
+
+def test_snapshot_range_follows_the_data(tmp_path):
+    """vmin/vmax follow the data, in the tail build_map_manifest reads."""
+    _per_bins(tmp_path / "results")
+    build_cubes([tmp_path / "results"], tmp_path / "cubes", resolution=10.0)
+    index = SnapshotIndex(tmp_path / "cubes")
+    payload = index.render("m_glorys_zos_rmsd_0_2024-01-03")
+    assert payload is not None
+    assert list(payload)[-3:] == ["data", "vmin", "vmax"]
+    assert jsonp(payload).endswith(']],"vmin":0.25,"vmax":0.5});')
+
+
+def test_entries_of_one_slice_are_merged_into_its_chunk(tmp_path):
+    """Entries are written one at a time; a later one of the same slice keeps earlier bins."""
+    results = tmp_path / "results"
+    path = _per_bins(results)
+    extra = {**ENTRIES[0], "per_bins": {"zos": [[-30.0, 40.0, 2.0, 1]]}}
+    later = {**ENTRIES[0], "forecast_reference_time": "2024-01-10T00:00:00", "lead_time": 1}
+    with gzip.open(path, "at", encoding="utf-8") as fh:
+        fh.writelines(json.dumps(entry) + "\n" for entry in (extra, later))
+    build_cubes([results], tmp_path / "cubes", resolution=10.0)
+    index = SnapshotIndex(tmp_path / "cubes")
+
+    merged = index.render("m_glorys_zos_rmsd_0_2024-01-03")
+    assert merged is not None
+    assert sorted(cell[4] for cell in merged["data"]) == [0.25, 0.5, 2.0]
+    assert merged["vmax"] == 2.0
+    assert index.frt_list["glorys"] == ["2024-01-03", "2024-01-10"]
+    # FRTs and lead times without an entry stay empty.
+    empty = index.render("m_glorys_zos_rmsd_1_2024-01-03")
+    assert empty is not None and empty["data"] == []
@@ -0,0 +1,91 @@
+"""Tests for the key resolution of the leaderboard map viewer (maps.html)."""
+
+import json
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+MAPS_HTML = (
+    Path(__file__).resolve().parents[1] / "docs" / "source" / "_extra" / "leaderboard" / "maps.html"
+)
+NODE = shutil.which("node")
+
+# Stand-ins for the DOM and the helpers of maps.html around the tested functions.
+_HARNESS = """
+const shown = [];
+let _selection = null;
+const elements = {};
+const document = {getElementById(id) {
+  return elements[id] || (elements[id] = {value: '', textContent: '', style: {}});
+}};
+const console = {warn() {}, info() {}};
+function _candidateKeys() { return CHAIN; }
+function _currentDepth() { return null; }
+function _currentFrt() { return null; }
+function _cacheGet() { return undefined; }
+function updateColorbar() {}
+function _prefetchNeighbours() {}
+function _fetchKey(key) {
+  return Promise.resolve(AVAILABLE.includes(key) ? {key: key, data: [1]} : null);
+}
+function _showGrid(selection, json) { shown.push(json.key); }
+function _showNoData() { shown.push(null); }
+"""
+
+
+def _function(source: str, name: str) -> str:
+    match = re.search(rf"\n  function {name}\(.*?\n  }}\n", source, re.S)
+    assert match, name
+    return match.group(0)
+
+
+def _load(manifest, chain, available):
+    assert NODE is not None
+    source = MAPS_HTML.read_text(encoding="utf-8")
+    script = "\n".join(
+        [
+            f"const window = {{MAP_MANIFEST: {json.dumps(manifest)}}};",
+            f"const CHAIN = {json.dumps(chain)};",
+            f"const AVAILABLE = {json.dumps(available)};",
+            _HARNESS,
+            *(
+                _function(source, name)
+                for name in (
+                    "_manifestFiles", "_fileStem", "_resolveKey", "loadData", "_loadKeyChain"
+                )
+            ),
+            "loadData();",
+            "setTimeout(() => process.stdout.write(JSON.stringify(shown)), 0);",
+        ]
+    )
+    result = subprocess.run(
+        [NODE, "-e", script], capture_output=True, text=True, check=True, timeout=30
+    )
+    return json.loads(result.stdout)
+
+
+pytestmark = pytest.mark.skipif(NODE is None, reason="node is not installed")
+
+CHAIN = ["m|argo|thetao|rmse|1", "m|observation|thetao|rmse|1", "m|thetao|rmse|1"]
+
+
+def test_manifest_hit_loads_the_listed_key():
+    """A key listed in the manifest is loaded directly."""
+    manifest = {"files": {"m_observation_thetao_rmse_1": [0, 1]}}
+    assert _load(manifest, CHAIN, [CHAIN[1]]) == [CHAIN[1]]
+
+
+def test_manifest_miss_falls_back_to_probing():
+    """Files missing from the manifest are still found by probing the chain."""
+    manifest = {"files": {"other_key": [0, 1]}}
+    assert _load(manifest, CHAIN, [CHAIN[2]]) == [CHAIN[2]]
+
+
+def test_stale_manifest_entry_probes_the_rest_of_the_chain():
+    """A listed file that does not load falls through to the next keys."""
+    manifest = {"files": {"m_argo_thetao_rmse_1": [0, 1]}}
+    assert _load(manifest, CHAIN, [CHAIN[2]]) == [CHAIN[2]]
+    assert _load(manifest, CHAIN, []) == [None]
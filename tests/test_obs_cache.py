@@ -0,0 +1,63 @@
+"""Tests for per-batch observation file planning."""
+
+import pandas as pd
+
+from dc1.evaluation.obs_cache import plan_batch_obs_files, task_window
+
+
+def _catalog():
+    # One file per 12 h, each covering its half day.
+    start = pd.Timestamp("2024-01-01")
+    return [
+        {
+            "path": f"obs_{i:03d}.nc",
+            "date_start": start + pd.Timedelta(hours=12 * i),
+            "date_end": start + pd.Timedelta(hours=12 * i + 11),
+        }
+        for i in range(60)
+    ]
+
+
+def test_task_window_is_centred_on_valid_time():
+    """The window spans the valid time ± the tolerance."""
+    start, end = task_window("2024-01-03", 2, 12)
+    assert start == pd.Timestamp("2024-01-04T12:00")
+    assert end == pd.Timestamp("2024-01-05T12:00")
+
+
+def test_overlapping_frt_windows_share_files():
+    """Lead times of consecutive FRTs hitting the same days load each file once."""
+    tasks = [("2024-01-03", lead) for lead in range(10)] + [
+        ("2024-01-10", lead) for lead in range(3)
+    ]
+    plan = plan_batch_obs_files(tasks, _catalog(), time_tolerance_hours=12)
+
+    per_task = [set(paths) for paths in plan.task_files.values()]
+    assert len(plan.files) == len(set(plan.files)) == len(set().union(*per_task))
+    assert plan.n_requests > len(plan.files)
+    # FRT 2024-01-10 lead 0 is FRT 2024-01-03 lead 7: identical windows.
+    key_a = (pd.Timestamp("2024-01-03"), 7)
+    key_b = (pd.Timestamp("2024-01-10"), 0)
+    assert plan.task_files[key_a] == plan.task_files[key_b]
+    for path in plan.task_files[key_a]:
+        assert {key_a, key_b} <= set(plan.file_tasks[path])
+
+
+def test_plan_matches_brute_force_selection():
+    """The sorted search selects exactly the files intersecting each window."""
+    catalog = _catalog()
+    tasks = [("2024-01-05", lead) for lead in range(4)]
+    plan = plan_batch_obs_files(tasks, pd.DataFrame(catalog), time_tolerance_hours=6)
+    for frt, lead in tasks:
+        start, end = task_window(frt, lead, 6)
+        expected = [
+            e["path"] for e in catalog if e["date_start"] <= end and e["date_end"] >= start
+        ]
+        assert plan.task_files[(pd.Timestamp(frt), lead)] == expected
+
+
+def test_empty_catalog_gives_empty_task_lists():
+    """Tasks are kept, with no files, when the catalog is empty."""
+    plan = plan_batch_obs_files([("2024-01-03", 0)], [], 12)
+    assert plan.files == []
+    assert plan.task_files == {(pd.Timestamp("2024-01-03"), 0): []}
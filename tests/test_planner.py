@@ -0,0 +1,122 @@
+"""Tests for the pre-run memory, disk and cost planner."""
+
+import copy
+from datetime import datetime
+from pathlib import Path
+
+from dc1.evaluation.planner import (
+    GB,
+    MB,
+    auto_adjust,
+    build_plan,
+    check_plan,
+    parse_size,
+    plan_source,
+    task_batch_size,
+)
+
+CONFIG = {
+    "start_time": "2024-01-01",
+    "end_time": "2025-01-01",
+    "n_days_forecast": 10,
+    "n_days_interval": 7,
+    "per_bins_resolution": 2,
+    "skip_frt_snapshots": True,
+    "target_dimensions_surface": {
+        "lat": {"start": -78.0, "stop": 90.0, "step": 0.25},
+        "lon": {"start": -180.0, "stop": 180.0, "step": 0.25},
+    },
+    "sources": [
+        {"dataset": "glonet", "eval_variables": ["zos", "thetao", "so", "uo", "vo"]},
+        {
+            "dataset": "swot", "observation_dataset": True, "obs_batch_size": 60,
+            "n_parallel_workers": 8, "nthreads_per_worker": 4,
+            "memory_limit_per_worker": "4GB", "eval_variables": ["ssha"],
+        },
+        {
+            "dataset": "glorys", "observation_dataset": False, "gridded_batch_size": 12,
+            "n_parallel_workers": 6, "nthreads_per_worker": 2,
+            "memory_limit_per_worker": "4GB", "eval_variables": ["zos", "thetao"],
+        },
+    ],
+}
+REFERENCES = {"glonet": ["swot", "glorys"]}
+
+
+def _plan(config, ram=16 * GB, disk=500 * GB):
+    return build_plan(
+        config, REFERENCES, Path("/nonexistent"), available_ram_bytes=ram, free_disk_bytes=disk
+    )
+
+
+def test_plan_counts_the_real_frts():
+    """The FRT count follows the FRT rule of the run (51 in 2024, not 53 weeks)."""
+    plan = _plan(CONFIG)
+    assert plan.n_frts == 51
+    assert {s.source: s.n_tasks for s in plan.sources} == {"glorys": 510, "swot": 510}
+    assert plan.download_bytes == plan.prediction_bytes + sum(
+        s.download_bytes for s in plan.sources
+    )
+
+
+def test_auto_adjust_fits_every_source_with_its_own_settings():
+    """Each source is replanned with its own settings until it fits."""
+    config = copy.deepcopy(CONFIG)
+    plan = _plan(config)
+    assert check_plan(plan)
+    adjusted, changes = auto_adjust(config, REFERENCES, plan)
+    assert changes
+    assert any(c.startswith("swot:") for c in changes)
+    assert any(c.startswith("glorys:") for c in changes)
+    assert not check_plan(_plan(adjusted))
+    # The input config is left untouched.
+    assert config == CONFIG
+
+
+def test_driver_memory_counts_one_load_per_task():
+    """A file shared by the tasks of a batch is downloaded once but loaded by each task."""
+    catalog = [{
+        "path": "year.nc", "size": 10 * MB,
+        "date_start": "2023-12-01", "date_end": "2025-02-01",
+    }]
+    source = {
+        "dataset": "jason3", "observation_dataset": True, "n_parallel_workers": 1,
+        "nthreads_per_worker": 1, "plan_profile": {"file_mb": 10, "mem_mb": 20},
+    }
+    frts = [datetime(2024, 1, 3)]
+
+    def plan(batch_size):
+        cfg = {**source, "obs_batch_size": batch_size}
+        return plan_source(CONFIG, cfg, ["glonet"], frts, 0, catalog=catalog)
+
+    one, ten = plan(1), plan(10)
+    assert one.download_bytes == ten.download_bytes == 10 * MB
+    assert ten.driver_peak_bytes - one.driver_peak_bytes == 9 * 20 * MB
+
+
+def test_gridded_sources_batch_by_gridded_batch_size():
+    """Gridded sources use gridded_batch_size, observation sources obs_batch_size."""
+    gridded = {"observation_dataset": False, "obs_batch_size": 30, "gridded_batch_size": 6}
+    assert task_batch_size(gridded) == 6
+    assert task_batch_size({**gridded, "gridded_batch_size": None}) == 30
+    assert task_batch_size({**gridded, "observation_dataset": True}) == 30
+
+
+def test_parse_size_units():
+    """Decimal and binary Dask-style sizes are supported."""
+    assert parse_size("3GB") == 3 * GB
+    assert parse_size("512MiB") == 512 * 1024 ** 2
+    assert parse_size(1000) == 1000
+
+
+def test_a_region_does_not_shrink_the_plan():
+    """The wrapper does not cut reads to the box, so a regional plan is the global one."""
+    regional = {**CONFIG, "min_lon": 170, "max_lon": -170, "min_lat": -20, "max_lat": 10}
+    plan, global_plan = _plan(regional), _plan(CONFIG)
+    assert plan.prediction_bytes == global_plan.prediction_bytes
+    assert [s.download_bytes for s in plan.sources] == [
+        s.download_bytes for s in global_plan.sources
+    ]
+    assert [s.driver_peak_bytes for s in plan.sources] == [
+        s.driver_peak_bytes for s in global_plan.sources
+    ]
@@ -0,0 +1,110 @@
+"""Tests for progressive evaluation rounds and running estimates."""
+
+import json
+
+import pytest
+
+from dc1.evaluation.progressive import (
+    converged,
+    estimate_metrics,
+    load_entries,
+    progressive_settings,
+    progressive_units,
+    stratified_rounds,
+    write_estimates,
+)
+from dc1.evaluation.sharding import (
+    build_work_units,
+    expected_frts,
+    strided_units,
+    unit_config,
+    unit_directory,
+)
+
+CONFIG = {
+    "start_time": "2024-01-01",
+    "end_time": "2025-01-01",
+    "n_days_forecast": 10,
+    "n_days_interval": 7,
+}
+
+
+def test_rounds_are_evenly_spaced_samples():
+    """Every FRT is drawn once, each round every fourth FRT, reproducibly."""
+    frts = expected_frts(CONFIG)
+    rounds = stratified_rounds(frts, seed=3)
+    assert rounds == stratified_rounds(list(reversed(frts)), seed=3)
+    assert sorted(frt for r in rounds for frt in r) == frts
+    assert len(rounds) == 4 and sorted(len(r) for r in rounds) == [12, 13, 13, 13]
+    for round_frts in rounds:
+        assert {(b - a).days for a, b in zip(round_frts, round_frts[1:], strict=False)} == {28}
+
+
+def test_a_round_is_one_unit_per_reference():
+    """Each reference evaluates a whole round in one run, on exactly its FRTs."""
+    references = {"glonet": ["glorys", "jason3"]}
+    rounds = progressive_units(CONFIG, references, progressive_settings(CONFIG))
+    assert [len(units) for units in rounds] == [2, 2, 2, 2]
+    frts = expected_frts(CONFIG)
+    for units, round_frts in zip(rounds, stratified_rounds(frts, seed=0), strict=True):
+        for unit in units:
+            assert expected_frts(unit_config(CONFIG, unit)) == round_frts
+    ids = [unit.unit_id for units in rounds for unit in units]
+    assert len(set(ids)) == len(ids)
+    with pytest.raises(ValueError):
+        strided_units(CONFIG, references, [frts[0], frts[1], frts[3]])
+
+
+def _write_unit_results(data_directory, unit, value):
+    """Results a one-FRT unit run writes: one entry per lead time of its FRTs."""
+    results_dir = unit_directory(data_directory, unit) / "results"
+    results_dir.mkdir(parents=True)
+    entries = [
+        {
+            "ref_alias": unit.reference,
+            "forecast_reference_time": frt.isoformat(),
+            "lead_time": lead,
+            "result": [{"Variable": "zos", "Metric": "rmsd", "Value": value + lead}],
+        }
+        for frt in expected_frts(unit_config(CONFIG, unit))
+        for lead in range(10)
+    ]
+    (results_dir / f"results_{unit.model}.json").write_text(
+        json.dumps({"results": {unit.model: entries}})
+    )
+    return results_dir
+
+
+def test_one_frt_unit_yields_entries(tmp_path):
+    """The window of a one-FRT unit contains its FRT, so the unit has entries."""
+    frt = expected_frts(CONFIG)[20]
+    (unit,) = build_work_units(CONFIG, {"glonet": ["glorys"]}, frts_per_unit=1, frts=[frt])
+    assert expected_frts(unit_config(CONFIG, unit)) == [frt]
+
+    entries = load_entries([_write_unit_results(tmp_path, unit, 1.0)])
+    assert len(entries["glonet"]) == 10
+    (estimate,) = estimate_metrics(entries, n_boot=50)
+    assert (estimate.ref_alias, estimate.variable, estimate.metric) == ("glorys", "zos", "rmsd")
+    assert estimate.n_frts == 1
+    assert estimate.mean == 5.5
+
+
+def test_estimates_converge_and_are_recorded(tmp_path):
+    """Close per-FRT values give a tight interval; rounds are appended to the history."""
+    frts = expected_frts(CONFIG)[:6]
+    units = build_work_units(CONFIG, {"glonet": ["glorys"]}, frts_per_unit=1, frts=frts)
+    results_dirs = [
+        _write_unit_results(tmp_path, unit, 1.0 + 0.001 * k) for k, unit in enumerate(units)
+    ]
+    estimates = estimate_metrics(load_entries(results_dirs), n_boot=200)
+    assert estimates[0].n_frts == 6
+    assert converged(estimates, rel_ci=0.05)
+    assert not converged(estimates, rel_ci=1e-6)
+
+    path = write_estimates(
+        tmp_path / "progressive", 1, [f.isoformat() for f in frts], estimates, True
+    )
+    write_estimates(tmp_path / "progressive", 2, [], estimates, True)
+    history = json.loads(path.read_text())
+    assert [r["round"] for r in history["rounds"]] == [1, 2]
+    assert history["converged"] is True
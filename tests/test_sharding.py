@@ -0,0 +1,164 @@
+"""Tests for work-unit partitioning and merging of sharded runs."""
+
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from dc1.evaluation.journal import TaskJournal
+from dc1.evaluation.planner import catalog_coverage
+from dc1.evaluation.sharding import (
+    SHARDS_DIRNAME,
+    assign_units,
+    build_work_units,
+    expected_frts,
+    finished_units,
+    merge_shard_results,
+    missing_frts,
+    read_layout,
+    run_pending_units,
+    unit_config,
+    unit_directory,
+    write_layout,
+)
+
+CONFIG = {
+    "start_time": "2024-01-01",
+    "end_time": "2025-01-01",
+    "n_days_forecast": 10,
+    "n_days_interval": 7,
+}
+REFERENCES = {"glonet": ["glorys", "jason3"]}
+
+
+def _unit_frts(unit):
+    """FRTs a unit run evaluates, by the same rule as the full run."""
+    return expected_frts(unit_config(CONFIG, unit))
+
+
+def test_expected_frts_follow_the_wednesday_rule():
+    """FRTs are Wednesdays whose whole forecast ends by end_time."""
+    frts = expected_frts(CONFIG)
+    assert len(frts) == 51
+    assert frts[0] == date(2024, 1, 3)
+    assert frts[-1] == date(2024, 12, 18)
+    assert all(frt.weekday() == 2 for frt in frts)
+
+
+@pytest.mark.parametrize("frts_per_unit", [1, 4, 7])
+def test_units_cover_every_frt_exactly_once(frts_per_unit):
+    """Unit windows evaluate exactly the FRTs of the full run, without overlap."""
+    units = build_work_units(CONFIG, REFERENCES, frts_per_unit=frts_per_unit)
+    for reference in REFERENCES["glonet"]:
+        covered = [
+            frt for unit in units if unit.reference == reference for frt in _unit_frts(unit)
+        ]
+        assert covered == expected_frts(CONFIG)
+
+
+def test_unit_config_window_ends_with_the_last_forecast():
+    """end_time is the last FRT of the unit plus the forecast horizon."""
+    unit = build_work_units(CONFIG, REFERENCES, frts_per_unit=4)[0]
+    derived = unit_config(CONFIG, unit)
+    assert derived["start_time"] == "2024-01-03"
+    assert derived["end_time"] == (date(2024, 1, 24) + timedelta(days=10)).isoformat()
+    assert derived["dataset_references"] == {"glonet": ["glorys"]}
+    assert derived["skip_frt_snapshots"] is True
+
+
+def test_assignment_is_deterministic_and_complete():
+    """Every unit lands in exactly one shard, identically on every call."""
+    units = build_work_units(CONFIG, REFERENCES, frts_per_unit=4)
+    shards = assign_units(units, 3)
+    assert shards == assign_units(units, 3)
+    assert sorted(u.unit_id for shard in shards for u in shard) == sorted(
+        u.unit_id for u in units
+    )
+
+
+def test_layout_is_recorded_and_checked(tmp_path):
+    """The unit size is recorded once; a different one is refused."""
+    assert read_layout(tmp_path) is None
+    write_layout(tmp_path, 4)
+    write_layout(tmp_path, 4)
+    assert read_layout(tmp_path) == 4
+    with pytest.raises(ValueError):
+        write_layout(tmp_path, 1)
+
+
+def _write_unit_results(data_directory, unit):
+    results_dir = unit_directory(data_directory, unit) / "results"
+    results_dir.mkdir(parents=True)
+    entries = [
+        {"ref_alias": unit.reference, "forecast_reference_time": f"{frt}T00:00:00",
+         "lead_time": lead, "result": []}
+        for frt in _unit_frts(unit)
+        for lead in range(2)
+    ]
+    (results_dir / f"results_{unit.model}.json").write_text(
+        json.dumps({"results": {unit.model: entries}, "metadata": {"n_errors": 0}})
+    )
+
+
+def test_merge_reports_missing_frts(tmp_path):
+    """Merged results are checked against the FRTs of the full run."""
+    units = build_work_units(CONFIG, REFERENCES, frts_per_unit=4)
+    for unit in units:
+        _write_unit_results(tmp_path, unit)
+    written = merge_shard_results(
+        tmp_path, config=CONFIG, unit_dirs=[unit_directory(tmp_path, u) for u in units]
+    )
+    merged = json.loads(written[0].read_text())["results"]["glonet"]
+    assert len(merged) == 2 * 2 * 51
+    assert missing_frts(written, CONFIG, REFERENCES) == {}
+
+    dropped = units[-1]
+    written = merge_shard_results(
+        tmp_path, config=CONFIG,
+        unit_dirs=[unit_directory(tmp_path, u) for u in units if u != dropped],
+    )
+    missing = missing_frts(written, CONFIG, REFERENCES)
+    assert missing == {f"glonet/{dropped.reference}": _unit_frts(dropped)}
+
+
+def test_references_are_checked_on_the_frts_they_cover(tmp_path):
+    """Units without entries count as done and uncovered FRTs are not missing."""
+    units = build_work_units(CONFIG, REFERENCES, frts_per_unit=4)
+    last = [u for u in units if u.reference == "jason3"][-1]
+    calls: list[str] = []
+
+    def run(unit):
+        calls.append(unit.unit_id)
+        if unit != last:  # jason3 has no data for the FRTs of the last unit
+            _write_unit_results(tmp_path, unit)
+        return 0
+
+    with TaskJournal(tmp_path / SHARDS_DIRNAME / "journal_0of1.jsonl") as journal:
+        assert run_pending_units(units, run, journal, tmp_path) == 0
+    assert last.unit_id in finished_units(tmp_path)
+    with TaskJournal(tmp_path / SHARDS_DIRNAME / "journal_0of1.jsonl") as journal:
+        calls.clear()
+        run_pending_units(units, run, journal, tmp_path)
+    assert calls == []
+
+    written = merge_shard_results(
+        tmp_path, config=CONFIG, unit_dirs=[unit_directory(tmp_path, u) for u in units]
+    )
+    metadata = json.loads(written[0].read_text())["metadata"]
+    assert metadata["merged_from_units"] == len(units) - 1
+    gap = _unit_frts(last)
+    covered = {"jason3": [frt for frt in expected_frts(CONFIG) if frt not in gap]}
+    assert missing_frts(written, CONFIG, REFERENCES) == {"glonet/jason3": gap}
+    assert missing_frts(written, CONFIG, REFERENCES, covered=covered) == {}
+
+
+def test_catalog_coverage_follows_the_catalog_dates(tmp_path):
+    """A reference's catalog defines the FRTs it has data for."""
+    catalog = [
+        {"path": f"f{k}", "date_start": f"2024-01-{day:02d}T00:00:00",
+         "date_end": f"2024-01-{day:02d}T23:59:59"}
+        for k, day in enumerate(range(1, 20))
+    ]
+    (tmp_path / "jason3.json").write_text(json.dumps(catalog))
+    coverage = catalog_coverage(CONFIG, ["jason3", "glorys"], tmp_path)
+    assert coverage == {"jason3": [date(2024, 1, 3), date(2024, 1, 10), date(2024, 1, 17)]}
@@ -0,0 +1,116 @@
+"""Tests for the concurrent metadata scan of multi-file submissions."""
+
+import numpy as np
+import xarray as xr
+
+from dc1.evaluation import submission_scan
+from dc1.evaluation.submission_scan import (
+    StoreMetadata,
+    describe_dataset,
+    grid_matches,
+    grid_summary,
+    scan_submission,
+)
+from dc1.evaluation.submission_writer import SubmissionSpec, index_problems
+
+GOOD = {"lat": {"digest": "a"}, "lon": {"digest": "b"}}
+BAD = {"lat": {"digest": "x"}, "lon": {"digest": "b"}}
+
+
+def _submission(tmp_path, grids):
+    for k in range(len(grids)):
+        (tmp_path / f"2024{k + 1:02d}01.nc").touch()
+    by_name = {f"2024{k + 1:02d}01.nc": grid for k, grid in enumerate(grids)}
+
+    def reader(path):
+        return StoreMetadata(path=path, grid=dict(by_name[path.rsplit("/", 1)[-1]]))
+
+    return reader
+
+
+def test_threshold_reached_on_the_last_store_aborts(tmp_path):
+    """Reaching max_grid_mismatches aborts even with nothing left to cancel."""
+    reader = _submission(tmp_path, [GOOD, GOOD, BAD, BAD])
+    index = scan_submission(str(tmp_path), max_grid_mismatches=2, max_workers=1, reader=reader)
+    assert index.n_grid_mismatches == 2
+    assert index.n_not_scanned == 0
+    assert index.aborted and not index.ok
+    assert "too many grid mismatches" in index.summary()
+
+
+def test_below_threshold_scans_everything(tmp_path):
+    """Fewer mismatches than the threshold are reported without aborting."""
+    reader = _submission(tmp_path, [GOOD, BAD, GOOD])
+    index = scan_submission(str(tmp_path), max_grid_mismatches=2, reader=reader)
+    assert index.n_grid_mismatches == 1
+    assert not index.aborted and not index.ok
+    assert [s.grid_ok for s in index.stores] == [True, False, True]
+
+
+def test_zero_threshold_never_aborts(tmp_path):
+    """max_grid_mismatches=0 scans every store whatever the mismatches."""
+    reader = _submission(tmp_path, [GOOD, BAD, BAD])
+    index = scan_submission(str(tmp_path), max_grid_mismatches=0, reader=reader)
+    assert index.n_grid_mismatches == 2 and not index.aborted
+
+
+def test_early_stop_leaves_stores_unscanned(tmp_path):
+    """With one worker, stores after the threshold are not scanned."""
+    reader = _submission(tmp_path, [GOOD, BAD] + [GOOD] * 6)
+    index = scan_submission(str(tmp_path), max_grid_mismatches=1, max_workers=1, reader=reader)
+    assert index.aborted
+    assert index.n_not_scanned > 0
+    assert len(index.stores) + index.n_not_scanned == 8
+
+
+def test_undescribable_store_is_reported_per_store(tmp_path, monkeypatch):
+    """An error while describing an opened store is recorded, not raised."""
+    (tmp_path / "20240103.nc").touch()
+    monkeypatch.setattr(submission_scan, "open_store", lambda path: xr.Dataset())
+
+    def broken(meta, ds):
+        raise ValueError("undecodable time")
+
+    monkeypatch.setattr(submission_scan, "describe_dataset", broken)
+    meta = submission_scan.read_store_metadata(str(tmp_path / "20240103.nc"))
+    assert meta.error == "ValueError: undecodable time"
+
+
+def test_index_answers_the_quick_validation(tmp_path):
+    """Stores on the target grid with every variable and lead time need no reopen."""
+    spec = SubmissionSpec(lat=np.arange(0.0, 2.0), lon=np.arange(0.0, 3.0), variables=("zos",),
+                          lead_times=(0, 1))
+    grids = {"lat": spec.lat, "lon": spec.lon}
+
+    def reader(path):
+        ds = xr.Dataset(
+            {"zos": (("time", "lat", "lon"), np.zeros((2, 2, 3)))},
+            coords={"time": np.array(["2024-01-03", "2024-01-04"], dtype="datetime64[ns]"),
+                    "lat": spec.lat, "lon": spec.lon + ("bad" in path)},
+        )
+        return describe_dataset(StoreMetadata(path=path), ds)
+
+    for name in ("20240103.nc", "20240110.nc"):
+        (tmp_path / name).touch()
+    index = scan_submission(str(tmp_path), reference_grid=grids, reader=reader)
+    assert index_problems(index, spec) == []
+
+    (tmp_path / "20240117_bad.nc").touch()
+    index = scan_submission(str(tmp_path), reference_grid=grids, max_grid_mismatches=0,
+                            reader=reader)
+    assert index_problems(index, spec) == [
+        f"{tmp_path / '20240117_bad.nc'}: grid differs from the target grid"
+    ]
+
+
+def test_grid_matching_uses_the_validation_tolerance():
+    """Offsets the validation accepts (atol 0.01) match, larger or irregular ones do not."""
+    grid = np.arange(-180.0, 180.0, 0.25)
+    reference = grid_summary(grid)
+    assert grid_matches(grid_summary(grid.astype("float32")), reference)
+    assert grid_matches(grid_summary(grid + 0.004), reference)
+    assert not grid_matches(grid_summary(grid + 0.02), reference)
+    jittered = grid.copy()
+    jittered[100] += 0.05
+    assert not grid_matches(grid_summary(jittered), reference)
+    assert not grid_matches(grid_summary(grid[:-1]), reference)
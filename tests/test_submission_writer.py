@@ -0,0 +1,85 @@
+"""Tests for the streaming submission writer."""
+
+import json
+import threading
+
+import pytest
+import xarray as xr
+
+from benchmarks.synthetic import make_prediction
+from dc1.evaluation.submission_scan import INDEX_FILENAME, SubmissionIndex
+from dc1.evaluation.submission_writer import (
+    REPORT_FILENAME,
+    SubmissionSpec,
+    SubmissionWriter,
+    report_validates,
+)
+
+SCALE = 16
+
+
+def _spec(ds):
+    return SubmissionSpec(lat=ds["lat"].values, lon=ds["lon"].values)
+
+
+def test_valid_forecasts_are_written_and_indexed(tmp_path):
+    """Valid forecasts are written; the index describes the written stores."""
+    ds = make_prediction(scale=SCALE).rename({"lat": "latitude"})
+    ds["extra"] = ds["zos"] * 2
+    spec = SubmissionSpec(lat=ds["latitude"].values, lon=ds["lon"].values)
+    bad = ds.drop_vars("so")
+    with SubmissionWriter(tmp_path, spec) as writer:
+        assert writer.add("2024-01-03", ds).passed
+        assert not writer.add("2024-01-10", bad).passed
+    assert writer.summary() == "2 forecasts validated, 1 failed, 1 written"
+
+    written = xr.open_zarr(tmp_path / "20240103.zarr")
+    assert sorted(written.data_vars) == sorted(spec.variables)
+    assert "lat" in written.coords and written.chunks["time"] == (1,) * 10
+    assert not (tmp_path / "20240110.zarr").exists()
+
+    index = SubmissionIndex.load(tmp_path / INDEX_FILENAME)
+    (store,) = index.stores
+    assert sorted(store.variables) == sorted(spec.variables)
+    assert set(store.grid) == {"lat", "lon"} and store.grid_ok
+    assert index.is_fresh()
+
+    lines = (tmp_path / REPORT_FILENAME).read_text().splitlines()
+    assert sorted(json.loads(line)["init_date"] for line in lines) == ["2024-01-03", "2024-01-10"]
+
+
+def test_lazy_forecast_is_computed_once(tmp_path):
+    """Validation and the write share one computation of a dask forecast."""
+    da = pytest.importorskip("dask.array")
+    ds = make_prediction(scale=SCALE)
+    calls = []
+    lock = threading.Lock()
+
+    def model_step(block):
+        with lock:
+            calls.append(block.shape)
+        return block
+
+    for name in ds.data_vars:
+        values = da.from_array(ds[name].values, chunks=(5, -1, -1))
+        step = da.map_blocks(model_step, values, meta=values._meta)
+        ds[name] = (ds[name].dims, step)
+    with SubmissionWriter(tmp_path, _spec(ds)) as writer:
+        assert writer.add("2024-01-03", ds).passed
+    assert len(calls) == 2 * len(ds.data_vars)
+    assert writer.results["2024-01-03"].written
+
+
+def test_a_passing_report_replaces_the_validation(tmp_path):
+    """The dctools validation is skipped only while every reported forecast passed."""
+    ds = make_prediction(scale=SCALE)
+    with SubmissionWriter(tmp_path, _spec(ds)) as writer:
+        writer.add("2024-01-03", ds)
+        writer.add("2024-01-10", make_prediction(scale=SCALE, frt="2024-01-10"))
+    index = SubmissionIndex.load(tmp_path / INDEX_FILENAME)
+    assert report_validates(index, tmp_path)
+
+    with SubmissionWriter(tmp_path, _spec(ds), write_invalid=True) as writer:
+        writer.add("2024-01-17", make_prediction(scale=SCALE, frt="2024-01-17").drop_vars("so"))
+    assert not report_validates(SubmissionIndex.load(tmp_path / INDEX_FILENAME), tmp_path)
+    assert not report_validates(index, tmp_path / "elsewhere")
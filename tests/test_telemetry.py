@@ -0,0 +1,120 @@
+"""Tests for per-task telemetry built from a results file."""
+
+import json
+
+from dc1.evaluation.telemetry import (
+    TaskMetrics,
+    export_run_telemetry,
+    load_jsonl,
+    merge_unit_telemetry,
+    metrics_from_results,
+    summarize,
+    write_prometheus,
+)
+
+
+def _entry(ref, frt, lead, duration=1.0):
+    return {
+        "ref_alias": ref,
+        "forecast_reference_time": frt,
+        "lead_time": lead,
+        "duration_s": duration,
+        "preprocess_s": 0.5,
+        "n_points": 10,
+        "result": [],
+    }
+
+
+def _write_results(path, entries):
+    path.write_text(json.dumps({"dataset": "m", "results": {"m": entries}}), encoding="utf-8")
+    return path
+
+
+def test_batches_count_tasks_in_frt_then_lead_order(tmp_path):
+    """A batch holds obs_batch_size (FRT, lead) tasks, whatever the file order."""
+    entries = [
+        _entry("saral", frt, lead)
+        for frt in ("2024-01-10", "2024-01-03")
+        for lead in (2, 1, 0)
+    ]
+    records = metrics_from_results(_write_results(tmp_path / "r.json", entries), {"saral": 4})
+    batches = {(m.frt, m.lead_time): m.batch for m in records}
+    assert batches == {
+        ("2024-01-03", 0): 0, ("2024-01-03", 1): 0, ("2024-01-03", 2): 0,
+        ("2024-01-10", 0): 0, ("2024-01-10", 1): 1, ("2024-01-10", 2): 1,
+    }
+
+
+def test_entries_without_frt_do_not_break_ordering(tmp_path):
+    """Entries missing an FRT or a lead time sort last instead of raising."""
+    entries = [_entry("glorys", None, 0), _entry("glorys", "2024-01-03", None),
+               _entry("glorys", "2024-01-03", 0)]
+    records = metrics_from_results(_write_results(tmp_path / "r.json", entries), {"glorys": 1})
+    assert [(m.frt, m.lead_time, m.batch) for m in records] == [
+        ("2024-01-03", 0, 0), ("2024-01-03", None, 1), (None, 0, 2),
+    ]
+
+
+def test_export_writes_jsonl_and_prometheus(tmp_path):
+    """The export rewrites tasks.jsonl and the Prometheus file from the results."""
+    results = tmp_path / "results"
+    results.mkdir()
+    _write_results(results / "results_m.json", [_entry("saral", "2024-01-03", 0, 2.0)])
+    (results / "results_m_per_bins.jsonl.gz").write_bytes(b"")
+
+    for _ in range(2):
+        jsonl = export_run_telemetry(tmp_path, {"saral": 10}, driver_peak_rss_bytes=123)
+    assert jsonl is not None
+    records = load_jsonl(jsonl)
+    assert len(records) == 1 and records[0].total_s == 2.5
+    prom = (jsonl.parent / "dc1_evaluation.prom").read_text()
+    assert 'dc1_task_compute_seconds_total{dataset="saral"} 2.0' in prom
+    assert "dc1_driver_peak_rss_bytes 123" in prom
+
+
+def test_load_jsonl_ignores_unknown_fields_and_torn_lines(tmp_path):
+    """Records of older runs with extra fields are still read."""
+    path = tmp_path / "tasks.jsonl"
+    path.write_text(
+        json.dumps({"dataset": "a", "compute_s": 1.0, "bytes_downloaded": 5}) + "\n{torn\n"
+    )
+    assert load_jsonl(path) == [TaskMetrics(dataset="a", compute_s=1.0)]
+
+
+def test_summary_and_prometheus_rank_datasets(tmp_path):
+    """The slowest dataset comes first; per-dataset counters are aggregated."""
+    records = [
+        TaskMetrics("slow", batch=0, compute_s=10.0),
+        TaskMetrics("fast", batch=0, compute_s=1.0, status="error"),
+    ]
+    report = summarize(records)
+    assert report.index("slow") < report.index("fast")
+    prom = write_prometheus(records, tmp_path / "x.prom").read_text()
+    assert 'dc1_task_errors_total{dataset="fast"} 1' in prom
+
+
+def test_unit_telemetry_is_merged_with_distinct_batches(tmp_path):
+    """Merged unit telemetry keeps every task, numbers batches across units and keeps the peak."""
+    unit_dirs = []
+    for k, frt in enumerate(("2024-01-03", "2024-01-10")):
+        unit_dir = tmp_path / "shards" / f"unit{k}"
+        (unit_dir / "results").mkdir(parents=True)
+        entries = [_entry("saral", frt, lead) for lead in range(3)]
+        _write_results(unit_dir / "results" / "results_m.json", entries)
+        export_run_telemetry(unit_dir, {"saral": 2}, driver_peak_rss_bytes=100 * (k + 1),
+                             run_wall_s=1.5)
+        unit_dirs.append(unit_dir)
+    unit_dirs.append(tmp_path / "shards" / "no_telemetry")
+
+    jsonl = merge_unit_telemetry(unit_dirs, tmp_path)
+    assert jsonl is not None and jsonl == tmp_path / "telemetry" / "tasks.jsonl"
+    records = load_jsonl(jsonl)
+    assert [(m.frt, m.batch) for m in records] == [
+        ("2024-01-03", 0), ("2024-01-03", 0), ("2024-01-03", 1),
+        ("2024-01-10", 2), ("2024-01-10", 2), ("2024-01-10", 3),
+    ]
+    assert {m.extra["unit"] for m in records} == {"unit0", "unit1"}
+    prom = (jsonl.parent / "dc1_evaluation.prom").read_text()
+    assert "dc1_driver_peak_rss_bytes 200" in prom
+    assert "dc1_run_wall_seconds 3.0" in prom
+    assert merge_unit_telemetry([tmp_path / "missing"], tmp_path / "other") is None